@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Asyncio automation driver for many concurrent game windows.
+
+One controller process holds a pool of game sessions (each a display and,
+optionally, a window on it). Commands for a session run strictly in the
+order they were submitted, while different sessions proceed concurrently.
+A shared semaphore caps how many xdotool/scrot processes run at once.
+
+Each session reads its own game's published layout (the file the game was
+given via GAME_LAYOUT_FILE or warm_pool.py spawn --layout-file) and its own state directory
+(the game's working directory), so tile/moveto/push never act on another
+game's geometry or state.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# automation.py imports pygame; keep its banner out of the JSON report
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from automation import map_key
+from grid_layout import LAYOUT_FILE, load_layout
+from path_planner import load_latest_game_state, plan_command
+
+
+class AsyncGameSession:
+    """One game window driven through its own ordered command queue"""
+
+    def __init__(self, name, display=':99', window_id=None, screenshot_dir='/app/screenshots',
+                 state_dir='.', layout_file=LAYOUT_FILE, settle_delay=0.5):
+        self.name = name
+        self.display = display
+        self.window_id = window_id
+        self.screenshot_dir = os.path.join(screenshot_dir, name)
+        self.state_dir = state_dir
+        self.layout_file = layout_file
+        self.settle_delay = settle_delay
+        self.screenshot_count = 0
+        self.layout = load_layout(layout_file)
+        self.queue = asyncio.Queue()
+        self.worker = None
+        self.limiter = None
+        os.makedirs(self.screenshot_dir, exist_ok=True)
+
+    def start(self, limiter):
+        self.limiter = limiter
+        self.worker = asyncio.create_task(self.process_queue(), name=f"session-{self.name}")
+
+    async def stop(self):
+        await self.queue.join()
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def submit(self, command):
+        """Queue a command; the returned future resolves to its timings"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((command, future))
+        return future
+
+    async def process_queue(self):
+        while True:
+            command, future = await self.queue.get()
+            try:
+                result = await self.execute(command)
+                if not future.cancelled():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                self.queue.task_done()
+
+    async def run_x(self, *args):
+        """Run an X tool on this session's display under the shared concurrency limit"""
+        async with self.limiter:
+            process = await asyncio.create_subprocess_exec(
+                *args, env={'DISPLAY': self.display},
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+            _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"[{self.name}] {' '.join(args)} failed: {stderr.decode().strip()}")
+
+    async def send_keys(self, keys):
+        """Send one or more keys in a single xdotool invocation"""
+        if not keys:
+            return
+        mapped = [map_key(key) for key in keys]
+        if self.window_id:
+            await self.run_x('xdotool', 'windowfocus', '--sync', self.window_id,
+                             'key', '--window', self.window_id, '--delay', '30', *mapped)
+        else:
+            await self.run_x('xdotool', 'key', '--delay', '30', *mapped)
+
+    async def click(self, points):
+        """Click one or more (x, y) points in a single xdotool invocation"""
+        args = ['xdotool']
+        if self.window_id:
+            args += ['windowfocus', '--sync', self.window_id]
+        for x, y in points:
+            args += ['mousemove', str(int(x)), str(int(y)), 'click', '1']
+        await self.run_x(*args)
+
+    async def take_screenshot(self, action_name):
+        self.screenshot_count += 1
+        filename = f"screenshot_{self.screenshot_count:03d}_{action_name}.png"
+        filepath = os.path.join(self.screenshot_dir, filename)
+        await self.run_x('scrot', filepath)
+        return filepath
+
+    async def execute(self, command):
+        """Execute one automation command and return its phase timings"""
+        command = command.strip()
+        timings = {'command': command, 'input': 0.0, 'wait': 0.0, 'screenshot': 0.0}
+        parts = command.split()
+        screenshot_name = None
+
+        start = time.perf_counter()
+        if parts[0] == 'keyboard' and len(parts) == 2:
+            await self.send_keys([parts[1]])
+            screenshot_name = f"keyboard_{parts[1]}"
+        elif parts[0] == 'keys' and len(parts) > 1:
+            await self.send_keys(parts[1:])
+            screenshot_name = "keys_" + "_".join(parts[1:])
+        elif parts[0] == 'click' and len(parts) == 3:
+            await self.click([(int(parts[1]), int(parts[2]))])
+            screenshot_name = f"click_{parts[1]}_{parts[2]}"
+        elif parts[0] == 'tile' and len(parts) >= 3 and len(parts) % 2 == 1:
+            coords = [int(part) for part in parts[1:]]
+            self.layout = await asyncio.to_thread(load_layout, self.layout_file)
+            await self.click(self.layout.cells_to_pixels(list(zip(coords[0::2], coords[1::2]))))
+            screenshot_name = "tile_" + "_".join(parts[1:])
+        elif parts[0] in ('moveto', 'push'):
+            game_state = await asyncio.to_thread(load_latest_game_state, self.state_dir)
+            if game_state is None:
+                raise ValueError(f"[{self.name}] No game_state_step_*.json in {self.state_dir}")
+            await self.send_keys(plan_command(game_state, command))
+            screenshot_name = command.replace(" ", "_")
+        elif command == 'screenshot':
+            screenshot_start = time.perf_counter()
+            timings['path'] = await self.take_screenshot("manual")
+            timings['screenshot'] = time.perf_counter() - screenshot_start
+            return timings
+        elif command == 'wait':
+            await asyncio.sleep(1)
+            timings['wait'] = time.perf_counter() - start
+            return timings
+        else:
+            raise ValueError(f"[{self.name}] Unknown command: {command}")
+        timings['input'] = time.perf_counter() - start
+
+        wait_start = time.perf_counter()
+        await asyncio.sleep(self.settle_delay)  # Let the game process the input
+        timings['wait'] = time.perf_counter() - wait_start
+
+        screenshot_start = time.perf_counter()
+        timings['path'] = await self.take_screenshot(screenshot_name)
+        timings['screenshot'] = time.perf_counter() - screenshot_start
+        return timings
+
+
+class AsyncAutomationDriver:
+    """Pool of game sessions sharing one event loop and one concurrency limit"""
+
+    def __init__(self, sessions, max_concurrency=16):
+        self.sessions = {session.name: session for session in sessions}
+        self.max_concurrency = max_concurrency
+        self.limiter = None
+
+    async def __aenter__(self):
+        self.limiter = asyncio.Semaphore(self.max_concurrency)
+        for session in self.sessions.values():
+            session.start(self.limiter)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await asyncio.gather(*(session.stop() for session in self.sessions.values()))
+
+    def submit(self, session_name, command):
+        """Queue a command on one session; ordering is preserved per session"""
+        return self.sessions[session_name].submit(command)
+
+    async def run_plan(self, plan):
+        """Run {session name: [commands]} concurrently across sessions"""
+        futures = {name: [self.submit(name, command) for command in commands]
+                   for name, commands in plan.items()}
+        results = {}
+        for name, session_futures in futures.items():
+            outcomes = await asyncio.gather(*session_futures, return_exceptions=True)
+            results[name] = [outcome if not isinstance(outcome, Exception) else {'error': str(outcome)}
+                             for outcome in outcomes]
+        return results
+
+
+SESSION_FIELDS = ('state_dir', 'layout_file')
+
+
+def parse_session(spec, index, screenshot_dir, state_dir, layout_file=LAYOUT_FILE):
+    """Parse DISPLAY[/WINDOW_ID][,state_dir=DIR][,layout_file=PATH] into a session"""
+    target, *fields = spec.split(',')
+    options = {'state_dir': state_dir, 'layout_file': layout_file}
+    for field in fields:
+        key, _, value = field.partition('=')
+        if key not in SESSION_FIELDS or not value:
+            raise ValueError(f"Bad session field '{field}' in '{spec}' "
+                             f"(expected {'=..., '.join(SESSION_FIELDS)}=...)")
+        options[key] = value
+    display, _, window_id = target.partition('/')
+    return AsyncGameSession(f"session_{index:02d}", display=display, window_id=window_id or None,
+                            screenshot_dir=screenshot_dir, **options)
+
+
+def shared_session_files(sessions):
+    """Warnings for sessions that would read another game's layout or state files"""
+    warnings = []
+    for field in SESSION_FIELDS:
+        owners = {}
+        for session in sessions:
+            owners.setdefault(os.path.abspath(getattr(session, field)), []).append(session.name)
+        warnings += [f"Sessions {', '.join(names)} share {field} {path}"
+                     for path, names in owners.items() if len(names) > 1]
+    return warnings
+
+
+def load_plan_file(path, screenshot_dir):
+    """Read sessions and their commands from a JSON plan file"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    sessions, plan = [], {}
+    for index, entry in enumerate(data['sessions']):
+        name = entry.get('name', f"session_{index:02d}")
+        sessions.append(AsyncGameSession(name, display=entry.get('display', ':99'),
+                                         window_id=entry.get('window'),
+                                         screenshot_dir=screenshot_dir,
+                                         state_dir=entry.get('state_dir', '.'),
+                                         layout_file=entry.get('layout_file', LAYOUT_FILE)))
+        plan[name] = entry.get('commands', [])
+    return sessions, plan
+
+
+async def run(sessions, plan, max_concurrency):
+    async with AsyncAutomationDriver(sessions, max_concurrency) as driver:
+        return await driver.run_plan(plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive many game windows concurrently')
+    parser.add_argument('commands', nargs='*', help='Commands to run on every --session')
+    parser.add_argument('--session', '-s', action='append', default=[],
+                        help='Session as DISPLAY[/WINDOW_ID][,state_dir=DIR][,layout_file=PATH], '
+                             'e.g. ":99/4194312,state_dir=/games/a,layout_file=/games/a/layout.json" (repeatable)')
+    parser.add_argument('--plan', '-p', help='JSON file: {"sessions": [{"name", "display", "window", '
+                                             '"state_dir", "layout_file", "commands"}]}')
+    parser.add_argument('--max-concurrency', '-j', type=int, default=16,
+                        help='Maximum number of X tool processes running at once')
+    parser.add_argument('--screenshot-dir', default='/app/screenshots',
+                        help='Screenshots go to <dir>/<session name>/')
+    parser.add_argument('--state-dir', default='.',
+                        help='Default state directory for --session sessions without state_dir=')
+    parser.add_argument('--layout-file', default=LAYOUT_FILE,
+                        help='Default layout file for --session sessions without layout_file=')
+    args = parser.parse_args()
+
+    if args.plan:
+        sessions, plan = load_plan_file(args.plan, args.screenshot_dir)
+    elif args.session and args.commands:
+        try:
+            sessions = [parse_session(spec, i, args.screenshot_dir, args.state_dir, args.layout_file)
+                        for i, spec in enumerate(args.session)]
+        except ValueError as e:
+            parser.error(str(e))
+        plan = {session.name: list(args.commands) for session in sessions}
+    else:
+        parser.print_help()
+        return 1
+
+    # Only tile/moveto/push read these files, but a shared one is almost always a mistake
+    uses_files = any(command.split()[0] in ('tile', 'moveto', 'push')
+                     for commands in plan.values() for command in commands if command.strip())
+    if uses_files:
+        for warning in shared_session_files(sessions):
+            print(f"Warning: {warning}", file=sys.stderr)
+
+    start = time.perf_counter()
+    results = asyncio.run(run(sessions, plan, args.max_concurrency))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({'seconds': elapsed, 'sessions': results}, indent=2))
+    failed = any('error' in outcome for outcomes in results.values() for outcome in outcomes)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,27 +6,79 @@ import os
 import threading
 import pygame
 import argparse
+from contextlib import contextmanager
 from pygame.locals import *
+from grid_layout import load_layout
+from path_planner import load_latest_game_state, plan_command
+from tracing import Tracer, NullTracer, TRACE_FORMATS
+from control_server import ControlClient
+
+# Map common key names to xdotool key names
+KEY_MAPPING = {
+    'w': 'w',
+    'a': 'a', 
+    's': 's',
+    'd': 'd',
+    'r': 'r',
+    'space': 'space',
+    'enter': 'Return',
+    'esc': 'Escape'
+}
+
+def map_key(key):
+    """Translate a command key name into an xdotool key name"""
+    return KEY_MAPPING.get(key.lower(), key) or key
 
 class GameAutomation:
-    def __init__(self, game_process=None, target_window=None):
+    def __init__(self, game_process=None, target_window=None, state_dir='.',
+                 screenshot_dir="/app/screenshots", tracer=None, quiet=False, control=None):
         self.game_process = game_process
-        self.screenshot_dir = "/app/screenshots"
+        self.state_dir = state_dir
+        self.screenshot_dir = screenshot_dir
         os.makedirs(self.screenshot_dir, exist_ok=True)
         self.screenshot_count = 0
         self.window_id = None
         self.target_window = target_window
+        self.quiet = quiet
+        self.layout = load_layout(warn=not quiet)
+        self.last_timings = {}
+        self.tracer = tracer or NullTracer()
+        self.display_env = {'DISPLAY': ':99'}
+        self.control = control  # ControlClient for the in-game control server, if any
         
+    def log(self, message):
+        """Print progress output unless running in quiet mode"""
+        if not self.quiet:
+            print(message)
+    
+    def run_x(self, args, **kwargs):
+        """Run an X tool (xdotool, scrot) on the virtual display inside a trace span"""
+        name = ' '.join(args[:2]) if args[0] == 'xdotool' else args[0]
+        with self.tracer.span(name, argv=args):
+            return subprocess.run(args, env=self.display_env, **kwargs)
+    
+    def pause(self, seconds):
+        """Sleep inside a trace span so waits show up in the timeline"""
+        with self.tracer.span('sleep', seconds=seconds):
+            time.sleep(seconds)
+    
     def take_screenshot(self, action_name=""):
-        """Take a screenshot using scrot"""
+        """Take a screenshot using scrot, or from the game's framebuffer over the control socket"""
         self.screenshot_count += 1
         filename = f"screenshot_{self.screenshot_count:03d}_{action_name}.png"
         filepath = os.path.join(self.screenshot_dir, filename)
         
+        if self.control:
+            with self.tracer.span('control frame'):
+                reply = self.control.request(frame=True, state=False)
+                pygame.image.save(self.control.frame_surface(reply['frame']), filepath)
+            self.log(f"Screenshot saved: {filename}")
+            return filepath
+        
         # Use scrot to capture the virtual display
         try:
-            subprocess.run(['scrot', filepath], check=True, env={'DISPLAY': ':99'})
-            print(f"Screenshot saved: {filename}")
+            self.run_x(['scrot', filepath], check=True)
+            self.log(f"Screenshot saved: {filename}")
             return filepath
         except subprocess.CalledProcessError as e:
             print(f"Failed to take screenshot: {e}")
@@ -35,119 +87,148 @@ class GameAutomation:
     def send_keyboard_event(self, key):
         """Send keyboard event using xdotool"""
         try:
-            # Map common keys
-            key_mapping = {
-                'w': 'w',
-                'a': 'a', 
-                's': 's',
-                'd': 'd',
-                'r': 'r',
-                'space': 'space',
-                'enter': 'Return',
-                'esc': 'Escape'
-            }
+            mapped_key = map_key(key)
+            self.log(f"Sending keyboard event: {key} -> {mapped_key}")
             
-            mapped_key = key_mapping.get(key.lower(), key) or key
-            print(f"Sending keyboard event: {key} -> {mapped_key}")
+            if self.control:
+                return self.send_control_actions([key.lower()])
             
             # Focus the window first if we have window ID
             if self.window_id:
-                print(f"Focusing window {self.window_id}")
-                subprocess.run(['xdotool', 'windowfocus', self.window_id], 
-                             check=True, env={'DISPLAY': ':99'})
-                time.sleep(0.2)  # Longer delay after focusing
+                self.log(f"Focusing window {self.window_id}")
+                self.run_x(['xdotool', 'windowfocus', self.window_id], 
+                             check=True)
+                self.pause(0.2)  # Longer delay after focusing
                 
                 # Send key to specific window
-                print(f"Sending key '{mapped_key}' to window {self.window_id}")
-                subprocess.run(['xdotool', 'key', '--window', self.window_id, mapped_key], 
-                             check=True, env={'DISPLAY': ':99'})
+                self.log(f"Sending key '{mapped_key}' to window {self.window_id}")
+                self.run_x(['xdotool', 'key', '--window', self.window_id, mapped_key], 
+                             check=True)
                 
                 # Also try sending keydown/keyup events for better compatibility
-                subprocess.run(['xdotool', 'keydown', '--window', self.window_id, mapped_key], 
-                             check=False, env={'DISPLAY': ':99'})
-                time.sleep(0.1)
-                subprocess.run(['xdotool', 'keyup', '--window', self.window_id, mapped_key], 
-                             check=False, env={'DISPLAY': ':99'})
+                self.run_x(['xdotool', 'keydown', '--window', self.window_id, mapped_key], 
+                             check=False)
+                self.pause(0.1)
+                self.run_x(['xdotool', 'keyup', '--window', self.window_id, mapped_key], 
+                             check=False)
             else:
-                print("No window ID found, sending global key event")
+                self.log("No window ID found, sending global key event")
                 # Fallback to global key event
-                subprocess.run(['xdotool', 'key', mapped_key], 
-                             check=True, env={'DISPLAY': ':99'})
+                self.run_x(['xdotool', 'key', mapped_key], 
+                             check=True)
             
-            print(f"Successfully sent keyboard event: {key}")
+            self.log(f"Successfully sent keyboard event: {key}")
             return True
         except subprocess.CalledProcessError as e:
             print(f"Failed to send keyboard event {key}: {e}")
             return False
     
+    def send_control_actions(self, actions):
+        """Apply actions directly through the in-game control server"""
+        with self.tracer.span('control request', actions=actions):
+            reply = self.control.request(actions, state=False)
+        if not reply.get('ok'):
+            print(f"Control server rejected {actions}: {reply.get('error')}")
+            return False
+        return True
+    
+    def send_key_sequence(self, keys):
+        """Send a whole planned key sequence as one batched xdotool burst"""
+        if not keys:
+            self.log("Key sequence is empty, nothing to send")
+            return True
+        if self.control:
+            return self.send_control_actions(keys)
+        try:
+            self.log(f"Sending {len(keys)} keys in one burst: {' '.join(keys)}")
+            if self.window_id:
+                self.run_x(['xdotool', 'windowfocus', self.window_id], 
+                             check=True)
+                self.pause(0.1)  # Small delay after focusing
+                self.run_x(['xdotool', 'key', '--window', self.window_id, '--delay', '30'] + keys, 
+                             check=True)
+            else:
+                self.run_x(['xdotool', 'key', '--delay', '30'] + keys, 
+                             check=True)
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to send key sequence: {e}")
+            return False
+    
+    def plan_keys(self, command):
+        """Compile a moveto/push command into a key sequence using the current game state"""
+        if self.control:
+            game_state = self.control.request()['state']
+        else:
+            game_state = load_latest_game_state(self.state_dir)
+        if game_state is None:
+            raise ValueError(f"No game_state_step_*.json found in {os.path.abspath(self.state_dir)} "
+                             f"(is the game running there? --control plans from the live state)")
+        return plan_command(game_state, command)
+    
     def send_click_event(self, x, y):
         """Send mouse click event using xdotool"""
         try:
             # Log detailed click information
-            print(f"🖱️  CLICK EVENT DETAILS:")
-            print(f"   📍 Screen Coordinates: ({x}, {y})")
+            self.log(f"🖱️  CLICK EVENT DETAILS:")
+            self.log(f"   📍 Screen Coordinates: ({x}, {y})")
             
             # Calculate tile grid coordinates for our GLB Asset Matching game
             grid_info = self.get_tile_grid_info(x, y)
             if grid_info:
-                print(f"   🎯 Tile Grid: {grid_info}")
+                self.log(f"   🎯 Tile Grid: {grid_info}")
             
             # Show window information
             if self.window_id:
-                print(f"   🪟 Target Window ID: {self.window_id}")
+                self.log(f"   🪟 Target Window ID: {self.window_id}")
                 # Get window title if available
                 try:
-                    result = subprocess.run(['xdotool', 'getwindowname', self.window_id],
-                                          capture_output=True, text=True, env={'DISPLAY': ':99'})
+                    result = self.run_x(['xdotool', 'getwindowname', self.window_id],
+                                          capture_output=True, text=True)
                     if result.returncode == 0 and result.stdout.strip():
-                        print(f"   📝 Window Title: '{result.stdout.strip()}'")
+                        self.log(f"   📝 Window Title: '{result.stdout.strip()}'")
                 except:
                     pass
             else:
-                print(f"   🪟 Target: Global (no specific window)")
+                self.log(f"   🪟 Target: Global (no specific window)")
             
             # Focus the window first if we have window ID
             if self.window_id:
-                subprocess.run(['xdotool', 'windowfocus', self.window_id], 
-                             check=True, env={'DISPLAY': ':99'})
-                time.sleep(0.1)  # Small delay after focusing
+                self.run_x(['xdotool', 'windowfocus', self.window_id], 
+                             check=True)
+                self.pause(0.1)  # Small delay after focusing
             
             # Move mouse and click
-            print(f"   🎮 Moving mouse to ({x}, {y})...")
-            subprocess.run(['xdotool', 'mousemove', str(x), str(y)], 
-                         check=True, env={'DISPLAY': ':99'})
-            time.sleep(0.1)  # Small delay
-            print(f"   👆 Executing left click...")
-            subprocess.run(['xdotool', 'click', '1'], 
-                         check=True, env={'DISPLAY': ':99'})
-            print(f"   ✅ Click successful at ({x}, {y})")
+            self.log(f"   🎮 Moving mouse to ({x}, {y})...")
+            self.run_x(['xdotool', 'mousemove', str(x), str(y)], 
+                         check=True)
+            self.pause(0.1)  # Small delay
+            self.log(f"   👆 Executing left click...")
+            self.run_x(['xdotool', 'click', '1'], 
+                         check=True)
+            self.log(f"   ✅ Click successful at ({x}, {y})")
             return True
         except subprocess.CalledProcessError as e:
             print(f"   ❌ Failed to click at ({x}, {y}): {e}")
             return False
     
+    def refresh_layout(self):
+        """Reload the grid geometry published by the running game"""
+        self.layout = load_layout(warn=not self.quiet)
+        return self.layout
+    
     def get_tile_grid_info(self, x, y):
-        """Calculate tile grid information for GLB Asset Matching game"""
-        # Game grid constants (matching game.py)
-        GRID_WIDTH = 8
-        GRID_HEIGHT = 6
-        TILE_SIZE = 80
-        WINDOW_WIDTH = 1024
-        WINDOW_HEIGHT = 768
-        GRID_OFFSET_X = (WINDOW_WIDTH - GRID_WIDTH * TILE_SIZE) // 2  # 192
-        GRID_OFFSET_Y = (WINDOW_HEIGHT - GRID_HEIGHT * TILE_SIZE) // 2  # 104
+        """Calculate tile grid information for the box pushing game"""
+        layout = self.layout
+        cells, inside = layout.pixels_to_cells([(x, y)])
+        left, top, right, bottom = layout.grid_area
         
         # Check if click is within the game grid area
-        if (x >= GRID_OFFSET_X and x < GRID_OFFSET_X + GRID_WIDTH * TILE_SIZE and
-            y >= GRID_OFFSET_Y and y < GRID_OFFSET_Y + GRID_HEIGHT * TILE_SIZE):
-            
-            # Calculate grid coordinates
-            grid_x = (x - GRID_OFFSET_X) // TILE_SIZE
-            grid_y = (y - GRID_OFFSET_Y) // TILE_SIZE
+        if inside[0]:
+            grid_x, grid_y = (int(v) for v in cells[0])
             
-            # Calculate tile center coordinates
-            tile_center_x = GRID_OFFSET_X + grid_x * TILE_SIZE + TILE_SIZE // 2
-            tile_center_y = GRID_OFFSET_Y + grid_y * TILE_SIZE + TILE_SIZE // 2
+            # Tile center coordinates come from the precomputed lookup table
+            tile_center_x, tile_center_y = (int(v) for v in layout.cell_centers[grid_y, grid_x])
             
             # Calculate offset from tile center
             offset_x = x - tile_center_x
@@ -155,72 +236,84 @@ class GameAutomation:
             
             return f"Row {grid_y}, Col {grid_x} (center: {tile_center_x},{tile_center_y}, offset: {offset_x:+},{offset_y:+})"
         else:
-            return f"Outside game grid (grid area: {GRID_OFFSET_X}-{GRID_OFFSET_X + GRID_WIDTH * TILE_SIZE}, {GRID_OFFSET_Y}-{GRID_OFFSET_Y + GRID_HEIGHT * TILE_SIZE})"
+            return f"Outside game grid (grid area: {left}-{right}, {top}-{bottom})"
     
     def show_grid_layout(self):
         """Display the tile grid layout for reference"""
-        # Game grid constants (matching game.py)
-        GRID_WIDTH = 8
-        GRID_HEIGHT = 6
-        TILE_SIZE = 80
-        WINDOW_WIDTH = 1024
-        WINDOW_HEIGHT = 768
-        GRID_OFFSET_X = (WINDOW_WIDTH - GRID_WIDTH * TILE_SIZE) // 2  # 192
-        GRID_OFFSET_Y = (WINDOW_HEIGHT - GRID_HEIGHT * TILE_SIZE) // 2  # 104
+        layout = self.refresh_layout()
+        left, top, right, bottom = layout.grid_area
         
-        print(f"\n🎮 GLB Asset Matching Game - Tile Grid Layout")
-        print(f"   Window Size: {WINDOW_WIDTH} x {WINDOW_HEIGHT}")
-        print(f"   Grid Size: {GRID_WIDTH} x {GRID_HEIGHT} tiles")
-        print(f"   Tile Size: {TILE_SIZE} x {TILE_SIZE} pixels")
-        print(f"   Grid Offset: ({GRID_OFFSET_X}, {GRID_OFFSET_Y})")
-        print(f"   Grid Area: {GRID_OFFSET_X}-{GRID_OFFSET_X + GRID_WIDTH * TILE_SIZE} x {GRID_OFFSET_Y}-{GRID_OFFSET_Y + GRID_HEIGHT * TILE_SIZE}")
+        print(f"\n🎮 Box Pushing Game - Tile Grid Layout")
+        print(f"   Window Size: {layout.screen_width} x {layout.screen_height}")
+        print(f"   Grid Size: {layout.grid_width} x {layout.grid_height} tiles")
+        print(f"   Tile Size: {layout.tile_size} x {layout.tile_size} pixels")
+        print(f"   Grid Offset: ({layout.offset_x}, {layout.offset_y})")
+        print(f"   Grid Area: {left}-{right} x {top}-{bottom}")
+        columns, rows = layout.visible_columns, layout.visible_rows
+        print(f"   Visible Cells: cols {columns.start}-{columns.stop - 1}, rows {rows.start}-{rows.stop - 1}")
         print()
         
         print("📍 Tile Center Coordinates:")
         print("   ", end="")
-        for col in range(GRID_WIDTH):
+        for col in columns:
             print(f"Col{col:2}", end="     ")
         print()
         
-        for row in range(GRID_HEIGHT):
+        for row in rows:
             print(f"Row{row}: ", end="")
-            for col in range(GRID_WIDTH):
-                center_x = GRID_OFFSET_X + col * TILE_SIZE + TILE_SIZE // 2
-                center_y = GRID_OFFSET_Y + row * TILE_SIZE + TILE_SIZE // 2
+            for center_x, center_y in layout.cell_centers[row, columns.start:columns.stop]:
                 print(f"({center_x:3},{center_y:3})", end=" ")
             print()
         
+        first_col, first_row = columns.start, rows.start
+        last_col, last_row = columns.stop - 1, rows.stop - 1
+        (first_x, first_y), (mid_x, mid_y), (last_x, last_y) = layout.cells_to_pixels(
+            [(first_col, first_row), ((first_col + last_col) // 2, (first_row + last_row) // 2),
+             (last_col, last_row)])
         print(f"\n💡 Example click commands:")
-        print(f"   First tile (top-left):    click {GRID_OFFSET_X + TILE_SIZE//2} {GRID_OFFSET_Y + TILE_SIZE//2}")
-        print(f"   Center tile:              click {GRID_OFFSET_X + 3*TILE_SIZE + TILE_SIZE//2} {GRID_OFFSET_Y + 2*TILE_SIZE + TILE_SIZE//2}")
-        print(f"   Last tile (bottom-right): click {GRID_OFFSET_X + 7*TILE_SIZE + TILE_SIZE//2} {GRID_OFFSET_Y + 5*TILE_SIZE + TILE_SIZE//2}")
+        print(f"   First tile (top-left):    click {first_x} {first_y}")
+        print(f"   Center tile:              click {mid_x} {mid_y}")
+        print(f"   Last tile (bottom-right): click {last_x} {last_y}")
+        print(f"   By cell (col row pairs):  tile {first_col} {first_row} {last_col} {last_row}")
         print()
     
+    def click_tiles(self, cells):
+        """Click a whole plan of (col, row) cells, converted to pixels in one pass"""
+        try:
+            points = self.layout.cells_to_pixels(cells)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return False
+        for x, y in points:
+            if not self.send_click_event(int(x), int(y)):
+                return False
+        return True
+    
     def wait_for_gui(self, timeout=10):
         """Wait for the pygame window to be ready"""
-        print("Waiting for GUI to be ready...")
+        self.log("Waiting for GUI to be ready...")
         
         # If a specific window ID or name is provided, try that first
         if self.target_window:
-            print(f"Looking for specific window: {self.target_window}")
+            self.log(f"Looking for specific window: {self.target_window}")
             try:
                 # Check if it's a window ID (numeric)
                 if self.target_window.isdigit():
                     self.window_id = self.target_window
-                    print(f"Using provided window ID: {self.window_id}")
+                    self.log(f"Using provided window ID: {self.window_id}")
                     # Verify the window exists
-                    result = subprocess.run(['xdotool', 'getwindowname', self.window_id],
-                                          capture_output=True, text=True, env={'DISPLAY': ':99'})
+                    result = self.run_x(['xdotool', 'getwindowname', self.window_id],
+                                          capture_output=True, text=True)
                     if result.returncode == 0:
-                        print(f"Window title: '{result.stdout.strip()}'")
+                        self.log(f"Window title: '{result.stdout.strip()}'")
                         return True
                 else:
                     # Search by window name
-                    result = subprocess.run(['xdotool', 'search', '--name', self.target_window], 
-                                          capture_output=True, text=True, env={'DISPLAY': ':99'})
+                    result = self.run_x(['xdotool', 'search', '--name', self.target_window], 
+                                          capture_output=True, text=True)
                     if result.returncode == 0 and result.stdout.strip():
                         self.window_id = result.stdout.strip().split('\n')[0]
-                        print(f"Found target window: {self.target_window}, ID: {self.window_id}")
+                        self.log(f"Found target window: {self.target_window}, ID: {self.window_id}")
                         return True
             except Exception as e:
                 print(f"Error finding target window: {e}")
@@ -230,20 +323,20 @@ class GameAutomation:
                 # First, let's see what windows are available
                 if i == 0:  # Only on first attempt to avoid spam
                     try:
-                        all_windows = subprocess.run(['xdotool', 'search', '--name', '.*'], 
-                                                   capture_output=True, text=True, env={'DISPLAY': ':99'})
+                        all_windows = self.run_x(['xdotool', 'search', '--name', '.*'], 
+                                                   capture_output=True, text=True)
                         if all_windows.returncode == 0:
                             window_list = all_windows.stdout.strip().split('\n')
-                            print(f"Available windows: {window_list}")
+                            self.log(f"Available windows: {window_list}")
                             
                             # Show window titles for each ID
                             for window_id in window_list[:5]:  # Limit to first 5 to avoid spam
                                 if window_id.strip():
                                     try:
-                                        title_result = subprocess.run(['xdotool', 'getwindowname', window_id.strip()],
-                                                                    capture_output=True, text=True, env={'DISPLAY': ':99'})
+                                        title_result = self.run_x(['xdotool', 'getwindowname', window_id.strip()],
+                                                                    capture_output=True, text=True)
                                         if title_result.returncode == 0:
-                                            print(f"  Window {window_id.strip()}: '{title_result.stdout.strip()}'")
+                                            self.log(f"  Window {window_id.strip()}: '{title_result.stdout.strip()}'")
                                     except:
                                         pass
                     except:
@@ -258,55 +351,55 @@ class GameAutomation:
                 ]
                 
                 for pattern, search_type in window_patterns:
-                    result = subprocess.run(['xdotool', 'search', search_type, pattern], 
-                                          capture_output=True, text=True, env={'DISPLAY': ':99'})
+                    result = self.run_x(['xdotool', 'search', search_type, pattern], 
+                                          capture_output=True, text=True)
                     if result.returncode == 0 and result.stdout.strip():
                         window_ids = result.stdout.strip().split('\n')
                         for window_id in window_ids:
                             if window_id.strip():
                                 self.window_id = window_id.strip()
-                                print(f"GUI is ready! Found window with pattern '{pattern}', Window ID: {self.window_id}")
+                                self.log(f"GUI is ready! Found window with pattern '{pattern}', Window ID: {self.window_id}")
                                 
                                 # Get the actual window title for debugging
                                 try:
-                                    title_result = subprocess.run(['xdotool', 'getwindowname', self.window_id],
-                                                                capture_output=True, text=True, env={'DISPLAY': ':99'})
+                                    title_result = self.run_x(['xdotool', 'getwindowname', self.window_id],
+                                                                capture_output=True, text=True)
                                     if title_result.returncode == 0:
                                         actual_title = title_result.stdout.strip()
-                                        print(f"Actual window title: '{actual_title}'")
+                                        self.log(f"Actual window title: '{actual_title}'")
                                         
                                         # If we found the window via pygame/python pattern, assume it's our game
                                         # even if the title is empty (common issue in virtual displays)
                                         if pattern in ['pygame', 'python'] or actual_title:
-                                            time.sleep(1)  # Give it a moment to fully load
+                                            self.pause(1)  # Give it a moment to fully load
                                             return True
                                 except:
                                     pass
                                 
                                 # If we can't get the title but found the window, use it anyway
                                 print(f"Using window {self.window_id} (title detection failed)")
-                                time.sleep(1)
+                                self.pause(1)
                                 return True
                                 
             except Exception as e:
                 print(f"Error during window search: {e}")
-            time.sleep(1)
+            self.pause(1)
         
         # Final fallback: if we have any windows available, use the first one
         try:
-            print("🔄 Final fallback: using any available window...")
-            all_windows = subprocess.run(['xdotool', 'search', '--name', '.*'], 
-                                       capture_output=True, text=True, env={'DISPLAY': ':99'})
+            self.log("🔄 Final fallback: using any available window...")
+            all_windows = self.run_x(['xdotool', 'search', '--name', '.*'], 
+                                       capture_output=True, text=True)
             if all_windows.returncode == 0 and all_windows.stdout.strip():
                 window_list = all_windows.stdout.strip().split('\n')
                 if window_list and window_list[0].strip():
                     self.window_id = window_list[0].strip()
-                    print(f"Using fallback window ID: {self.window_id}")
+                    self.log(f"Using fallback window ID: {self.window_id}")
                     try:
-                        title_result = subprocess.run(['xdotool', 'getwindowname', self.window_id],
-                                                    capture_output=True, text=True, env={'DISPLAY': ':99'})
+                        title_result = self.run_x(['xdotool', 'getwindowname', self.window_id],
+                                                    capture_output=True, text=True)
                         if title_result.returncode == 0:
-                            print(f"Fallback window title: '{title_result.stdout.strip()}'")
+                            self.log(f"Fallback window title: '{title_result.stdout.strip()}'")
                     except:
                         print("Could not get fallback window title")
                     return True
@@ -316,32 +409,56 @@ class GameAutomation:
         print("Timeout waiting for GUI")
         return False
     
+    @contextmanager
+    def timed(self, phase):
+        """Accumulate wall time of a command phase (input, wait, screenshot) into last_timings"""
+        start = time.perf_counter()
+        try:
+            with self.tracer.span(phase):
+                yield
+        finally:
+            self.last_timings[phase] = self.last_timings.get(phase, 0.0) + time.perf_counter() - start
+    
+    def settle_and_capture(self, action_name, delay=0.5):
+        """Wait for the game to process an action, then take a screenshot"""
+        with self.timed('wait'):
+            self.pause(delay)  # Wait for action to complete
+        with self.timed('screenshot'):
+            return self.take_screenshot(action_name)
+    
     def execute_command(self, command):
         """Execute a single automation command"""
         command = command.strip()
-        print(f"Executing command: {command}")
+        self.last_timings = {'input': 0.0, 'wait': 0.0, 'screenshot': 0.0}
+        with self.tracer.span('command', command=command):
+            self.run_command(command)
+        return self.last_timings
+    
+    def run_command(self, command):
+        """Dispatch a command to its handler"""
+        self.log(f"Executing command: {command}")
+        self.refresh_layout()
         
         if command.startswith("keyboard "):
             key = command.split(" ", 1)[1]
-            success = self.send_keyboard_event(key)
+            with self.timed('input'):
+                success = self.send_keyboard_event(key)
             if success:
-                time.sleep(0.5)  # Wait for action to complete
-                self.take_screenshot(f"keyboard_{key}")
+                self.settle_and_capture(f"keyboard_{key}")
         
         elif command.startswith("click "):
             parts = command.split()
             if len(parts) >= 3:
                 try:
                     x, y = int(parts[1]), int(parts[2])
-                    print(f"\n🎯 PROCESSING CLICK COMMAND: '{command}'")
-                    success = self.send_click_event(x, y)
+                    self.log(f"\n🎯 PROCESSING CLICK COMMAND: '{command}'")
+                    with self.timed('input'):
+                        success = self.send_click_event(x, y)
                     if success:
-                        print(f"⏳ Waiting 0.5s for click action to complete...")
-                        time.sleep(0.5)  # Wait for action to complete
                         screenshot_name = f"click_{x}_{y}"
-                        print(f"📸 Taking screenshot: {screenshot_name}")
-                        self.take_screenshot(screenshot_name)
-                        print(f"✅ Click command completed successfully\n")
+                        self.log(f"⏳ Waiting 0.5s for click action to complete, then taking screenshot: {screenshot_name}")
+                        self.settle_and_capture(screenshot_name)
+                        self.log(f"✅ Click command completed successfully\n")
                     else:
                         print(f"❌ Click command failed\n")
                 except ValueError:
@@ -350,11 +467,40 @@ class GameAutomation:
                 print(f"❌ Invalid click command format: {command}")
                 print(f"   Expected: 'click <x> <y>', got: '{command}'")
         
+        elif command.startswith("tile "):
+            parts = command.split()[1:]
+            try:
+                coords = [int(part) for part in parts]
+            except ValueError:
+                coords = []
+            if coords and len(coords) % 2 == 0:
+                cells = list(zip(coords[0::2], coords[1::2]))
+                with self.timed('input'):
+                    success = self.click_tiles(cells)
+                if success:
+                    self.settle_and_capture("tile_" + "_".join(parts))
+            else:
+                print(f"❌ Invalid tile command format: {command}")
+                print(f"   Expected: 'tile <col> <row> [<col> <row> ...]', got: '{command}'")
+        
+        elif command.startswith("moveto ") or command.startswith("push "):
+            try:
+                keys = self.plan_keys(command)
+            except ValueError as e:
+                print(f"❌ Cannot plan '{command}': {e}")
+            else:
+                with self.timed('input'):
+                    success = self.send_key_sequence(keys)
+                if success:
+                    self.settle_and_capture(command.replace(" ", "_"))
+        
         elif command == "screenshot":
-            self.take_screenshot("manual")
+            with self.timed('screenshot'):
+                self.take_screenshot("manual")
         
         elif command == "wait":
-            time.sleep(1)
+            with self.timed('wait'):
+                self.pause(1)
         
         elif command == "grid" or command == "show-grid":
             self.show_grid_layout()
@@ -367,6 +513,13 @@ def main():
     parser.add_argument('commands', nargs='*', help='Automation commands to execute')
     parser.add_argument('--window', '-w', help='Target window name or ID (e.g., "1293" or "GLB Asset")')
     parser.add_argument('--list-windows', '-l', action='store_true', help='List all available windows and exit')
+    parser.add_argument('--state-dir', default='.', help='Directory where the game writes game_state_step_*.json')
+    parser.add_argument('--screenshot-dir', default='/app/screenshots', help='Directory for screenshots')
+    parser.add_argument('--trace', choices=TRACE_FORMATS,
+                        help='Write per-command timing spans next to the screenshots (jsonl or chrome)')
+    parser.add_argument('--quiet', '-q', action='store_true', help='Only print errors and the final summary')
+    parser.add_argument('--control', default=os.environ.get('GAME_CONTROL_SOCKET'),
+                        help='Drive the game through its control socket instead of xdotool/scrot')
     
     args = parser.parse_args()
     
@@ -398,9 +551,18 @@ def main():
         print("\nOptions:")
         print("  --window, -w <name/id>   Target specific window (name or ID)")
         print("  --list-windows, -l       List all available windows")
+        print("  --state-dir <dir>        Where the game writes its state files (default: .)")
+        print("  --screenshot-dir <dir>   Where screenshots are saved (default: /app/screenshots)")
+        print("  --trace jsonl|chrome     Write timing spans for every command and X call")
+        print("  --quiet, -q              Only print errors and the final summary")
+        print("  --control <socket>       Use the game's control server (Unix path or host:port)")
         print("\nCommands:")
         print("  keyboard <key>           Send keyboard event (w, a, s, d, r, etc.)")
         print("  click <x> <y>            Send mouse click at coordinates")
+        print("  tile <col> <row> [...]   Click the center of one or more grid cells")
+        print("  moveto <col> <row>       Walk the player to a cell in one key burst")
+        print("  push <box_id> <dir>      Walk behind a box and push it (up/down/left/right)")
+        print("  grid                     Show the live tile grid layout")
         print("  screenshot               Take a screenshot")
         print("  wait                     Wait 1 second")
         print("\nExamples:")
@@ -418,21 +580,40 @@ def main():
         target_window = os.environ['GAME_WINDOW_ID']
         print(f"Using GAME_WINDOW_ID from environment: {target_window}")
     
-    automation = GameAutomation(target_window=target_window)
+    tracer = None
+    if args.trace:
+        os.makedirs(args.screenshot_dir, exist_ok=True)
+        extension = 'jsonl' if args.trace == 'jsonl' else 'json'
+        trace_path = os.path.join(args.screenshot_dir, f"trace_{time.strftime('%Y%m%d_%H%M%S')}.{extension}")
+        tracer = Tracer(trace_path, args.trace)
+    
+    control = ControlClient(args.control) if args.control else None
+    automation = GameAutomation(target_window=target_window, state_dir=args.state_dir,
+                                screenshot_dir=args.screenshot_dir, tracer=tracer, quiet=args.quiet,
+                                control=control)
     
-    # Wait for GUI to be ready
-    if not automation.wait_for_gui():
-        print("GUI not ready, continuing anyway...")
+    # Wait for GUI to be ready (not needed when talking to the control server)
+    if not control:
+        with automation.tracer.span('wait_for_gui'):
+            gui_ready = automation.wait_for_gui()
+        if not gui_ready:
+            print("GUI not ready, continuing anyway...")
     
     # Take initial screenshot
-    automation.take_screenshot("initial")
+    with automation.tracer.span('initial_screenshot'):
+        automation.take_screenshot("initial")
     
     # Execute commands
     for command in args.commands:
         automation.execute_command(command)
-        time.sleep(0.2)  # Small delay between commands
+        automation.pause(0.2)  # Small delay between commands
     
     print(f"Automation complete. Screenshots saved in {automation.screenshot_dir}")
+    if control is not None:
+        control.close()
+    if tracer is not None:
+        tracer.close()
+        print(f"Trace saved to {tracer.path}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
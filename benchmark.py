@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the box pushing game and its automation tooling.
+
+Measures engine moves/sec, generator levels/sec, renderer frames/sec and
+per-command automation latency (split into input, wait and screenshot time),
+and reports everything as JSON so results can be compared across releases.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+SUITES = ['engine', 'generator', 'render', 'automation']
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+
+
+def summarize(samples):
+    """Latency summary of a list of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean': statistics.fmean(ordered),
+        'p50': ordered[len(ordered) // 2],
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+    }
+
+
+@contextlib.contextmanager
+def quiet_game(workdir):
+    """Run game code in a scratch directory with its console output suppressed"""
+    previous = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        os.chdir(previous)
+
+
+def create_game(workdir):
+    """Create a BoxPushingGame with a freshly generated level
+
+    Its grid layout goes to the scratch directory, so the host-wide layout of
+    a live game (read by the automation suite) is left alone.
+    """
+    import game
+    with quiet_game(workdir):
+        game_instance = game.BoxPushingGame(layout_file=os.path.join(workdir, 'layout.json'))
+        # The level's starting state is written in the background; keep its log off stdout
+        game_instance.state_writer.flush()
+    return game_instance
+
+
+def close_game(game_instance):
+    """Stop the game's background state writer and layout publisher (call inside quiet_game)"""
+    game_instance.state_writer.close()
+    game_instance.layout_publisher.close()
+
+
+def bench_engine(duration, workdir):
+    """Random moves/sec through try_move_player + update_game_logic"""
+    game_instance = create_game(workdir)
+    rng = random.Random(0)
+    moves = accepted = 0
+    with quiet_game(workdir):
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            for _ in range(1000):
+                if game_instance.try_move_player(*rng.choice(DIRECTIONS)):
+                    game_instance.update_game_logic()
+                    accepted += 1
+                moves += 1
+            # Keep the undo history bounded and the level in play
+            if game_instance.game_state['game_status'] == 'won' or len(game_instance.undo_stack) > 100000:
+                game_instance.generate_new_game_state()
+        elapsed = time.perf_counter() - start
+        close_game(game_instance)
+    return {
+        'moves': moves,
+        'accepted_moves': accepted,
+        'seconds': elapsed,
+        'moves_per_sec': moves / elapsed,
+    }
+
+
+def bench_generator(duration):
+    """Levels/sec from generate_box_pushing_state"""
+    from game_state_generator import generate_box_pushing_state
+    levels = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        generate_box_pushing_state()
+        levels += 1
+    elapsed = time.perf_counter() - start
+    return {'levels': levels, 'seconds': elapsed, 'levels_per_sec': levels / elapsed}
+
+
+def bench_render(duration, workdir):
+    """Frames/sec for BoxPushingGame.draw (including the display flip)"""
+    game_instance = create_game(workdir)
+    frame_times = []
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        frame_start = time.perf_counter()
+        game_instance.draw()
+        frame_times.append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+    with quiet_game(workdir):
+        close_game(game_instance)
+    return {
+        'frames': len(frame_times),
+        'seconds': elapsed,
+        'frames_per_sec': len(frame_times) / elapsed,
+        'frame_time': summarize(frame_times),
+    }
+
+
+def bench_automation(commands, iterations, window, workdir):
+    """End-to-end latency of GameAutomation.execute_command against a running game"""
+    missing = [tool for tool in ('xdotool', 'scrot') if shutil.which(tool) is None]
+    if missing:
+        return {'skipped': f"missing tools: {', '.join(missing)}"}
+
+    from automation import GameAutomation
+    automation = GameAutomation(target_window=window, screenshot_dir=os.path.join(workdir, 'screenshots'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not automation.wait_for_gui(timeout=5):
+            return {'skipped': 'no game window found'}
+
+        per_command = {}
+        for _ in range(iterations):
+            for command in commands:
+                start = time.perf_counter()
+                timings = dict(automation.execute_command(command))
+                timings['total'] = time.perf_counter() - start
+                samples = per_command.setdefault(command, {})
+                for phase, seconds in timings.items():
+                    samples.setdefault(phase, []).append(seconds)
+
+    return {command: {phase: summarize(values) for phase, values in phases.items()}
+            for command, phases in per_command.items()}
+
+
+def run_benchmarks(suites, duration, automation_commands, iterations, window):
+    """Run the selected suites and return a JSON-serializable report"""
+    import pygame
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'video_driver': os.environ.get('SDL_VIDEODRIVER', 'default'),
+        'duration_per_suite': duration,
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='box_bench_') as workdir:
+        for suite in suites:
+            print(f"Running {suite} benchmark...", file=sys.stderr)
+            if suite == 'engine':
+                result = bench_engine(duration, workdir)
+            elif suite == 'generator':
+                result = bench_generator(duration)
+            elif suite == 'render':
+                result = bench_render(duration, workdir)
+            else:
+                result = bench_automation(automation_commands, iterations, window, workdir)
+            report['results'][suite] = result
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Box Pushing Game Benchmark Suite')
+    parser.add_argument('--suite', '-s', nargs='+', choices=SUITES, default=SUITES,
+                        help='Benchmarks to run (default: all)')
+    parser.add_argument('--duration', '-d', type=float, default=2.0,
+                        help='Seconds to spend on each throughput benchmark')
+    parser.add_argument('--output', '-o', help='Write the JSON report to this file instead of stdout')
+    parser.add_argument('--window', '-w', default=os.environ.get('GAME_WINDOW_ID'),
+                        help='Game window for the automation benchmark')
+    parser.add_argument('--command', '-c', action='append', dest='commands',
+                        help='Automation command to time (repeatable, default: "keyboard d" and "keyboard a")')
+    parser.add_argument('--iterations', '-n', type=int, default=5,
+                        help='Repetitions of each automation command')
+    parser.add_argument('--real-display', action='store_true',
+                        help='Render to the real display instead of the SDL dummy driver')
+    args = parser.parse_args()
+
+    # pygame prints its banner when it is first imported (game modules are
+    # imported lazily, inside the suites), and SDL reads the video driver when
+    # a game opens its display, so both variables must be set before either
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    if not args.real_display:
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    report = run_benchmarks(args.suite, args.duration, args.commands or ['keyboard d', 'keyboard a'],
+                            args.iterations, args.window)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Benchmark results saved to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+In-game control server for driving BoxPushingGame without X input injection.
+
+The game listens on a local socket (a Unix socket path or host:port) for
+newline-delimited JSON requests, applies the requested actions through the
+same handle_input logic as real key presses, and replies with the resulting
+state and, optionally, the current framebuffer:
+
+    -> {"actions": ["w", "w", "d"], "frame": false}
+    <- {"ok": true, "changed": true, "state_hash": "...", "state": {...}}
+"""
+
+import base64
+import json
+import os
+import socket
+import threading
+
+import pygame
+
+ACTION_KEYS = {
+    'w': pygame.K_w,
+    'a': pygame.K_a,
+    's': pygame.K_s,
+    'd': pygame.K_d,
+    'space': pygame.K_SPACE,
+    'r': pygame.K_r,
+    'u': pygame.K_u,
+    'y': pygame.K_y,
+}
+
+
+def parse_address(address):
+    """Return (family, address) for a 'host:port' string or a Unix socket path"""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return socket.AF_INET, (host, int(port))
+    return socket.AF_UNIX, address
+
+
+def create_listener(address):
+    """Bind a listening socket, replacing a stale Unix socket file if needed"""
+    family, bind_address = parse_address(address)
+    if family == socket.AF_UNIX and os.path.exists(bind_address):
+        os.unlink(bind_address)
+    listener = socket.socket(family, socket.SOCK_STREAM)
+    if family == socket.AF_INET:
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(bind_address)
+    listener.listen()
+    return listener
+
+
+def encode_message(message):
+    """One newline-delimited JSON message"""
+    return json.dumps(message).encode() + b'\n'
+
+
+def set_nodelay(sock):
+    if sock.family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class ControlServer:
+    """Accepts control connections and applies their actions to a running game"""
+
+    def __init__(self, game, address):
+        self.game = game
+        self.address = address
+        self.listener = None
+        self.running = False
+
+    def start(self):
+        self.listener = create_listener(self.address)
+        self.running = True
+        threading.Thread(target=self.accept_loop, name='control-accept', daemon=True).start()
+        print(f"Control server listening on {self.address}")
+
+    def stop(self):
+        self.running = False
+        if self.listener is not None:
+            self.listener.close()
+            family, bind_address = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(bind_address):
+                os.unlink(bind_address)
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                break
+            set_nodelay(connection)
+            threading.Thread(target=self.serve_connection, args=(connection,),
+                             name='control-connection', daemon=True).start()
+
+    def serve_connection(self, connection):
+        with connection, connection.makefile('rb') as reader:
+            for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    reply = self.handle_request(json.loads(line))
+                except Exception as e:
+                    reply = encode_message({'ok': False, 'error': str(e)})
+                try:
+                    connection.sendall(reply)
+                except OSError:
+                    break
+
+    def handle_request(self, request):
+        """Apply the request's actions under the game's state lock and return the encoded reply"""
+        actions = request.get('actions')
+        if actions is None:
+            actions = [request['action']] if 'action' in request else []
+        unknown = [action for action in actions if action not in ACTION_KEYS]
+        if unknown:
+            return encode_message({'ok': False, 'error': f"Unknown actions: {unknown}"})
+
+        game = self.game
+        with game.state_lock:
+            step_before = game.step_counter
+            for action in actions:
+                game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=ACTION_KEYS[action]))
+            response = {
+                'ok': True,
+                'changed': game.step_counter != step_before,
+                'step': game.step_counter,
+                'state_hash': f"{game.state_hash:016x}",
+            }
+            if request.get('state', True):
+                response['state'] = game.game_state
+            if request.get('frame'):
+                response['frame'] = self.capture_frame()
+            # Encode while still holding the lock so the state cannot change underneath
+            return encode_message(response)
+
+    def capture_frame(self):
+        """Render the current state at rest and return a raw RGB copy of it, base64 encoded"""
+        self.game.render_frame(settled=True)
+        screen = self.game.screen
+        width, height = screen.get_size()
+        return {
+            'width': width,
+            'height': height,
+            'format': 'RGB',
+            'data': base64.b64encode(pygame.image.tostring(screen, 'RGB')).decode('ascii'),
+        }
+
+
+class ControlClient:
+    """Blocking client for the in-game control server"""
+
+    def __init__(self, address, timeout=5.0):
+        family, connect_address = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(connect_address)
+        set_nodelay(self.sock)
+        self.reader = self.sock.makefile('rb')
+
+    def request(self, actions=(), frame=False, state=True):
+        """Send actions and wait for the resulting state"""
+        self.sock.sendall(encode_message({'actions': list(actions), 'frame': frame, 'state': state}))
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Control server closed the connection")
+        return json.loads(line)
+
+    def frame_surface(self, frame):
+        """Turn a frame from a reply back into a pygame Surface"""
+        data = base64.b64decode(frame['data'])
+        return pygame.image.frombuffer(data, (frame['width'], frame['height']), frame['format'])
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
@@ -0,0 +1,208 @@
+"""
+Array-backed visual effects: particles, movement tweens and the shared pulse.
+
+All effect state lives in fixed-capacity NumPy arrays that are updated in
+bulk once per frame. Emitting particles recycles dead slots instead of
+allocating objects, and drawing stamps every live particle onto the screen
+with one vectorized blend through pygame.surfarray. Particle positions are
+in level pixels (cell * tile size), so they stay put when the camera scrolls.
+
+The quality knob trades richness for frame time:
+
+    off    no particles or tweens (the target/player pulse is kept)
+    low    short tweens, few small particles
+    high   smoother tweens, dense bursts
+"""
+
+import math
+
+import numpy as np
+import pygame
+
+EFFECT_QUALITIES = {
+    'off': None,
+    'low': {'capacity': 256, 'burst': 8, 'dust': 3, 'size': 2, 'tween_seconds': 0.08},
+    'high': {'capacity': 2048, 'burst': 28, 'dust': 10, 'size': 3, 'tween_seconds': 0.12},
+}
+
+# Velocity kept per second, so particles slow down as they fade
+PARTICLE_DAMPING = 0.05
+
+PLAYER_SLOT = 0
+
+
+class ParticleSystem:
+    """Fixed pool of particles stored as parallel arrays"""
+
+    def __init__(self, capacity, size, seed=None):
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)  # Seconds left; <= 0 marks a free slot
+        self.max_life = np.ones(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.float32)
+        self.scratch = np.zeros((capacity, 2), dtype=np.float32)
+        self.rng = np.random.default_rng(seed)
+
+        # Pixel offsets of one size x size particle stamp
+        offsets_y, offsets_x = np.mgrid[0:size, 0:size]
+        self.stamp = np.stack([offsets_x.ravel(), offsets_y.ravel()], axis=1) - size // 2
+
+    def clear(self):
+        self.life[:] = 0.0
+
+    def emit(self, x, y, count, color, speed, life, direction=None, spread=math.pi):
+        """Start up to count particles at (x, y) in free slots; returns how many started"""
+        slots = np.flatnonzero(self.life <= 0.0)[:count]
+        n = len(slots)
+        if n == 0:
+            return 0
+        heading = 0.0 if direction is None else math.atan2(direction[1], direction[0])
+        angles = heading + self.rng.uniform(-spread, spread, n)
+        speeds = speed * self.rng.uniform(0.4, 1.0, n)
+        lives = life * self.rng.uniform(0.6, 1.0, n)
+        self.position[slots] = (x, y)
+        self.velocity[slots, 0] = np.cos(angles) * speeds
+        self.velocity[slots, 1] = np.sin(angles) * speeds
+        self.life[slots] = lives
+        self.max_life[slots] = lives
+        self.color[slots] = color
+        return n
+
+    def update(self, dt):
+        """Advance every particle at once"""
+        if self.life.max() <= 0.0:
+            return
+        np.multiply(self.velocity, dt, out=self.scratch)
+        self.position += self.scratch
+        self.velocity *= PARTICLE_DAMPING ** dt
+        self.life -= dt
+
+    def draw(self, surface, origin, clip):
+        """Alpha-blend live particles onto the surface, fading with their remaining life"""
+        live = np.flatnonzero(self.life > 0.0)
+        if len(live) == 0:
+            return
+        centers = (self.position[live] + origin).astype(np.int32)
+        points = (centers[:, None, :] + self.stamp[None, :, :]).reshape(-1, 2)
+        alpha = np.repeat(self.life[live] / self.max_life[live], len(self.stamp))
+        colors = np.repeat(self.color[live], len(self.stamp), axis=0)
+
+        inside = ((points[:, 0] >= clip.left) & (points[:, 0] < clip.right) &
+                  (points[:, 1] >= clip.top) & (points[:, 1] < clip.bottom))
+        xs, ys = points[inside, 0], points[inside, 1]
+        pixels = pygame.surfarray.pixels3d(surface)
+        try:
+            current = pixels[xs, ys].astype(np.float32)
+            pixels[xs, ys] = current + (colors[inside] - current) * alpha[inside, None]
+        finally:
+            del pixels  # Unlock the surface
+
+
+class TweenSystem:
+    """Eased pixel offsets of moving objects (slot 0 is the player, 1 + id a box)"""
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.resize(1)
+
+    def resize(self, count):
+        self.start = np.zeros((count, 2), dtype=np.float32)
+        self.began = np.zeros(count, dtype=np.float64)
+        self.offset = np.zeros((count, 2), dtype=np.float32)
+        self.progress = np.ones(count, dtype=np.float64)
+
+    def start_move(self, slot, dx, dy, now):
+        """Slide an object that just moved by (dx, dy) pixels in from where it is drawn"""
+        self.start[slot] = self.offset[slot] - (dx, dy)
+        self.offset[slot] = self.start[slot]
+        self.began[slot] = now
+        self.progress[slot] = 0.0
+
+    def shift(self, dx, dy, now):
+        """Move every running tween by (dx, dy) pixels and ease it in again from there"""
+        active = self.progress < 1.0
+        self.start[active] = self.offset[active] + (dx, dy)
+        self.offset[active] = self.start[active]
+        self.began[active] = now
+
+    def update(self, now):
+        np.clip((now - self.began) / self.duration, 0.0, 1.0, out=self.progress)
+        remaining = (1.0 - self.progress) ** 3  # Ease out
+        np.multiply(self.start, remaining[:, None], out=self.offset)
+
+
+class EffectsSystem:
+    """Per-game effects with a quality setting; 'off' keeps only the pulse"""
+
+    def __init__(self, quality='high', tile_size=50):
+        if quality not in EFFECT_QUALITIES:
+            raise ValueError(f"Unknown effects quality '{quality}' "
+                             f"(expected one of {', '.join(EFFECT_QUALITIES)})")
+        self.quality = quality
+        self.settings = EFFECT_QUALITIES[quality]
+        self.enabled = self.settings is not None
+        self.tile_size = tile_size
+        self.pulse = 0.0
+        self.last_update = None
+        if self.enabled:
+            self.particles = ParticleSystem(self.settings['capacity'], self.settings['size'])
+            self.tweens = TweenSystem(self.settings['tween_seconds'])
+
+    def reset(self, box_count):
+        """Drop running effects, e.g. when a new level starts"""
+        if self.enabled:
+            self.particles.clear()
+            self.tweens.resize(box_count + 1)
+
+    def update(self, ticks):
+        """Advance all effects to the given pygame tick count (milliseconds)"""
+        self.pulse = abs(ticks % 1000 - 500) / 500.0
+        if not self.enabled:
+            return
+        now = ticks / 1000.0
+        dt = 0.0 if self.last_update is None else min(now - self.last_update, 0.1)
+        self.last_update = now
+        self.particles.update(dt)
+        self.tweens.update(now)
+
+    def offset(self, slot):
+        """Current pixel offset of an object from its cell"""
+        if not self.enabled:
+            return 0, 0
+        dx, dy = self.tweens.offset[slot]
+        return int(dx), int(dy)
+
+    def on_scroll(self, dx, dy, ticks):
+        """Keep moving objects where they are drawn when the camera scrolls by (dx, dy) cells
+
+        Objects are drawn relative to the camera, so a scroll makes every cell
+        jump; running tweens absorb the jump instead of sliding in from a cell
+        that is no longer where they were. Particles are in level pixels and
+        need no correction.
+        """
+        if self.enabled:
+            self.tweens.shift(dx * self.tile_size, dy * self.tile_size, ticks / 1000.0)
+
+    def on_move(self, x, y, dx, dy, box_slot, box_on_target, ticks, dust_color, burst_color):
+        """Start the effects of a move that left the player on (x, y)"""
+        if not self.enabled:
+            return
+        now = ticks / 1000.0
+        size = self.tile_size
+        self.tweens.start_move(PLAYER_SLOT, dx * size, dy * size, now)
+        if box_slot is None:
+            return
+        self.tweens.start_move(box_slot, dx * size, dy * size, now)
+
+        # Dust kicked up behind the box, then a burst if it landed on a target
+        center_x, center_y = (x + 0.5) * size, (y + 0.5) * size
+        self.particles.emit(center_x + dx * size * 0.5, center_y + dy * size * 0.5,
+                            self.settings['dust'], dust_color, speed=90.0, life=0.3,
+                            direction=(-dx, -dy), spread=1.0)
+        if box_on_target:
+            self.particles.emit(center_x + dx * size, center_y + dy * size,
+                                self.settings['burst'], burst_color, speed=160.0, life=0.45)
+
+    def draw(self, surface, origin, clip):
+        if self.enabled:
+            self.particles.draw(surface, origin, clip)
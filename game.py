@@ -1,20 +1,30 @@
 import pygame
+import argparse
+import copy
 import json
 import os
+import signal
 import sys
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
+import random
 import time
 from game_state_generator import generate_box_pushing_state
-
-# Initialize Pygame
-pygame.init()
-
-# Screen dimensions
-SCREEN_WIDTH = 800
-SCREEN_HEIGHT = 600
-GRID_SIZE = 50
-GRID_OFFSET_X = 50
-GRID_OFFSET_Y = 50
+from path_planner import latest_state_file
+from grid_layout import (LayoutPublisher, SCREEN_WIDTH, SCREEN_HEIGHT, GRID_SIZE,
+                         GRID_OFFSET_X, GRID_OFFSET_Y, GRID_WIDTH, GRID_HEIGHT,
+                         VIEW_WIDTH, VIEW_HEIGHT, LAYOUT_FILE)
+from zobrist import ZobristTable, TranspositionTable
+from profiler import FrameProfiler, NullProfiler
+from control_server import ControlServer
+from effects import EFFECT_QUALITIES, EffectsSystem
+from level_pack import LevelPack, append_to_level_pack
+from recorder import SessionRecorder
+from sprite_baker import load_sprite_atlas
+from state_stream import StateStreamServer
+from state_writer import SAVE_POLICIES, StateWriter
 
 # Colors (Modern, vibrant color palette)
 COLORS = {
@@ -35,66 +45,357 @@ COLORS = {
     'score_bg': (50, 50, 70),       # Dark background for UI
     'button': (100, 120, 150),      # Button color
     'button_hover': (120, 140, 170), # Button hover
+    'dust': (190, 180, 160),        # Push dust particles
+}
+
+# Palette colors that baked sprites are tinted with, per atlas role: (sprite key, color)
+SPRITE_TINTS = {
+    'wall': [('wall', 'wall_highlight')],
+    'floor': [('floor', 'empty')],
+    'box': [('box', 'box'), ('box_on_target', 'box_on_target')],
 }
 
+# Static grid cells are pre-rendered in square chunks of this many tiles
+CHUNK_TILES = 8
+CHUNK_CACHE_SIZE = 32
+
+def init_pygame():
+    """Initialize only the pygame modules the game uses (no audio, joystick, ...)"""
+    pygame.display.init()
+    pygame.font.init()
+
+@lru_cache(maxsize=None)
+def load_fonts() -> Tuple[pygame.font.Font, pygame.font.Font, pygame.font.Font]:
+    """Load the UI fonts once per process; forked workers inherit them"""
+    pygame.font.init()
+    return pygame.font.Font(None, 24), pygame.font.Font(None, 36), pygame.font.Font(None, 18)
+
 class BoxPushingGame:
-    def __init__(self):
+    def __init__(self, journal_path: Optional[str] = None, transposition_capacity: int = 100000,
+                 profiler: Optional[FrameProfiler] = None, profile_overlay: bool = False,
+                 level_pack: Optional[str] = None, level_index: Optional[int] = None,
+                 initial_state: Optional[Dict] = None, level_width: int = GRID_WIDTH,
+                 level_height: int = GRID_HEIGHT, save_policy: str = 'step', save_every: int = 10,
+                 save_idle: float = 0.5, effects_quality: str = 'high',
+                 sprite_atlas: Optional[str] = None, layout_file: str = LAYOUT_FILE):
+        init_pygame()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Box Pushing Puzzle - Use WASD to move, SPACE to select")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 24)
-        self.large_font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 18)
+        self.font, self.large_font, self.small_font = load_fonts()
         
         # Game state
         self.game_state = None
         self.running = True
         self.step_counter = 0
         
-        # Visual effects
-        self.animations = []
-        self.particle_effects = []
+        # Size of newly generated levels
+        self.level_width = level_width
+        self.level_height = level_height
         
-        # Load or generate initial game state
-        self.load_or_generate_game_state()
+        # The live grid layout for the automation tool, written off the game loop
+        self.layout_file = layout_file
+        self.layout_publisher = LayoutPublisher(layout_file)
+        
+        # Camera (first visible column and row) and pre-rendered chunks of static cells
+        self.camera_x = 0
+        self.camera_y = 0
+        self.chunk_cache = OrderedDict()
+        
+        # Optional baked sprites (see sprite_baker.py); flat shapes are drawn without them
+        self.sprites = self.load_sprites(sprite_atlas) if sprite_atlas else {}
+        
+        # Visual effects (particles, movement tweens, pulse); settled frames use the inert set
+        self.effects = EffectsSystem(effects_quality, GRID_SIZE)
+        self.settled_effects = EffectsSystem('off', GRID_SIZE)
+        self.frame_effects = self.effects
+        
+        # Frame-phase profiling (no-op unless a profiler is given)
+        self.profiler = profiler or NullProfiler()
+        self.profile_overlay = profile_overlay and profiler is not None
         
+        # Lock serializing the game loop with control server requests
+        self.state_lock = threading.Lock()
+        self.control_server = None
+        self.state_stream = None
+        
+        # State files are written off the game loop by a coalescing background writer
+        self.state_writer = StateWriter(save_policy, every=save_every, idle_seconds=save_idle)
+        
+        # Optional session recording fed from the render loop
+        self.recorder = None
+        
+        # Undo/redo history of per-move deltas, optionally mirrored to a journal
+        self.undo_stack = []
+        self.redo_stack = []
+        self.journal = open(journal_path, 'a') if journal_path else None
+        
+        # Incremental Zobrist hash of the current state and a bounded table of seen states
+        self.zobrist = None
+        self.state_hash = 0
+        self.transpositions = TranspositionTable(transposition_capacity)
+        
+        # Optional memory-mapped level pack that new games are drawn from
+        self.level_pack = LevelPack(level_pack) if level_pack else None
+        
+        # Load or generate initial game state
+        if initial_state is not None:
+            self.set_game_state(initial_state)
+        elif self.level_pack is not None and level_index is not None:
+            self.load_pack_level(level_index)
+        else:
+            self.load_or_generate_game_state()
+        
+    def load_sprites(self, path: str) -> Dict[str, pygame.Surface]:
+        """Load a baked sprite atlas and tint its sprites with the palette once"""
+        sprites = {}
+        for role, sprite in load_sprite_atlas(path).items():
+            for key, color in SPRITE_TINTS[role]:
+                tinted = sprite.copy()
+                tinted.fill(COLORS[color], special_flags=pygame.BLEND_RGB_MULT)
+                sprites[key] = tinted
+        print(f"Loaded sprites for {', '.join(sorted(sprites))} from {path}")
+        return sprites
+    
+    def start_control_server(self, address: str):
+        """Accept actions over a local socket, bypassing X input injection"""
+        self.control_server = ControlServer(self, address)
+        self.control_server.start()
+    
+    def start_state_stream(self, address: str):
+        """Publish a snapshot and then per-move diffs to observers on a local socket"""
+        self.state_stream = StateStreamServer(self, address)
+        self.state_stream.start()
+    
+    def start_recording(self, path: str, every: int = 0, fps: int = 30):
+        """Record sampled frames into one animated file (every=0: one frame per state change)"""
+        self.recorder = SessionRecorder(path, self.screen.get_size(), every=every, fps=fps)
+        print(f"Recording session to {path}")
+    
+    def publish_layout(self):
+        """Hand the live grid geometry to the background layout publisher"""
+        self.layout_publisher.submit(grid_width=self.game_state['grid_width'],
+                                     grid_height=self.game_state['grid_height'],
+                                     camera_x=self.camera_x, camera_y=self.camera_y,
+                                     sprites=int(bool(self.sprites)))
+    
     def load_or_generate_game_state(self):
         """Load game state from JSON file or generate new one"""
         json_files = [f for f in os.listdir('.') if f.endswith('.json') and f.startswith('game_state')]
         
         if json_files:
-            # Load the most recent game state file
-            json_files.sort(reverse=True)
+            # Load the most recent game state file: the highest step number, by number not name
+            path = latest_state_file('.') or sorted(json_files, reverse=True)[0]
             try:
-                with open(json_files[0], 'r') as f:
-                    self.game_state = json.load(f)
-                print(f"Loaded game state from {json_files[0]}")
+                with open(path, 'r') as f:
+                    game_state = json.load(f)
+                # Continue numbering after the resumed step so older files never look newer
+                self.step_counter = game_state.get('step', 0)
+                self.set_game_state(game_state)
+                print(f"Loaded game state from {os.path.basename(path)}")
             except Exception as e:
-                print(f"Error loading {json_files[0]}: {e}")
+                print(f"Error loading {os.path.basename(path)}: {e}")
                 self.generate_new_game_state()
         else:
             self.generate_new_game_state()
     
     def generate_new_game_state(self):
-        """Generate a new random game state"""
-        game_state_json = generate_box_pushing_state()
-        self.game_state = json.loads(game_state_json)
+        """Generate a new random game state, or pick a random level from the level pack"""
+        if self.level_pack is not None and len(self.level_pack):
+            self.load_pack_level(random.randrange(len(self.level_pack)))
+            return
+        game_state_json = generate_box_pushing_state(self.level_width, self.level_height)
+        self.set_game_state(json.loads(game_state_json))
         print("Generated new random game state")
     
+    def load_pack_level(self, index: int):
+        """Start a fresh game on one level of the level pack"""
+        self.set_game_state(self.level_pack[index])
+        print(f"Loaded level {index} of {len(self.level_pack)} from {self.level_pack.path}")
+    
+    def set_game_state(self, game_state: Dict):
+        """Replace the current game state with a copy and reset everything derived from it
+
+        The game changes its state in place, so the caller's dict is never kept.
+        """
+        self.game_state = copy.deepcopy(game_state)
+        self.chunk_cache.clear()
+        self.effects.reset(len(game_state['boxes']))
+        self.reset_history()
+        self.rehash_state()
+        self.update_camera(publish=False)
+        self.publish_layout()
+        
+        # The level's starting position is on disk before the first move
+        self.game_state['step'] = self.step_counter
+        self.state_writer.submit(self.step_counter, self.game_state, force=True)
+    
+    def update_camera(self, publish: bool = True) -> bool:
+        """Scroll the view to center the player, clamped to the level; True if it moved"""
+        player = self.game_state['player']
+        max_x = max(0, self.game_state['grid_width'] - VIEW_WIDTH)
+        max_y = max(0, self.game_state['grid_height'] - VIEW_HEIGHT)
+        camera_x = min(max(player['x'] - VIEW_WIDTH // 2, 0), max_x)
+        camera_y = min(max(player['y'] - VIEW_HEIGHT // 2, 0), max_y)
+        if (camera_x, camera_y) == (self.camera_x, self.camera_y):
+            return False
+        self.effects.on_scroll(camera_x - self.camera_x, camera_y - self.camera_y, pygame.time.get_ticks())
+        self.camera_x, self.camera_y = camera_x, camera_y
+        if publish:
+            self.publish_layout()
+        return True
+    
+    def cell_to_screen(self, x: int, y: int) -> Tuple[int, int]:
+        """Top-left screen pixel of a cell under the current camera"""
+        return (GRID_OFFSET_X + (x - self.camera_x) * GRID_SIZE,
+                GRID_OFFSET_Y + (y - self.camera_y) * GRID_SIZE)
+    
+    def visible_cells(self) -> Tuple[range, range]:
+        """Columns and rows inside the camera's view"""
+        return (range(self.camera_x, min(self.game_state['grid_width'], self.camera_x + VIEW_WIDTH)),
+                range(self.camera_y, min(self.game_state['grid_height'], self.camera_y + VIEW_HEIGHT)))
+    
+    def view_rect(self) -> pygame.Rect:
+        """Screen area covered by the visible cells"""
+        columns, rows = self.visible_cells()
+        return pygame.Rect(GRID_OFFSET_X, GRID_OFFSET_Y, len(columns) * GRID_SIZE, len(rows) * GRID_SIZE)
+    
+    def is_visible(self, x: int, y: int) -> bool:
+        return (self.camera_x <= x < self.camera_x + VIEW_WIDTH and
+                self.camera_y <= y < self.camera_y + VIEW_HEIGHT)
+    
+    def save_level_to_pack(self, path: str) -> int:
+        """Append the current level layout to a level pack and return the pack size"""
+        return append_to_level_pack(path, [self.game_state])
+    
     def save_game_state(self):
-        """Save current game state to JSON file"""
+        """Queue the current game state for game_state_step_N.json (written in the background)"""
         self.step_counter += 1
-        filename = f"game_state_step_{self.step_counter}.json"
         
         # Update step in game state
         self.game_state['step'] = self.step_counter
         
-        try:
-            with open(filename, 'w') as f:
-                json.dump(self.game_state, f, indent=2)
-            print(f"Saved game state to {filename}")
-        except Exception as e:
-            print(f"Error saving game state: {e}")
+        with self.profiler.phase('persistence'):
+            self.state_writer.submit(self.step_counter, self.game_state)
+        
+        if self.state_stream is not None:
+            with self.profiler.phase('stream'):
+                self.state_stream.publish()
+    
+    def rehash_state(self):
+        """Recompute the state hash from scratch and forget previously seen states"""
+        width, height = self.game_state['grid_width'], self.game_state['grid_height']
+        if self.zobrist is None or (self.zobrist.grid_width, self.zobrist.grid_height) != (width, height):
+            self.zobrist = ZobristTable(width, height)
+        self.state_hash = self.zobrist.hash_state(self.game_state)
+        self.transpositions.clear()
+        self.remember_state()
+    
+    def remember_state(self) -> bool:
+        """Record the current state in the transposition table; True if it was seen before"""
+        moves = self.game_state['score']['moves']
+        best = self.transpositions.lookup(self.state_hash)
+        if best is None or moves < best:
+            self.transpositions.store(self.state_hash, moves)
+        return best is not None
+    
+    def reset_history(self):
+        """Forget undo/redo history, e.g. when a new level starts"""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.write_journal('reset', None)
+    
+    def write_journal(self, op: str, delta: Optional[Dict]):
+        """Append a history operation to the session journal, if enabled"""
+        if self.journal is None:
+            return
+        entry = {'op': op, 'step': self.step_counter, 'delta': delta}
+        self.journal.write(json.dumps(entry) + '\n')
+        self.journal.flush()
+    
+    def record_move(self, dx: int, dy: int, box_index: Optional[int],
+                    selection: Optional[List[Optional[int]]] = None):
+        """Push the delta of a successful move onto the undo stack
+
+        A box selection change is recorded the same way, as a move of (0, 0)
+        with selection holding the selected box before and after it.
+        """
+        score = self.game_state['score']
+        selected = self.game_state['player']['selected_box']
+        delta = {
+            'dx': dx,
+            'dy': dy,
+            'box': box_index,
+            'selected_box': selection or [selected, selected],
+            # Values as they were before the move, restored on undo
+            'points': score['points'],
+            'level_complete': score['level_complete'],
+            'game_status': self.game_state['game_status'],
+            'rewards': dict(self.game_state['rewards']),
+        }
+        self.undo_stack.append(delta)
+        self.redo_stack.clear()
+        self.write_journal('select' if selection else 'move', delta)
+        self.remember_state()
+    
+    def apply_delta(self, delta: Dict, sign: int):
+        """Replay (sign=1) or revert (sign=-1) the positional part of a move"""
+        dx, dy = delta['dx'] * sign, delta['dy'] * sign
+        player = self.game_state['player']
+        before, after = delta['selected_box']
+        player['selected_box'] = after if sign > 0 else before
+        if dx == dy == 0:
+            return  # A selection change moves nothing
+        self.state_hash ^= self.zobrist.player(player['x'], player['y'])
+        player['x'] += dx
+        player['y'] += dy
+        self.state_hash ^= self.zobrist.player(player['x'], player['y'])
+        score = self.game_state['score']
+        score['moves'] += sign
+        
+        if delta['box'] is not None:
+            box = self.game_state['boxes'][delta['box']]
+            old_x, old_y = box['x'], box['y']
+            box['x'] += dx
+            box['y'] += dy
+            self.state_hash ^= self.zobrist.box(old_x, old_y) ^ self.zobrist.box(box['x'], box['y'])
+            box['on_target'] = self.get_target_at_position(box['x'], box['y']) is not None
+            score['pushes'] += sign
+            
+            # Only the two cells the box touched can change target completion
+            for x, y in ((old_x, old_y), (box['x'], box['y'])):
+                target = self.get_target_at_position(x, y)
+                if target:
+                    target['completed'] = self.get_box_at_position(x, y) is not None
+    
+    def undo(self) -> bool:
+        """Revert the last move in O(1)"""
+        return self.step_history(self.undo_stack, self.redo_stack, -1, 'undo')
+    
+    def redo(self) -> bool:
+        """Re-apply the last undone move"""
+        return self.step_history(self.redo_stack, self.undo_stack, 1, 'redo')
+    
+    def step_history(self, source: List[Dict], target: List[Dict], sign: int, op: str) -> bool:
+        """Move the newest delta of one history stack to the other, reverting or replaying it"""
+        if not source:
+            return False
+        delta = source.pop()
+        self.apply_delta(delta, sign)
+        
+        if sign < 0:
+            score = self.game_state['score']
+            score['points'] = delta['points']
+            score['level_complete'] = delta['level_complete']
+            self.game_state['game_status'] = delta['game_status']
+            self.game_state['rewards'] = dict(delta['rewards'])
+        else:
+            self.update_game_logic()
+        
+        target.append(delta)
+        self.write_journal(op, delta)
+        self.remember_state()
+        return True
     
     def handle_input(self, event):
         """Handle keyboard input (turn-based)"""
@@ -102,25 +403,43 @@ class BoxPushingGame:
             return
             
         moved = False
-        player = self.game_state['player']
         
-        if event.key == pygame.K_w:
-            moved = self.try_move_player(0, -1)
-        elif event.key == pygame.K_s:
-            moved = self.try_move_player(0, 1)
-        elif event.key == pygame.K_a:
-            moved = self.try_move_player(-1, 0)
-        elif event.key == pygame.K_d:
-            moved = self.try_move_player(1, 0)
-        elif event.key == pygame.K_SPACE:
-            self.handle_selection()
-            moved = True
-        elif event.key == pygame.K_r:
-            self.generate_new_game_state()
-            moved = True
+        if event.key == pygame.K_u:
+            with self.profiler.phase('logic'):
+                changed = self.undo()
+                self.update_camera()
+            if changed:
+                self.save_game_state()
+            return
+        elif event.key == pygame.K_y:
+            with self.profiler.phase('logic'):
+                changed = self.redo()
+                self.update_camera()
+            if changed:
+                self.save_game_state()
+            return
+        
+        with self.profiler.phase('logic'):
+            if event.key == pygame.K_w:
+                moved = self.try_move_player(0, -1)
+            elif event.key == pygame.K_s:
+                moved = self.try_move_player(0, 1)
+            elif event.key == pygame.K_a:
+                moved = self.try_move_player(-1, 0)
+            elif event.key == pygame.K_d:
+                moved = self.try_move_player(1, 0)
+            elif event.key == pygame.K_SPACE:
+                self.handle_selection()
+                moved = True
+            elif event.key == pygame.K_r:
+                self.generate_new_game_state()
+                moved = True
+            
+            if moved:
+                self.update_game_logic()
+                self.update_camera()
         
         if moved:
-            self.update_game_logic()
             self.save_game_state()
     
     def try_move_player(self, dx: int, dy: int) -> bool:
@@ -147,20 +466,35 @@ class BoxPushingGame:
         if box_at_target:
             # Try to push the box
             if self.try_push_box(box_at_target, dx, dy):
+                self.state_hash ^= self.zobrist.player(player['x'], player['y']) ^ self.zobrist.player(new_x, new_y)
                 player['x'] = new_x
                 player['y'] = new_y
                 self.game_state['score']['moves'] += 1
                 self.game_state['score']['pushes'] += 1
+                box_index = self.game_state['boxes'].index(box_at_target)
+                self.record_move(dx, dy, box_index)
+                self.animate_move(dx, dy, box_index)
                 return True
             else:
                 return False
         else:
             # Simple move
+            self.state_hash ^= self.zobrist.player(player['x'], player['y']) ^ self.zobrist.player(new_x, new_y)
             player['x'] = new_x
             player['y'] = new_y
             self.game_state['score']['moves'] += 1
+            self.record_move(dx, dy, None)
+            self.animate_move(dx, dy, None)
             return True
     
+    def animate_move(self, dx: int, dy: int, box_index: Optional[int]):
+        """Start the tween, dust and target burst of a move that just happened"""
+        player = self.game_state['player']
+        box_on_target = box_index is not None and self.game_state['boxes'][box_index]['on_target']
+        self.effects.on_move(player['x'], player['y'], dx, dy,
+                             None if box_index is None else box_index + 1, box_on_target,
+                             pygame.time.get_ticks(), COLORS['dust'], COLORS['box_on_target'])
+    
     def try_push_box(self, box: Dict, dx: int, dy: int) -> bool:
         """Try to push a box in given direction"""
         new_x = box['x'] + dx
@@ -183,6 +517,7 @@ class BoxPushingGame:
             return False
         
         # Move the box
+        self.state_hash ^= self.zobrist.box(box['x'], box['y']) ^ self.zobrist.box(new_x, new_y)
         box['x'] = new_x
         box['y'] = new_y
         
@@ -209,10 +544,12 @@ class BoxPushingGame:
         
         if adjacent_boxes:
             # Select/deselect box
+            before = player['selected_box']
             if player['selected_box'] is None:
                 player['selected_box'] = adjacent_boxes[0]['id']
             else:
                 player['selected_box'] = None
+            self.record_move(0, 0, None, selection=[before, player['selected_box']])
     
     def get_box_at_position(self, x: int, y: int) -> Optional[Dict]:
         """Get box at given position"""
@@ -255,36 +592,74 @@ class BoxPushingGame:
                 rewards['perfect_solution'] = True
                 score['points'] += 1000
     
-    def draw_grid_cell(self, x: int, y: int, cell_type: str):
-        """Draw a single grid cell with enhanced visuals"""
-        screen_x = GRID_OFFSET_X + x * GRID_SIZE
-        screen_y = GRID_OFFSET_Y + y * GRID_SIZE
+    def draw_grid_cell(self, x: int, y: int, cell_type: str, surface=None, origin=None):
+        """Draw a single grid cell with enhanced visuals (on the screen unless a surface is given)"""
+        if surface is None:
+            surface = self.screen
+        screen_x, screen_y = origin or self.cell_to_screen(x, y)
         rect = pygame.Rect(screen_x, screen_y, GRID_SIZE, GRID_SIZE)
         
         # Draw cell background
         if cell_type == 'wall':
-            pygame.draw.rect(self.screen, COLORS['wall'], rect)
-            pygame.draw.rect(self.screen, COLORS['wall_highlight'], rect, 2)
+            pygame.draw.rect(surface, COLORS['wall'], rect)
+            pygame.draw.rect(surface, COLORS['wall_highlight'], rect, 2)
             # Add some texture to walls
             for i in range(3):
                 for j in range(3):
                     if (i + j) % 2 == 0:
                         mini_rect = pygame.Rect(screen_x + i * 16, screen_y + j * 16, 8, 8)
-                        pygame.draw.rect(self.screen, COLORS['wall_highlight'], mini_rect)
+                        pygame.draw.rect(surface, COLORS['wall_highlight'], mini_rect)
+            if 'wall' in self.sprites:
+                surface.blit(self.sprites['wall'], rect)
         else:
-            pygame.draw.rect(self.screen, COLORS['empty'], rect)
-            pygame.draw.rect(self.screen, COLORS['grid_line'], rect, 1)
+            pygame.draw.rect(surface, COLORS['empty'], rect)
+            if 'floor' in self.sprites:
+                surface.blit(self.sprites['floor'], rect)
+            pygame.draw.rect(surface, COLORS['grid_line'], rect, 1)
+    
+    def grid_chunk(self, chunk_x: int, chunk_y: int) -> pygame.Surface:
+        """Pre-rendered static cells of one chunk, cached until the level changes"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunk_cache.get(key)
+        if chunk is not None:
+            self.chunk_cache.move_to_end(key)
+            return chunk
+        
+        grid = self.game_state['grid']
+        first_x, first_y = chunk_x * CHUNK_TILES, chunk_y * CHUNK_TILES
+        last_x = min(first_x + CHUNK_TILES, self.game_state['grid_width'])
+        last_y = min(first_y + CHUNK_TILES, self.game_state['grid_height'])
+        chunk = pygame.Surface(((last_x - first_x) * GRID_SIZE, (last_y - first_y) * GRID_SIZE))
+        for y in range(first_y, last_y):
+            for x in range(first_x, last_x):
+                self.draw_grid_cell(x, y, grid[y][x], chunk,
+                                    ((x - first_x) * GRID_SIZE, (y - first_y) * GRID_SIZE))
+        
+        self.chunk_cache[key] = chunk
+        if len(self.chunk_cache) > CHUNK_CACHE_SIZE:
+            self.chunk_cache.popitem(last=False)
+        return chunk
+    
+    def draw_grid(self):
+        """Blit the cached chunks that overlap the camera's view"""
+        columns, rows = self.visible_cells()
+        view = self.view_rect()
+        previous_clip = self.screen.get_clip()
+        self.screen.set_clip(view)
+        for chunk_y in range(rows.start // CHUNK_TILES, (rows.stop - 1) // CHUNK_TILES + 1):
+            for chunk_x in range(columns.start // CHUNK_TILES, (columns.stop - 1) // CHUNK_TILES + 1):
+                self.screen.blit(self.grid_chunk(chunk_x, chunk_y),
+                                 self.cell_to_screen(chunk_x * CHUNK_TILES, chunk_y * CHUNK_TILES))
+        self.screen.set_clip(previous_clip)
     
     def draw_target(self, target: Dict):
         """Draw a target with animation"""
-        screen_x = GRID_OFFSET_X + target['x'] * GRID_SIZE
-        screen_y = GRID_OFFSET_Y + target['y'] * GRID_SIZE
+        screen_x, screen_y = self.cell_to_screen(target['x'], target['y'])
         center_x = screen_x + GRID_SIZE // 2
         center_y = screen_y + GRID_SIZE // 2
         
         # Animated pulsing effect
-        pulse = abs(pygame.time.get_ticks() % 1000 - 500) / 500.0
-        radius = int(15 + pulse * 5)
+        radius = int(15 + self.frame_effects.pulse * 5)
         
         color = COLORS['target']
         if target['completed']:
@@ -297,8 +672,10 @@ class BoxPushingGame:
     
     def draw_box(self, box: Dict):
         """Draw a box with enhanced visuals"""
-        screen_x = GRID_OFFSET_X + box['x'] * GRID_SIZE + 5
-        screen_y = GRID_OFFSET_Y + box['y'] * GRID_SIZE + 5
+        screen_x, screen_y = self.cell_to_screen(box['x'], box['y'])
+        offset_x, offset_y = self.frame_effects.offset(box['id'] + 1)
+        screen_x += 5 + offset_x
+        screen_y += 5 + offset_y
         box_size = GRID_SIZE - 10
         rect = pygame.Rect(screen_x, screen_y, box_size, box_size)
         
@@ -306,14 +683,20 @@ class BoxPushingGame:
         color = COLORS['box_on_target'] if box['on_target'] else COLORS['box']
         outline_color = COLORS['target_outline'] if box['on_target'] else COLORS['box_outline']
         
-        # Draw box with 3D effect
-        pygame.draw.rect(self.screen, color, rect)
-        pygame.draw.rect(self.screen, outline_color, rect, 3)
-        
-        # Add 3D highlight
-        highlight_rect = pygame.Rect(screen_x + 2, screen_y + 2, box_size - 4, box_size // 3)
-        highlight_color = tuple(min(255, c + 50) for c in color)
-        pygame.draw.rect(self.screen, highlight_color, highlight_rect)
+        sprite = self.sprites.get('box_on_target' if box['on_target'] else 'box')
+        if sprite is not None:
+            # Baked sprites cover the whole tile
+            self.screen.blit(sprite, (screen_x - 5, screen_y - 5))
+            pygame.draw.rect(self.screen, outline_color, rect, 3)
+        else:
+            # Draw box with 3D effect
+            pygame.draw.rect(self.screen, color, rect)
+            pygame.draw.rect(self.screen, outline_color, rect, 3)
+            
+            # Add 3D highlight
+            highlight_rect = pygame.Rect(screen_x + 2, screen_y + 2, box_size - 4, box_size // 3)
+            highlight_color = tuple(min(255, c + 50) for c in color)
+            pygame.draw.rect(self.screen, highlight_color, highlight_rect)
         
         # Draw selection indicator
         player = self.game_state['player']
@@ -324,13 +707,13 @@ class BoxPushingGame:
     def draw_player(self):
         """Draw player with enhanced visuals"""
         player = self.game_state['player']
-        screen_x = GRID_OFFSET_X + player['x'] * GRID_SIZE
-        screen_y = GRID_OFFSET_Y + player['y'] * GRID_SIZE
-        center_x = screen_x + GRID_SIZE // 2
-        center_y = screen_y + GRID_SIZE // 2
+        screen_x, screen_y = self.cell_to_screen(player['x'], player['y'])
+        offset_x, offset_y = self.frame_effects.offset(0)
+        center_x = screen_x + GRID_SIZE // 2 + offset_x
+        center_y = screen_y + GRID_SIZE // 2 + offset_y
         
         # Draw player as a circle with animated glow
-        glow_radius = int(20 + 3 * abs(pygame.time.get_ticks() % 1000 - 500) / 500.0)
+        glow_radius = int(20 + 3 * self.frame_effects.pulse)
         
         # Glow effect
         for i in range(5):
@@ -364,7 +747,7 @@ class BoxPushingGame:
         self.screen.blit(level_surface, (10, SCREEN_HEIGHT - 30))
         
         # Instructions
-        instructions = "WASD: Move | SPACE: Select Box | R: New Game"
+        instructions = "WASD: Move | SPACE: Select Box | U/Y: Undo/Redo | R: New Game"
         inst_surface = self.small_font.render(instructions, True, COLORS['text'])
         self.screen.blit(inst_surface, (10, SCREEN_HEIGHT - 15))
         
@@ -390,63 +773,194 @@ class BoxPushingGame:
     
     def draw_grid_overlay(self):
         """Draw coordinate grid overlay for user reference"""
-        # Draw coordinate numbers
-        for x in range(self.game_state['grid_width']):
-            screen_x = GRID_OFFSET_X + x * GRID_SIZE + GRID_SIZE // 2
+        # Draw coordinate numbers of the visible cells
+        columns, rows = self.visible_cells()
+        for x in columns:
+            screen_x = self.cell_to_screen(x, 0)[0] + GRID_SIZE // 2
             coord_surface = self.small_font.render(str(x), True, COLORS['grid_line'])
             coord_rect = coord_surface.get_rect(center=(screen_x, GRID_OFFSET_Y - 15))
             self.screen.blit(coord_surface, coord_rect)
         
-        for y in range(self.game_state['grid_height']):
-            screen_y = GRID_OFFSET_Y + y * GRID_SIZE + GRID_SIZE // 2
+        for y in rows:
+            screen_y = self.cell_to_screen(0, y)[1] + GRID_SIZE // 2
             coord_surface = self.small_font.render(str(y), True, COLORS['grid_line'])
             coord_rect = coord_surface.get_rect(center=(GRID_OFFSET_X - 15, screen_y))
             self.screen.blit(coord_surface, coord_rect)
     
     def draw(self):
         """Main drawing function"""
-        self.screen.fill(COLORS['background'])
+        self.render_frame()
+        with self.profiler.phase('flip'):
+            pygame.display.flip()
+    
+    def render_settled_frame(self) -> pygame.Surface:
+        """Redraw the current state at rest after the flip and return the screen
+
+        The display is not flipped again, and the next frame redraws it all.
+        """
+        self.render_frame(settled=True)
+        return self.screen
+    
+    def render_frame(self, settled: bool = False):
+        """Draw the whole frame onto the screen surface without flipping the display
+
+        A settled frame shows every object at rest on its cell, without particles,
+        as needed for captures that are decoded back into game state.
+        """
+        profiler = self.profiler
+        
+        with profiler.phase('effects'):
+            self.frame_effects = self.settled_effects if settled else self.effects
+            self.frame_effects.update(pygame.time.get_ticks())
+        
+        with profiler.phase('draw_background'):
+            self.screen.fill(COLORS['background'])
         
         # Draw grid
-        grid = self.game_state['grid']
-        for y in range(self.game_state['grid_height']):
-            for x in range(self.game_state['grid_width']):
-                self.draw_grid_cell(x, y, grid[y][x])
+        with profiler.phase('draw_grid_cell'):
+            self.draw_grid()
         
         # Draw grid overlay
-        self.draw_grid_overlay()
+        with profiler.phase('draw_grid_overlay'):
+            self.draw_grid_overlay()
         
         # Draw targets first (so they appear under boxes)
-        for target in self.game_state['targets']:
-            self.draw_target(target)
+        with profiler.phase('draw_target'):
+            for target in self.game_state['targets']:
+                if self.is_visible(target['x'], target['y']):
+                    self.draw_target(target)
         
         # Draw boxes
-        for box in self.game_state['boxes']:
-            self.draw_box(box)
+        with profiler.phase('draw_box'):
+            for box in self.game_state['boxes']:
+                if self.is_visible(box['x'], box['y']):
+                    self.draw_box(box)
         
         # Draw player
-        self.draw_player()
+        with profiler.phase('draw_player'):
+            self.draw_player()
         
-        # Draw UI
-        self.draw_ui()
+        # Particles above the board, below the UI
+        with profiler.phase('draw_effects'):
+            self.frame_effects.draw(self.screen, self.cell_to_screen(0, 0), self.view_rect())
         
-        pygame.display.flip()
+        # Draw UI
+        with profiler.phase('draw_ui'):
+            self.draw_ui()
+        
+        # Profiler overlay
+        if self.profile_overlay:
+            with profiler.phase('draw_profiler_overlay'):
+                profiler.draw_overlay(self.screen, self.small_font, COLORS['selected'],
+                                      (SCREEN_WIDTH - 150, 40))
+    
+    def request_quit(self, *_):
+        """Signal handler: finish the current frame, then shut down cleanly"""
+        self.running = False
     
     def run(self):
         """Main game loop"""
+        if self.profiler.enabled and hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, self.profiler.request_dump)
+        # Leave the loop on SIGTERM too, so pending state files are flushed
+        signal.signal(signal.SIGTERM, self.request_quit)
+        
         while self.running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                else:
-                    self.handle_input(event)
+            # Control server threads apply actions between frames, never mid-frame
+            with self.state_lock:
+                with self.profiler.phase('events'):
+                    for event in pygame.event.get():
+                        if event.type == pygame.QUIT:
+                            self.running = False
+                        else:
+                            self.handle_input(event)
+                
+                self.draw()
+                if self.recorder is not None:
+                    with self.profiler.phase('record'):
+                        self.recorder.capture(self.screen, self.step_counter,
+                                              settled=self.render_settled_frame if self.effects.enabled else None)
+            with self.profiler.phase('tick'):
+                self.clock.tick(60)
+            self.profiler.end_frame()
             
-            self.draw()
-            self.clock.tick(60)
-        
+            if self.profiler.dump_requested:
+                self.profiler.dump_requested = False
+                print(self.profiler.report())
+        
+        if self.profiler.enabled:
+            print(self.profiler.report())
+        if self.control_server is not None:
+            self.control_server.stop()
+        if self.state_stream is not None:
+            self.state_stream.stop()
+        if self.recorder is not None:
+            print(self.recorder.close())
+        self.state_writer.close()
+        self.layout_publisher.close()
+        if self.journal is not None:
+            self.journal.close()
+        if self.level_pack is not None:
+            self.level_pack.close()
         pygame.quit()
         sys.exit()
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Box Pushing Puzzle')
+    parser.add_argument('--journal', default=os.environ.get('GAME_JOURNAL'),
+                        help='Append move/undo/redo history to this JSON lines file')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile frame phases; report on exit or on SIGUSR1')
+    parser.add_argument('--profile-frames', type=int, default=600,
+                        help='Number of recent frames kept by the profiler')
+    parser.add_argument('--profile-overlay', action='store_true',
+                        help='Show per-phase frame times on screen (implies --profile)')
+    parser.add_argument('--control', default=os.environ.get('GAME_CONTROL_SOCKET'),
+                        help='Serve the control protocol on a Unix socket path or host:port')
+    parser.add_argument('--stream', default=os.environ.get('GAME_STREAM_SOCKET'),
+                        help='Publish state snapshots and per-move diffs on a Unix socket path or host:port')
+    parser.add_argument('--record', default=os.environ.get('GAME_RECORD'),
+                        help='Record the session to a .gif/.png (Pillow) or .mp4/.mkv/.webm (ffmpeg) file')
+    parser.add_argument('--record-every', type=int, default=0,
+                        help='Record every Nth frame instead of one frame per state change')
+    parser.add_argument('--record-fps', type=int, default=30,
+                        help='Frame rate of ffmpeg recordings')
+    parser.add_argument('--width', type=int, default=GRID_WIDTH,
+                        help='Width of generated levels in cells; the camera follows the player')
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT,
+                        help='Height of generated levels in cells')
+    parser.add_argument('--save-policy', choices=SAVE_POLICIES, default='step',
+                        help='Write state files every step, every --save-every steps, or when idle')
+    parser.add_argument('--save-every', type=int, default=10,
+                        help='Steps between state files with --save-policy every')
+    parser.add_argument('--save-idle', type=float, default=0.5,
+                        help='Seconds without input before writing with --save-policy idle')
+    parser.add_argument('--level-pack', default=os.environ.get('GAME_LEVEL_PACK'),
+                        help='Draw new games from this level pack instead of generating them')
+    parser.add_argument('--level-index', type=int,
+                        help='Start on this level of --level-pack, ignoring saved state')
+    parser.add_argument('--effects', choices=list(EFFECT_QUALITIES), default=os.environ.get('GAME_EFFECTS', 'high'),
+                        help='Particle and movement animation quality (off keeps frames static between moves)')
+    parser.add_argument('--sprites', default=os.environ.get('GAME_SPRITES'),
+                        help='Draw walls/boxes with sprites from an atlas.json baked by sprite_baker.py')
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    game = BoxPushingGame()
+    args = parse_args()
+    profiler = None
+    if args.profile or args.profile_overlay:
+        profiler = FrameProfiler(args.profile_frames)
+    game = BoxPushingGame(journal_path=args.journal, profiler=profiler,
+                          profile_overlay=args.profile_overlay, level_pack=args.level_pack,
+                          level_index=args.level_index, level_width=args.width,
+                          level_height=args.height, save_policy=args.save_policy,
+                          save_every=args.save_every, save_idle=args.save_idle,
+                          effects_quality=args.effects, sprite_atlas=args.sprites)
+    if args.control:
+        game.start_control_server(args.control)
+    if args.stream:
+        game.start_state_stream(args.stream)
+    if args.record:
+        game.start_recording(args.record, every=args.record_every, fps=args.record_fps)
     game.run()
@@ -1,11 +1,23 @@
-def generate_box_pushing_state():
+import json
+import random
+
+from grid_layout import GRID_WIDTH, GRID_HEIGHT
+
+
+def generate_box_pushing_state(grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, target_count=None):
     """Generate a JSON string representing a new box-pushing game state"""
-    import json
-    import random
-    
-    # Grid dimensions
-    grid_width = 12
-    grid_height = 10
+    return json.dumps(generate_box_pushing_level(grid_width, grid_height, target_count), indent=2)
+
+
+def generate_box_pushing_level(grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, target_count=None):
+    """Generate a new box-pushing game state as a dict
+
+    Internal walls scale with the level area; target_count (one box per
+    target) defaults to 3-6 regardless of size.
+    """
+    if grid_width < 5 or grid_height < 5:
+        raise ValueError(f"Levels must be at least 5x5, got {grid_width}x{grid_height}")
+    area_scale = (grid_width * grid_height) / (GRID_WIDTH * GRID_HEIGHT)
     
     # Initialize empty grid
     grid = []
@@ -22,7 +34,7 @@ def generate_box_pushing_state():
         grid[y][grid_width-1] = 'wall'
     
     # Add some internal walls for interesting level design
-    wall_count = random.randint(8, 15)
+    wall_count = random.randint(int(8 * area_scale), int(15 * area_scale))
     for _ in range(wall_count):
         x = random.randint(2, grid_width-3)
         y = random.randint(2, grid_height-3)
@@ -38,7 +50,10 @@ def generate_box_pushing_state():
     
     # Place targets (goals) - 3 to 6 targets
     targets = []
-    target_count = random.randint(3, 6)
+    if target_count is None:
+        target_count = random.randint(3, 6)
+    if target_count > (grid_width - 2) * (grid_height - 2) // 4:
+        raise ValueError(f"{target_count} targets do not fit a {grid_width}x{grid_height} level")
     target_positions = set()
     
     for _ in range(target_count):
@@ -74,16 +89,34 @@ def generate_box_pushing_state():
                 grid[y][x] = 'box'
                 break
     
-    # Create complete game state
-    game_state = {
+    return build_game_state(grid, (player_x, player_y), [(box['x'], box['y']) for box in boxes], targets)
+
+
+def build_game_state(grid, player, boxes, targets):
+    """Create a complete, fresh game state from a level layout
+
+    grid is a list of rows of cell names, player an (x, y) pair, boxes a list of
+    (x, y) pairs in id order and targets a list of (x, y) pairs or target dicts.
+    """
+    target_positions = [(t['x'], t['y']) if isinstance(t, dict) else tuple(t) for t in targets]
+    target_set = set(target_positions)
+    box_set = {tuple(b) for b in boxes}
+    
+    return {
         "player": {
-            "x": player_x,
-            "y": player_y,
+            "x": player[0],
+            "y": player[1],
             "selected_box": None
         },
         "grid": grid,
-        "boxes": boxes,
-        "targets": targets,
+        "boxes": [
+            {"x": x, "y": y, "id": i, "on_target": (x, y) in target_set}
+            for i, (x, y) in enumerate(boxes)
+        ],
+        "targets": [
+            {"x": x, "y": y, "completed": (x, y) in box_set}
+            for x, y in target_positions
+        ],
         "score": {
             "points": 0,
             "moves": 0,
@@ -100,9 +133,35 @@ def generate_box_pushing_state():
         "turn_number": 0,
         "game_status": "playing",
         "step": 0,
-        "grid_width": grid_width,
-        "grid_height": grid_height
+        "grid_width": len(grid[0]),
+        "grid_height": len(grid)
     }
+
+
+def generate_level_pack(path, count, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, target_count=None):
+    """Generate count random levels straight into a level pack file"""
+    from level_pack import PackFormat, write_level_pack
     
-    return json.dumps(game_state, indent=2)
+    # Records are sized for the largest level the generator can produce
+    max_targets = 6 if target_count is None else target_count
+    pack_format = PackFormat(grid_width, grid_height, max_targets, max_targets)
+    levels = (generate_box_pushing_level(grid_width, grid_height, target_count) for _ in range(count))
+    return write_level_pack(path, levels, pack_format)
+
 
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Generate box pushing levels')
+    parser.add_argument('--pack', help='Write a level pack to this path instead of printing JSON')
+    parser.add_argument('--count', type=int, default=1000, help='Number of levels in the pack')
+    parser.add_argument('--width', type=int, default=GRID_WIDTH, help='Level width in cells')
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT, help='Level height in cells')
+    parser.add_argument('--targets', type=int, help='Targets (and boxes) per level (default: 3-6)')
+    args = parser.parse_args()
+    
+    if args.pack:
+        count = generate_level_pack(args.pack, args.count, args.width, args.height, args.targets)
+        print(f"Wrote {count} levels to {args.pack}")
+    else:
+        print(generate_box_pushing_state(args.width, args.height, args.targets))
@@ -0,0 +1,213 @@
+"""
+Shared grid geometry for the box pushing game and the automation tool.
+
+The game publishes its live layout to a small JSON metadata file whenever the
+level or the camera changes, and the automation tool reads it back, so both
+processes agree on where every cell is drawn on screen. The file is written by
+a LayoutPublisher thread, never on the game loop.
+
+Levels larger than the viewport are shown through a camera: camera_x and
+camera_y are the first visible column and row, and only view_width x
+view_height cells are on screen at a time.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+# Screen dimensions
+SCREEN_WIDTH = 800
+SCREEN_HEIGHT = 600
+GRID_SIZE = 50
+GRID_OFFSET_X = 50
+GRID_OFFSET_Y = 50
+
+# Default level dimensions used by the generator
+GRID_WIDTH = 12
+GRID_HEIGHT = 10
+
+# Cells that fit on screen between the grid offset and the bottom status lines
+VIEW_WIDTH = (SCREEN_WIDTH - GRID_OFFSET_X) // GRID_SIZE
+VIEW_HEIGHT = (SCREEN_HEIGHT - GRID_OFFSET_Y - 50) // GRID_SIZE
+
+# Metadata channel between the game and the automation process
+LAYOUT_FILE = os.environ.get('GAME_LAYOUT_FILE', '/tmp/box_pushing_layout.json')
+LAYOUT_FIELDS = ('screen_width', 'screen_height', 'offset_x', 'offset_y',
+                 'tile_size', 'grid_width', 'grid_height',
+                 'camera_x', 'camera_y', 'view_width', 'view_height', 'sprites')
+
+# Layout paths whose fallback to the defaults has already been reported
+WARNED_LAYOUTS = set()
+
+
+class GridLayout:
+    """Screen geometry of the game grid with a precomputed cell-to-pixel table"""
+
+    def __init__(self, screen_width=SCREEN_WIDTH, screen_height=SCREEN_HEIGHT,
+                 offset_x=GRID_OFFSET_X, offset_y=GRID_OFFSET_Y, tile_size=GRID_SIZE,
+                 grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT, camera_x=0, camera_y=0,
+                 view_width=VIEW_WIDTH, view_height=VIEW_HEIGHT, sprites=0):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.tile_size = tile_size
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.camera_x = camera_x
+        self.camera_y = camera_y
+        self.view_width = view_width
+        self.view_height = view_height
+        self.sprites = sprites  # 1 if cells are drawn with baked sprites instead of flat colors
+
+        # Lookup table of tile centers, indexed as cell_centers[row, col] -> (x, y);
+        # cells scrolled out of view get off-screen coordinates
+        centers_x = offset_x + (np.arange(grid_width) - camera_x) * tile_size + tile_size // 2
+        centers_y = offset_y + (np.arange(grid_height) - camera_y) * tile_size + tile_size // 2
+        self.cell_centers = np.stack(np.meshgrid(centers_x, centers_y), axis=-1)
+
+    @property
+    def visible_columns(self):
+        return range(self.camera_x, min(self.grid_width, self.camera_x + self.view_width))
+
+    @property
+    def visible_rows(self):
+        return range(self.camera_y, min(self.grid_height, self.camera_y + self.view_height))
+
+    @property
+    def grid_area(self):
+        """Pixel bounds of the visible part of the grid as (left, top, right, bottom)"""
+        return (self.offset_x, self.offset_y,
+                self.offset_x + len(self.visible_columns) * self.tile_size,
+                self.offset_y + len(self.visible_rows) * self.tile_size)
+
+    def is_visible(self, cols, rows):
+        """Element-wise mask of cells inside the camera's view"""
+        columns, visible_rows = self.visible_columns, self.visible_rows
+        return ((cols >= columns.start) & (cols < columns.stop) &
+                (rows >= visible_rows.start) & (rows < visible_rows.stop))
+
+    def cells_to_pixels(self, cells):
+        """Convert an (N, 2) sequence of (col, row) cells to tile-center pixels in one pass"""
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        cols, rows = cells[:, 0], cells[:, 1]
+        outside = (cols < 0) | (cols >= self.grid_width) | (rows < 0) | (rows >= self.grid_height)
+        if outside.any():
+            bad = cells[outside][0]
+            raise ValueError(f"Cell ({bad[0]}, {bad[1]}) is outside the "
+                             f"{self.grid_width}x{self.grid_height} grid")
+        hidden = ~self.is_visible(cols, rows)
+        if hidden.any():
+            bad = cells[hidden][0]
+            raise ValueError(f"Cell ({bad[0]}, {bad[1]}) is scrolled out of view (camera at "
+                             f"{self.camera_x}, {self.camera_y})")
+        return self.cell_centers[rows, cols]
+
+    def pixels_to_cells(self, points):
+        """Convert an (N, 2) sequence of pixels to (col, row) cells plus an inside-grid mask"""
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        offsets = (points - (self.offset_x, self.offset_y)) // self.tile_size
+        cells = offsets + (self.camera_x, self.camera_y)
+        inside = ((offsets[:, 0] >= 0) & (offsets[:, 1] >= 0) &
+                  self.is_visible(cells[:, 0], cells[:, 1]))
+        return cells, inside
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in LAYOUT_FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{key: int(data[key]) for key in LAYOUT_FIELDS if key in data})
+
+    def publish(self, path=LAYOUT_FILE):
+        """Atomically write the layout so readers never see a partial file"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.layout_', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.to_dict(), f)
+            # mkstemp creates 0600; automation run by other users must be able to read it
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+
+class LayoutPublisher:
+    """Writes the newest submitted layout on a background thread
+
+    Scrolling the camera only hands over the new geometry; a burst of scrolls
+    that outpaces the disk publishes just the last one.
+    """
+
+    def __init__(self, path=LAYOUT_FILE):
+        self.path = path
+        self.pending = None  # GridLayout keyword arguments waiting to be written
+        self.writing = False
+        self.running = True
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.publish_loop, name='layout-publisher', daemon=True)
+        self.thread.start()
+
+    def submit(self, **geometry):
+        """Queue a layout for publishing; never touches the disk"""
+        with self.condition:
+            self.pending = geometry
+            self.condition.notify_all()
+
+    def publish_loop(self):
+        while True:
+            with self.condition:
+                while self.pending is None and self.running:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                geometry, self.pending = self.pending, None
+                self.writing = True
+            try:
+                GridLayout(**geometry).publish(self.path)
+            except OSError as e:
+                print(f"Error publishing grid layout: {e}")
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+
+    def flush(self):
+        """Block until every submitted layout is on disk"""
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+    def close(self):
+        """Publish the pending layout and stop the thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join()
+
+
+def load_layout(path=LAYOUT_FILE, warn=True):
+    """Read the layout published by the game, falling back to the built-in defaults
+
+    A fallback is reported on stderr once per path (until a later read of that
+    path succeeds), not on every call; warn=False keeps it silent.
+    """
+    try:
+        with open(path, 'r') as f:
+            layout = GridLayout.from_dict(json.load(f))
+        WARNED_LAYOUTS.discard(path)
+        return layout
+    except FileNotFoundError:
+        reason = f"No grid layout published at {path}; using the default layout"
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        reason = f"Cannot read grid layout {path} ({e}); using the default layout"
+    if warn and path not in WARNED_LAYOUTS:
+        WARNED_LAYOUTS.add(path)
+        print(reason, file=sys.stderr)
+    return GridLayout()
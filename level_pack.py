@@ -0,0 +1,217 @@
+"""
+Packed binary level packs with O(1) random access.
+
+Layout (little endian):
+
+    header   magic 'BXPK', version, level count, max grid width/height,
+             max boxes/targets, record size, offset of the index
+    records  one fixed-width record per level:
+               width, height, player x/y, box count, target count (u16 each)
+               grid cell codes (u8, max_width * max_height, row stride max_width)
+               box positions (u16 x/y pairs, padded to max_boxes)
+               target positions (u16 x/y pairs, padded to max_targets)
+    index    one u64 file offset per level
+
+The index lives after the records so packs can be written as a stream.
+Appending writes a new copy of the pack and renames it into place. Readers
+mmap the file and decode a single record on demand.
+"""
+
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from game_state_generator import build_game_state
+
+MAGIC = b'BXPK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIHHHHIQ')
+RECORD_HEADER = struct.Struct('<6H')
+OFFSET = struct.Struct('<Q')
+
+# Bytes copied at a time when an append rewrites the pack
+COPY_CHUNK = 1 << 20
+
+CELL_TYPES = ['empty', 'wall', 'target', 'box']
+CELL_CODES = {name: code for code, name in enumerate(CELL_TYPES)}
+
+
+class PackFormat:
+    """Fixed record geometry shared by every level in a pack"""
+
+    def __init__(self, max_width, max_height, max_boxes, max_targets):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.max_boxes = max_boxes
+        self.max_targets = max_targets
+        self.grid_offset = RECORD_HEADER.size
+        self.boxes_offset = self.grid_offset + max_width * max_height
+        self.targets_offset = self.boxes_offset + 4 * max_boxes
+        self.record_size = self.targets_offset + 4 * max_targets
+
+    @classmethod
+    def for_states(cls, states):
+        return cls(max(s['grid_width'] for s in states), max(s['grid_height'] for s in states),
+                   max(len(s['boxes']) for s in states), max(len(s['targets']) for s in states))
+
+    def encode(self, game_state):
+        """Encode the layout of a game state (not its score) into one record"""
+        width, height = game_state['grid_width'], game_state['grid_height']
+        boxes, targets = game_state['boxes'], game_state['targets']
+        if (width > self.max_width or height > self.max_height or
+                len(boxes) > self.max_boxes or len(targets) > self.max_targets):
+            raise ValueError(f"Level {width}x{height} with {len(boxes)} boxes and {len(targets)} "
+                             f"targets does not fit this pack's record format")
+
+        record = bytearray(self.record_size)
+        player = game_state['player']
+        RECORD_HEADER.pack_into(record, 0, width, height, player['x'], player['y'],
+                                len(boxes), len(targets))
+        grid = np.zeros((self.max_height, self.max_width), dtype=np.uint8)
+        for y, row in enumerate(game_state['grid']):
+            grid[y, :width] = [CELL_CODES[cell] for cell in row]
+        record[self.grid_offset:self.boxes_offset] = grid.tobytes()
+        ordered_boxes = sorted(boxes, key=lambda box: box['id'])
+        for i, box in enumerate(ordered_boxes):
+            struct.pack_into('<HH', record, self.boxes_offset + 4 * i, box['x'], box['y'])
+        for i, target in enumerate(targets):
+            struct.pack_into('<HH', record, self.targets_offset + 4 * i, target['x'], target['y'])
+        return bytes(record)
+
+    def decode(self, buffer, offset):
+        """Decode the record at offset into a fresh game state"""
+        width, height, player_x, player_y, box_count, target_count = \
+            RECORD_HEADER.unpack_from(buffer, offset)
+        codes = np.frombuffer(buffer, dtype=np.uint8, count=self.max_width * self.max_height,
+                              offset=offset + self.grid_offset)
+        codes = codes.reshape(self.max_height, self.max_width)[:height, :width]
+        grid = np.array(CELL_TYPES, dtype=object)[codes].tolist()
+        boxes = np.frombuffer(buffer, dtype='<u2', count=2 * box_count,
+                              offset=offset + self.boxes_offset).reshape(-1, 2).tolist()
+        targets = np.frombuffer(buffer, dtype='<u2', count=2 * target_count,
+                                offset=offset + self.targets_offset).reshape(-1, 2).tolist()
+        return build_game_state(grid, (player_x, player_y), boxes, targets)
+
+    def header(self, count, index_offset):
+        return HEADER.pack(MAGIC, VERSION, 0, count, self.max_width, self.max_height,
+                           self.max_boxes, self.max_targets, self.record_size, index_offset)
+
+
+def write_level_pack(path, states, pack_format=None):
+    """Write game states to a new level pack and return the number of levels
+
+    Without an explicit PackFormat the states are materialized to size the
+    records; pass one to stream levels straight from a generator.
+    """
+    if pack_format is None:
+        states = list(states)
+        if not states:
+            raise ValueError("Cannot size a level pack without levels")
+        pack_format = PackFormat.for_states(states)
+
+    offsets = []
+    with open(path, 'wb') as f:
+        f.write(pack_format.header(0, 0))
+        for state in states:
+            offsets.append(f.tell())
+            f.write(pack_format.encode(state))
+        index_offset = f.tell()
+        f.write(np.asarray(offsets, dtype='<u8').tobytes())
+        f.seek(0)
+        f.write(pack_format.header(len(offsets), index_offset))
+    return len(offsets)
+
+
+def append_to_level_pack(path, states):
+    """Append game states to a pack, creating it if needed; returns the new level count
+
+    The extended pack is written to a temporary file next to the original and
+    renamed over it, so a crash leaves the old pack intact and readers that
+    already have it mapped keep a consistent view.
+    """
+    states = list(states)
+    if not os.path.exists(path):
+        return write_level_pack(path, states)
+
+    with open(path, 'rb') as f:
+        pack_format, count, index_offset = read_header(f.read(HEADER.size))
+        f.seek(index_offset)
+        offsets = np.frombuffer(f.read(OFFSET.size * count), dtype='<u8').tolist()
+        # Encode everything first, so a level that does not fit fails before any I/O
+        records = [pack_format.encode(state) for state in states]
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.levels_', suffix='.tmp',
+                                        dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                # Header and existing records, unchanged; the old index is dropped
+                f.seek(0)
+                remaining = index_offset
+                while remaining:
+                    chunk = f.read(min(remaining, COPY_CHUNK))
+                    if not chunk:
+                        raise ValueError("Corrupt level pack (records end before the index)")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+                for record in records:
+                    offsets.append(out.tell())
+                    out.write(record)
+                index_offset = out.tell()
+                out.write(np.asarray(offsets, dtype='<u8').tobytes())
+                out.seek(0)
+                out.write(pack_format.header(len(offsets), index_offset))
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return len(offsets)
+
+
+def read_header(data):
+    """Parse a pack header into (PackFormat, level count, index offset)"""
+    (magic, version, _, count, max_width, max_height, max_boxes, max_targets,
+     record_size, index_offset) = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a level pack (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"Unsupported level pack version {version}")
+    pack_format = PackFormat(max_width, max_height, max_boxes, max_targets)
+    if pack_format.record_size != record_size:
+        raise ValueError("Corrupt level pack header (record size mismatch)")
+    return pack_format, count, index_offset
+
+
+class LevelPack:
+    """Memory-mapped, read-only view of a level pack"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.format, self.count, self.index_offset = read_header(self.map)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(f"Level {index} out of range for a pack of {self.count}")
+        offset, = OFFSET.unpack_from(self.map, self.index_offset + OFFSET.size * index)
+        return self.format.decode(self.map, offset)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
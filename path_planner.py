@@ -0,0 +1,145 @@
+"""
+Path planning for the box pushing game.
+
+Compiles high-level goals ("walk to this cell", "push this box") into the
+WASD key sequence the game understands, using BFS distance maps that are
+cached per obstacle layout and goal.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# Key -> (dx, dy), matching BoxPushingGame.handle_input
+MOVE_KEYS = {
+    'w': (0, -1),
+    's': (0, 1),
+    'a': (-1, 0),
+    'd': (1, 0),
+}
+
+DIRECTION_ALIASES = {
+    'up': 'w', 'north': 'w', 'w': 'w',
+    'down': 's', 'south': 's', 's': 's',
+    'left': 'a', 'west': 'a', 'a': 'a',
+    'right': 'd', 'east': 'd', 'd': 'd',
+}
+
+STEP_FILE_PATTERN = re.compile(r'^game_state_step_(\d+)\.json$')
+
+
+def latest_state_file(directory: str = '.') -> Optional[str]:
+    """Path of the game_state_step_N.json with the highest N, if any"""
+    latest_step, latest_file = -1, None
+    for name in os.listdir(directory):
+        match = STEP_FILE_PATTERN.match(name)
+        if match and int(match.group(1)) > latest_step:
+            latest_step, latest_file = int(match.group(1)), name
+    return None if latest_file is None else os.path.join(directory, latest_file)
+
+
+def load_latest_game_state(directory: str = '.') -> Optional[Dict]:
+    """Load the most recent game_state_step_N.json written by the game
+
+    The game writes its state at level start and after moves, but with the
+    'every' and 'idle' save policies the newest file can lag behind the live
+    game; plan against the control server's state when exactness matters.
+    """
+    path = latest_state_file(directory)
+    if path is None:
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def blocked_cells(game_state: Dict, include_boxes: bool = True) -> FrozenSet[Tuple[int, int]]:
+    """Cells the player cannot walk through"""
+    blocked = set()
+    for y, row in enumerate(game_state['grid']):
+        for x, cell in enumerate(row):
+            if cell == 'wall':
+                blocked.add((x, y))
+    if include_boxes:
+        blocked.update((box['x'], box['y']) for box in game_state['boxes'])
+    return frozenset(blocked)
+
+
+@lru_cache(maxsize=128)
+def distance_map(width: int, height: int, blocked: FrozenSet[Tuple[int, int]],
+                 goal: Tuple[int, int]) -> Dict[Tuple[int, int], int]:
+    """BFS distances from every reachable cell to the goal (cached per layout and goal)"""
+    distances = {goal: 0}
+    queue = deque([goal])
+    while queue:
+        x, y = queue.popleft()
+        next_distance = distances[(x, y)] + 1
+        for dx, dy in MOVE_KEYS.values():
+            cell = (x + dx, y + dy)
+            if (0 <= cell[0] < width and 0 <= cell[1] < height and
+                    cell not in blocked and cell not in distances):
+                distances[cell] = next_distance
+                queue.append(cell)
+    return distances
+
+
+def plan_walk(game_state: Dict, goal: Tuple[int, int],
+              blocked: Optional[FrozenSet[Tuple[int, int]]] = None) -> List[str]:
+    """Plan the shortest key sequence that walks the player to goal without pushing boxes"""
+    width, height = game_state['grid_width'], game_state['grid_height']
+    if not (0 <= goal[0] < width and 0 <= goal[1] < height):
+        raise ValueError(f"Cell {goal} is outside the {width}x{height} grid")
+    if blocked is None:
+        blocked = blocked_cells(game_state)
+    if goal in blocked:
+        raise ValueError(f"Cell {goal} is blocked by a wall or a box")
+
+    distances = distance_map(width, height, blocked, goal)
+    position = (game_state['player']['x'], game_state['player']['y'])
+    if position not in distances:
+        raise ValueError(f"Cell {goal} is not reachable from {position}")
+
+    # Follow the distance gradient down to the goal
+    keys = []
+    while distances[position] > 0:
+        for key, (dx, dy) in MOVE_KEYS.items():
+            step = (position[0] + dx, position[1] + dy)
+            if distances.get(step) == distances[position] - 1:
+                keys.append(key)
+                position = step
+                break
+    return keys
+
+
+def plan_push(game_state: Dict, box_id: int, direction: str) -> List[str]:
+    """Plan a walk behind a box followed by a single push in the given direction"""
+    key = DIRECTION_ALIASES.get(direction.lower())
+    if key is None:
+        raise ValueError(f"Unknown direction '{direction}' (expected up/down/left/right or w/a/s/d)")
+    dx, dy = MOVE_KEYS[key]
+
+    box = next((b for b in game_state['boxes'] if b['id'] == box_id), None)
+    if box is None:
+        raise ValueError(f"No box with id {box_id}")
+
+    blocked = blocked_cells(game_state)
+    destination = (box['x'] + dx, box['y'] + dy)
+    width, height = game_state['grid_width'], game_state['grid_height']
+    if (not (0 <= destination[0] < width and 0 <= destination[1] < height) or
+            destination in blocked):
+        raise ValueError(f"Box {box_id} cannot be pushed to {destination}")
+
+    stand = (box['x'] - dx, box['y'] - dy)
+    return plan_walk(game_state, stand, blocked) + [key]
+
+
+def plan_command(game_state: Dict, command: str) -> List[str]:
+    """Compile a 'moveto <col> <row>' or 'push <box_id> <dir>' command into keys"""
+    parts = command.split()
+    if len(parts) == 3 and parts[0] == "moveto" and all(p.lstrip('-').isdigit() for p in parts[1:]):
+        return plan_walk(game_state, (int(parts[1]), int(parts[2])))
+    if len(parts) == 3 and parts[0] == "push" and parts[1].isdigit():
+        return plan_push(game_state, int(parts[1]), parts[2])
+    raise ValueError(f"Expected 'moveto <col> <row>' or 'push <box_id> <dir>', got: '{command}'")
@@ -0,0 +1,150 @@
+"""
+Opt-in frame-phase profiler for the game loop.
+
+Each frame is split into named phases (event handling, game logic,
+persistence, every draw routine, the display flip, ...). Phase times are
+exclusive: time spent in a nested phase is not counted again in its parent.
+The last N frames are kept in fixed-size NumPy ring buffers so the profiler
+can report percentiles and a histogram at any time without growing.
+
+Idle phases (the frame-rate cap's sleep in clock.tick) are reported on
+their own but left out of frame_total and the histogram, which show the
+work a frame costs; frame_wall includes them.
+"""
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Frame time histogram buckets in milliseconds
+HISTOGRAM_EDGES_MS = [0, 1, 2, 4, 8, 16, 33, 66, float('inf')]
+
+# Phases that wait rather than work
+IDLE_PHASES = frozenset({'tick'})
+
+
+class FrameProfiler:
+    """Records exclusive per-phase frame times into ring buffers"""
+
+    enabled = True
+
+    def __init__(self, capacity: int = 600):
+        self.capacity = capacity
+        self.samples = {}  # phase name -> ring buffer of seconds per frame
+        self.frame_count = 0
+        self.current = {}
+        self.stack = []
+        self.last_frame = {}
+        self.dump_requested = False
+        self.owner = threading.get_ident()
+
+    def phase(self, name: str):
+        """Time a phase of the current frame, excluding nested phases"""
+        # Only the game loop thread is profiled; work done on other threads
+        # (e.g. control server requests) would corrupt the phase stack
+        if threading.get_ident() != self.owner:
+            return NullProfiler._null_phase
+        return self._timed_phase(name)
+
+    @contextmanager
+    def _timed_phase(self, name: str):
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            child_time = self.stack.pop()
+            self.current[name] = self.current.get(name, 0.0) + elapsed - child_time
+            if self.stack:
+                self.stack[-1] += elapsed
+
+    def end_frame(self):
+        """Commit the phases recorded since the previous call as one frame"""
+        slot = self.frame_count % self.capacity
+        for name in self.current.keys() - self.samples.keys():
+            self.samples[name] = np.zeros(self.capacity)
+        for name, buffer in self.samples.items():
+            buffer[slot] = self.current.get(name, 0.0)
+        self.last_frame = self.current
+        self.current = {}
+        self.frame_count += 1
+
+    def request_dump(self, *_):
+        """Signal handler: ask the game loop to print a report at the end of the frame"""
+        self.dump_requested = True
+
+    def summary(self):
+        """Per-phase statistics in milliseconds over the frames in the ring buffer"""
+        filled = min(self.frame_count, self.capacity)
+        if filled == 0:
+            return {}
+        stats = {name: self._describe(buffer[:filled] * 1000.0) for name, buffer in self.samples.items()}
+        stats['frame_total'] = self._describe(self.frame_totals(filled))
+        stats['frame_wall'] = self._describe(self.frame_totals(filled, include_idle=True))
+        return stats
+
+    def frame_totals(self, filled, include_idle=False):
+        """Per-frame sum of phase times in milliseconds, without idle phases unless asked"""
+        totals = np.zeros(filled)
+        for name, buffer in self.samples.items():
+            if include_idle or name not in IDLE_PHASES:
+                totals += buffer[:filled]
+        return totals * 1000.0
+
+    @staticmethod
+    def _describe(values):
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {'mean': float(values.mean()), 'p50': float(p50), 'p95': float(p95),
+                'p99': float(p99), 'max': float(values.max())}
+
+    def report(self) -> str:
+        """Human-readable percentile table and frame time histogram"""
+        stats = self.summary()
+        if not stats:
+            return "No frames profiled"
+        filled = min(self.frame_count, self.capacity)
+        lines = [f"Frame profile over the last {filled} frames (ms):",
+                 f"  {'phase':<22}{'mean':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+        for name, s in sorted(stats.items(), key=lambda item: -item[1]['mean']):
+            lines.append(f"  {name:<22}{s['mean']:8.3f}{s['p50']:8.3f}{s['p95']:8.3f}"
+                         f"{s['p99']:8.3f}{s['max']:8.3f}")
+
+        counts, _ = np.histogram(self.frame_totals(filled), bins=HISTOGRAM_EDGES_MS)
+        lines.append("  frame work time histogram (excluding idle phases):")
+        for low, high, count in zip(HISTOGRAM_EDGES_MS, HISTOGRAM_EDGES_MS[1:], counts):
+            label = f"{low:g}-{high:g} ms" if high != float('inf') else f">{low:g} ms"
+            bar = '#' * int(round(40 * count / filled))
+            lines.append(f"    {label:>10} {count:6d} {bar}")
+        return "\n".join(lines)
+
+    def draw_overlay(self, surface, font, color, position=(0, 0)):
+        """Draw the last frame's phase times as a small text overlay"""
+        x, y = position
+        total = sum(seconds for name, seconds in self.last_frame.items() if name not in IDLE_PHASES) * 1000.0
+        rows = [f"frame {total:.2f} ms"]
+        rows += [f"{name} {seconds * 1000.0:.2f}" for name, seconds in
+                 sorted(self.last_frame.items(), key=lambda item: -item[1])[:6]]
+        for row in rows:
+            text_surface = font.render(row, True, color)
+            surface.blit(text_surface, (x, y))
+            y += text_surface.get_height()
+
+
+class NullProfiler:
+    """Profiler stand-in with no per-frame cost when profiling is disabled"""
+
+    enabled = False
+    dump_requested = False
+    _null_phase = nullcontext()
+
+    def phase(self, name: str):
+        return self._null_phase
+
+    def end_frame(self):
+        pass
+
+    def report(self) -> str:
+        return ""
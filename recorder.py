@@ -0,0 +1,215 @@
+"""
+Session recording straight from the game's render loop.
+
+Instead of one scrot PNG per automation step, the game hands sampled
+frames to a SessionRecorder. The recorder copies the pixels into a bounded
+queue, and a background thread encodes them into a single animated file:
+
+    .gif / .png / .apng   Pillow; frames are spooled to disk as PNGs and
+                          assembled at close, durations follow real time
+    .mp4 / .mkv / .webm   raw RGB frames piped to ffmpeg at a fixed rate
+
+Frames are sampled either whenever the game state changed (the default,
+one frame per move, drawn at rest) or every N rendered frames (as shown,
+effects included).
+"""
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+import pygame
+from PIL import Image
+
+PILLOW_FORMATS = {'.gif': 'GIF', '.png': 'PNG', '.apng': 'PNG'}
+FFMPEG_FORMATS = ('.mp4', '.mkv', '.webm')
+
+# Pillow frame durations are clamped to what viewers actually honour
+MIN_FRAME_MS = 20
+LAST_FRAME_MS = 1000
+
+
+class SpooledFrames:
+    """Read-only sequence that loads spooled frames from disk on access
+
+    Pillow walks append_images more than once, so a generator will not do.
+    """
+
+    def __init__(self, paths):
+        self.paths = paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, index):
+        image = Image.open(self.paths[index])
+        image.load()  # Reads the pixels and closes the file
+        return image
+
+
+class PillowEncoder:
+    """Spools frames to PNG files and assembles them into one animated GIF or APNG
+
+    Only the spooled file names are kept in memory while recording; the
+    frames are read back from disk when the animation is written at close.
+    """
+
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.format = PILLOW_FORMATS[os.path.splitext(path)[1].lower()]
+        self.spool_dir = tempfile.mkdtemp(prefix='.frames-', dir=os.path.dirname(os.path.abspath(path)))
+        self.spooled = []
+        self.timestamps = []
+        self.palette = None
+
+    def add(self, timestamp, data):
+        image = Image.frombytes('RGB', self.size, data)
+        if self.format == 'GIF':
+            # One shared palette keeps colours stable and skips per-frame median cut
+            if self.palette is None:
+                self.palette = image.quantize(colors=256)
+            image = image.quantize(palette=self.palette)
+        frame_path = os.path.join(self.spool_dir, f"{len(self.spooled):06d}.png")
+        image.save(frame_path, compress_level=1)
+        self.spooled.append(frame_path)
+        self.timestamps.append(timestamp)
+
+    def close(self):
+        try:
+            if not self.spooled:
+                return
+            durations = [max(MIN_FRAME_MS, int(round((later - earlier) * 1000)))
+                         for earlier, later in zip(self.timestamps, self.timestamps[1:])]
+            durations.append(LAST_FRAME_MS)
+            frames = SpooledFrames(self.spooled)
+            frames[0].save(self.path, format=self.format, save_all=True,
+                           append_images=SpooledFrames(self.spooled[1:]), duration=durations, loop=0)
+        finally:
+            self.abort()
+
+    def abort(self):
+        """Remove the spooled frames without writing the animation"""
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+
+class FfmpegEncoder:
+    """Pipes raw RGB frames to ffmpeg, repeating frames to keep a constant rate"""
+
+    def __init__(self, path, size, fps):
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError(f"Recording to {path} needs ffmpeg on PATH (or use .gif/.png)")
+        self.fps = fps
+        self.last = None
+        self.start = None
+        self.written = 0
+        self.process = subprocess.Popen(
+            [ffmpeg, '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+             '-s', f"{size[0]}x{size[1]}", '-r', str(fps), '-i', '-',
+             '-pix_fmt', 'yuv420p', path],
+            stdin=subprocess.PIPE)
+
+    def add(self, timestamp, data):
+        if self.start is None:
+            self.start = timestamp
+        # Hold the previous frame on screen until this one's time slot
+        due = int((timestamp - self.start) * self.fps)
+        while self.last is not None and self.written < due:
+            self.process.stdin.write(self.last)
+            self.written += 1
+        self.process.stdin.write(data)
+        self.written += 1
+        self.last = data
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+    def abort(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass  # ffmpeg already gone; its exit is reaped below
+        self.process.wait()
+
+
+class SessionRecorder:
+    """Samples rendered frames and encodes them on a background thread"""
+
+    def __init__(self, path, size, every=0, fps=30, max_pending=120):
+        self.path = path
+        self.size = size
+        self.every = every
+        self.fps = fps
+        self.frames = 0
+        self.recorded = 0
+        self.dropped = 0
+        self.last_step = None
+        self.error = None
+        self.pending = queue.Queue(maxsize=max_pending)
+
+        if os.path.splitext(path)[1].lower() in FFMPEG_FORMATS:
+            self.encoder = FfmpegEncoder(path, size, fps)
+        elif os.path.splitext(path)[1].lower() in PILLOW_FORMATS:
+            self.encoder = PillowEncoder(path, size)
+        else:
+            raise ValueError(f"Unsupported recording format: {path} "
+                             f"(use {', '.join(list(PILLOW_FORMATS) + list(FFMPEG_FORMATS))})")
+        self.thread = threading.Thread(target=self.encode_loop, name='recorder', daemon=True)
+        self.thread.start()
+
+    def capture(self, surface, step, settled=None):
+        """Queue the surface if this frame is sampled; never blocks the game loop
+
+        Per-step samples come from settled() when it is given: the frame shown
+        right after a move still has the move's tween at its start, so it would
+        lag one move behind the state.
+        """
+        self.frames += 1
+        if self.every:
+            sampled = (self.frames - 1) % self.every == 0
+        else:
+            sampled = step != self.last_step
+        if not sampled:
+            return
+        if not self.every and settled is not None:
+            surface = settled()
+        try:
+            self.pending.put_nowait((time.perf_counter(), pygame.image.tostring(surface, 'RGB')))
+            self.recorded += 1
+            self.last_step = step
+        except queue.Full:
+            self.dropped += 1
+
+    def encode_loop(self):
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                self.encoder.add(*item)
+            except Exception as e:
+                self.error = e
+
+    def close(self):
+        """Drain the queue, finish the file and return a one-line summary"""
+        self.pending.put(None)
+        self.thread.join()
+        if self.error is None:
+            try:
+                self.encoder.close()
+            except Exception as e:
+                self.error = e
+        else:
+            self.encoder.abort()
+        if self.error is not None:
+            return f"Error recording to {self.path}: {self.error}"
+        return (f"Saved recording to {self.path} ({self.recorded} frames, "
+                f"{self.dropped} dropped)")
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Recover game state from screenshots, without any game-state files.
+
+Every cell is classified from two pixels that the renderer always paints
+in a known color:
+
+    edge    (1, tile/2) inside the cell: wall highlight, empty floor, or the
+            window background for cells beyond the level
+    center  the middle of the cell: player, box, box on target, target or floor
+
+Both samples for all cells are gathered with one fancy-indexing lookup and
+matched against the game's COLORS palette in a single vectorized step, so a
+screenshot decodes in the time it takes to read the PNG. Directories are
+decoded in parallel with a process pool.
+
+Limits: a target under the player is hidden by the player sprite, the
+"LEVEL COMPLETE" banner hides the cells behind it (reported as unknown),
+and 'target'/'box' grid cells are drawn as floor, so grids decode to
+'wall' and 'empty' only. Frames drawn with baked sprites (game.py --sprites)
+cannot be decoded; a layout published by such a game is refused.
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import numpy as np
+from PIL import Image
+
+from game import COLORS
+from grid_layout import GridLayout, LAYOUT_FILE, load_layout
+
+EDGE_CLASSES = ('wall', 'empty', 'outside')
+EDGE_PALETTE = np.array([COLORS['wall_highlight'], COLORS['empty'], COLORS['background']])
+
+CENTER_CLASSES = ('player', 'box', 'box_on_target', 'target', 'floor', 'wall')
+CENTER_PALETTE = np.array([COLORS['player'], COLORS['box'], COLORS['box_on_target'],
+                           COLORS['target'], COLORS['empty'], COLORS['wall']])
+
+UNKNOWN = -1
+
+
+def classify(pixels, palette, tolerance):
+    """Index of the nearest palette color for every pixel, or UNKNOWN if none is close"""
+    distances = np.abs(pixels[..., None, :].astype(np.int16) - palette.astype(np.int16)).sum(axis=-1)
+    labels = distances.argmin(axis=-1)
+    labels[distances.min(axis=-1) > tolerance] = UNKNOWN
+    return labels
+
+
+def find_origin(image):
+    """Top-left corner of the game window inside a full-display screenshot
+
+    The window's top-left pixel belongs to the score bar, whose color is
+    otherwise only used for the win banner further down the window.
+    """
+    matches = np.all(image == COLORS['score_bg'], axis=-1)
+    ys, xs = np.nonzero(matches)
+    if len(ys) == 0:
+        return 0, 0
+    return int(xs.min()), int(ys.min())
+
+
+def decode_image(image, layout=None, origin=None, tolerance=12):
+    """Decode an (H, W, 3) RGB array into grid, player, box and target positions"""
+    layout = layout or GridLayout()
+    if layout.sprites:
+        raise ValueError("The game draws baked sprites (--sprites); screenshots can only be "
+                         "decoded from the default flat rendering")
+    if origin is None:
+        origin = (0, 0) if image.shape[:2] == (layout.screen_height, layout.screen_width) \
+            else find_origin(image)
+    columns, rows = layout.visible_columns, layout.visible_rows
+
+    # Pixel coordinates of every visible cell's samples, shaped (rows, cols)
+    centers = layout.cell_centers[rows.start:rows.stop, columns.start:columns.stop] + origin
+    center_x, center_y = centers[..., 0], centers[..., 1]
+    edge_x = center_x - (layout.tile_size // 2 - 1)
+    height, width = image.shape[:2]
+    in_image = (center_x < width) & (center_y < height)
+    center_x, center_y, edge_x = (np.minimum(a, limit - 1) for a, limit in
+                                  ((center_x, width), (center_y, height), (edge_x, width)))
+
+    edges = classify(image[center_y, edge_x], EDGE_PALETTE, tolerance)
+    objects = classify(image[center_y, center_x], CENTER_PALETTE, tolerance)
+    edges[~in_image] = EDGE_CLASSES.index('outside')
+
+    # The level is the block of cells that are not window background
+    level = edges != EDGE_CLASSES.index('outside')
+    level_rows, level_cols = np.nonzero(level.any(axis=1))[0], np.nonzero(level.any(axis=0))[0]
+    grid_height = int(level_rows.max()) + 1 if len(level_rows) else 0
+    grid_width = int(level_cols.max()) + 1 if len(level_cols) else 0
+    edges, objects = edges[:grid_height, :grid_width], objects[:grid_height, :grid_width]
+
+    def cells(mask):
+        ys, xs = np.nonzero(mask)
+        return [(int(x) + columns.start, int(y) + rows.start) for y, x in zip(ys, xs)]
+
+    grid = np.array(EDGE_CLASSES + ('unknown',), dtype=object)[edges].tolist()
+    players = cells(objects == CENTER_CLASSES.index('player'))
+    boxes = cells(objects == CENTER_CLASSES.index('box'))
+    boxes_on_target = cells(objects == CENTER_CLASSES.index('box_on_target'))
+    open_targets = cells(objects == CENTER_CLASSES.index('target'))
+    unknown = cells((edges == UNKNOWN) | (objects == UNKNOWN))
+
+    return {
+        'camera': [layout.camera_x, layout.camera_y],
+        'grid_width': grid_width,
+        'grid_height': grid_height,
+        'grid': grid,
+        'player': {'x': players[0][0], 'y': players[0][1]} if len(players) == 1 else None,
+        'boxes': sorted([{'x': x, 'y': y, 'on_target': False} for x, y in boxes] +
+                        [{'x': x, 'y': y, 'on_target': True} for x, y in boxes_on_target],
+                        key=lambda box: (box['y'], box['x'])),
+        'targets': sorted([{'x': x, 'y': y, 'completed': False} for x, y in open_targets] +
+                          [{'x': x, 'y': y, 'completed': True} for x, y in boxes_on_target],
+                          key=lambda target: (target['y'], target['x'])),
+        'unknown': [list(cell) for cell in unknown],
+    }
+
+
+def decode_file(path, layout=None, tolerance=12):
+    """Decode one screenshot file"""
+    with Image.open(path) as image:
+        pixels = np.asarray(image.convert('RGB'))
+    decoded = decode_image(pixels, layout, tolerance=tolerance)
+    decoded['file'] = path
+    return decoded
+
+
+def compare_with_state(decoded, game_state):
+    """List the differences between a decoded screenshot and a game state"""
+    problems = []
+    camera_x, camera_y = decoded['camera']
+    visible = {(x, y) for y in range(camera_y, camera_y + decoded['grid_height'])
+               for x in range(camera_x, camera_x + decoded['grid_width'])}
+
+    for y, row in enumerate(decoded['grid']):
+        for x, cell in enumerate(row):
+            expected = 'wall' if game_state['grid'][y + camera_y][x + camera_x] == 'wall' else 'empty'
+            if cell != expected:
+                problems.append(f"cell ({x + camera_x}, {y + camera_y}): decoded {cell}, expected {expected}")
+
+    player = game_state['player']
+    if decoded['player'] != {'x': player['x'], 'y': player['y']}:
+        problems.append(f"player: decoded {decoded['player']}, expected ({player['x']}, {player['y']})")
+
+    expected_boxes = sorted(({'x': b['x'], 'y': b['y'], 'on_target': b['on_target']}
+                             for b in game_state['boxes'] if (b['x'], b['y']) in visible),
+                            key=lambda box: (box['y'], box['x']))
+    if decoded['boxes'] != expected_boxes:
+        problems.append(f"boxes: decoded {decoded['boxes']}, expected {expected_boxes}")
+
+    # A target under the player cannot be seen
+    player_cell = (player['x'], player['y'])
+    expected_targets = sorted(({'x': t['x'], 'y': t['y'], 'completed': t['completed']}
+                               for t in game_state['targets']
+                               if (t['x'], t['y']) in visible and (t['x'], t['y']) != player_cell),
+                              key=lambda target: (target['y'], target['x']))
+    if decoded['targets'] != expected_targets:
+        problems.append(f"targets: decoded {decoded['targets']}, expected {expected_targets}")
+    return problems
+
+
+def screenshot_files(paths):
+    """Expand directories into the PNG files they contain, in name order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith('.png'))
+        else:
+            files.append(path)
+    return files
+
+
+def decode_many(files, layout=None, tolerance=12, workers=None):
+    """Decode screenshots in parallel, yielding results in input order"""
+    if workers == 1 or len(files) < 2:
+        for path in files:
+            yield decode_file(path, layout, tolerance)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(decode_file, files, [layout] * len(files), [tolerance] * len(files),
+                            chunksize=max(1, len(files) // (4 * (workers or os.cpu_count() or 1))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Decode game state from screenshots')
+    parser.add_argument('paths', nargs='+', help='Screenshot files or directories of screenshots')
+    parser.add_argument('--layout', default=None,
+                        help=f'Grid layout JSON published by the game (default: built-in layout; '
+                             f'the game writes {LAYOUT_FILE})')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='Decoder processes (default: CPU count)')
+    parser.add_argument('--tolerance', type=int, default=12,
+                        help='Maximum summed RGB difference from a palette color')
+    parser.add_argument('--expect', help='Game state JSON to compare a single screenshot against')
+    args = parser.parse_args()
+
+    layout = load_layout(args.layout) if args.layout else GridLayout()
+    if layout.sprites:
+        parser.error(f"{args.layout} is the layout of a game drawn with baked sprites (--sprites); "
+                     f"only the default flat rendering can be decoded")
+    files = screenshot_files(args.paths)
+    if args.expect:
+        if len(files) != 1:
+            parser.error('--expect needs exactly one screenshot')
+        with open(args.expect, 'r') as f:
+            game_state = json.load(f)
+        problems = compare_with_state(decode_file(files[0], layout, args.tolerance), game_state)
+        print(json.dumps({'file': files[0], 'ok': not problems, 'problems': problems}))
+        return 0 if not problems else 1
+
+    for decoded in decode_many(files, layout, args.tolerance, args.workers):
+        print(json.dumps(decoded))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Bake GLB models into top-down sprites and pack them into one atlas.
+
+Each model is loaded once (with trimesh), viewed straight down the glTF up
+axis and rasterized on the CPU at the tile size: flat-shaded triangles, a
+depth buffer and 2x supersampling, all in NumPy. Baked sprites are cached
+on disk under a key made of the model's content hash and the sprite size,
+so only new or changed models are baked again; misses are baked in parallel
+with a process pool. The results are packed into sprites/atlas.png with an
+atlas.json index that maps game roles (wall, box, floor) to sprites.
+
+The game only ever loads the atlas (load_sprite_atlas), never a mesh:
+
+    python sprite_baker.py example_assets
+    python game.py --sprites sprites/atlas.json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from grid_layout import GRID_SIZE
+
+# Bumped whenever the rasterizer output changes, which invalidates the cache
+BAKE_VERSION = 1
+
+SUPERSAMPLE = 2
+MARGIN = 0.08             # Fraction of the sprite left empty on each side
+AMBIENT = 0.35
+LIGHT = np.array([-0.4, 1.0, -0.3]) / np.linalg.norm([-0.4, 1.0, -0.3])
+TRIANGLE_BATCH = 128
+
+DEFAULT_ROLES = {'wall': 'example_building', 'box': 'example_cube'}
+SPRITE_ROLES = ('wall', 'floor', 'box')
+
+
+def load_mesh(path):
+    """Triangles of every mesh in a GLB scene as (vertices, faces, face RGB colors)"""
+    import trimesh
+
+    scene = trimesh.load(path, force='scene')
+    vertices, faces, colors = [], [], []
+    offset = 0
+    for node in scene.graph.nodes_geometry:
+        transform, geometry_name = scene.graph[node]
+        mesh = scene.geometry[geometry_name]
+        if not hasattr(mesh, 'faces') or len(mesh.faces) == 0:
+            continue
+        if mesh.visual.kind is None:
+            # No material: bake white so the game can tint the shading with its palette
+            vertex_colors = np.full((len(mesh.vertices), 3), 255.0)
+        else:
+            visual = mesh.visual.to_color() if mesh.visual.kind == 'texture' else mesh.visual
+            vertex_colors = np.asarray(visual.vertex_colors, dtype=np.float64)[:, :3]
+        vertices.append(trimesh.transformations.transform_points(mesh.vertices, transform))
+        faces.append(mesh.faces + offset)
+        colors.append(vertex_colors[mesh.faces].mean(axis=1))
+        offset += len(mesh.vertices)
+    if not faces:
+        raise ValueError(f"{path} contains no triangle meshes")
+    return np.concatenate(vertices), np.concatenate(faces), np.concatenate(colors)
+
+
+def rasterize(vertices, faces, face_colors, size):
+    """Render triangles seen from above (+Y) into a size x size RGBA array"""
+    resolution = size * SUPERSAMPLE
+    vertices = np.asarray(vertices, dtype=np.float64)
+
+    # Fit the model's footprint (x, z) into the sprite, keeping its aspect ratio
+    footprint = vertices[:, [0, 2]]
+    low, high = footprint.min(axis=0), footprint.max(axis=0)
+    scale = resolution * (1 - 2 * MARGIN) / (max((high - low).max(), 1e-9))
+    points = (footprint - (low + high) / 2) * scale + resolution / 2
+    triangles = points[faces]                       # (m, 3, 2) pixel coordinates
+    depths = vertices[faces][:, :, 1]               # (m, 3) height: larger is closer
+
+    # Flat Lambert shading; winding is not trusted, so both sides are lit
+    corners = vertices[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    shade = AMBIENT + (1 - AMBIENT) * np.abs(normals @ LIGHT) / np.maximum(lengths, 1e-12)
+    colors = np.clip(np.asarray(face_colors, dtype=np.float64) * shade[:, None], 0, 255)
+
+    # Triangles seen edge-on cover no pixels
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    area = (b - a)[:, 0] * (c - a)[:, 1] - (b - a)[:, 1] * (c - a)[:, 0]
+    keep = np.abs(area) > 1e-9
+    triangles, depths, colors, area = triangles[keep], depths[keep], colors[keep], area[keep]
+
+    # Neighbouring triangles share a batch, so each batch only tests a small pixel window
+    centroids = triangles.mean(axis=1)
+    order = np.lexsort((centroids[:, 0] // 8, centroids[:, 1] // 8))
+
+    depth_buffer = np.full((resolution, resolution), -np.inf)
+    image = np.zeros((resolution, resolution, 4))
+    for start in range(0, len(order), TRIANGLE_BATCH):
+        batch = order[start:start + TRIANGLE_BATCH]
+        tri, tri_depth, tri_area = triangles[batch], depths[batch], area[batch]
+        x0, y0 = np.maximum(np.floor(tri.reshape(-1, 2).min(axis=0)).astype(int), 0)
+        x1, y1 = np.minimum(np.ceil(tri.reshape(-1, 2).max(axis=0)).astype(int), resolution)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        ys, xs = np.mgrid[y0:y1, x0:x1]
+        px, py = xs.ravel() + 0.5, ys.ravel() + 0.5
+
+        # Barycentric weights of every pixel center for every triangle in the batch
+        a, b, c = tri[:, 0, :, None], tri[:, 1, :, None], tri[:, 2, :, None]
+        weight_b = ((px - a[:, 0]) * (c[:, 1] - a[:, 1]) - (py - a[:, 1]) * (c[:, 0] - a[:, 0])) / tri_area[:, None]
+        weight_c = ((b[:, 0] - a[:, 0]) * (py - a[:, 1]) - (b[:, 1] - a[:, 1]) * (px - a[:, 0])) / tri_area[:, None]
+        weight_a = 1 - weight_b - weight_c
+        inside = (weight_a >= 0) & (weight_b >= 0) & (weight_c >= 0)
+        z = weight_a * tri_depth[:, 0, None] + weight_b * tri_depth[:, 1, None] + weight_c * tri_depth[:, 2, None]
+        z[~inside] = -np.inf
+
+        nearest = z.argmax(axis=0)
+        nearest_z = z[nearest, np.arange(len(nearest))]
+        window_depth = depth_buffer[y0:y1, x0:x1].reshape(-1)
+        closer = nearest_z > window_depth
+        window_depth[closer] = nearest_z[closer]
+        depth_buffer[y0:y1, x0:x1] = window_depth.reshape(y1 - y0, x1 - x0)
+        window = image[y0:y1, x0:x1].reshape(-1, 4)
+        window[closer, :3] = colors[batch[nearest[closer]]]
+        window[closer, 3] = 255
+        image[y0:y1, x0:x1] = window.reshape(y1 - y0, x1 - x0, 4)
+
+    # Average supersamples with premultiplied alpha so edges do not darken
+    image[..., :3] *= image[..., 3:] / 255
+    image = image.reshape(size, SUPERSAMPLE, size, SUPERSAMPLE, 4).mean(axis=(1, 3))
+    covered = image[..., 3] > 0
+    image[covered, :3] *= 255 / image[covered, 3:]
+    return np.round(np.clip(image, 0, 255)).astype(np.uint8)
+
+
+def cache_key(path, size):
+    """Cache file name of a model: content hash, sprite size and baker version"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return f"{digest.hexdigest()[:32]}_{size}_v{BAKE_VERSION}.png"
+
+
+def save_png_atomic(path, image):
+    """Write a PNG under a temporary name and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.sprite_', suffix='.png', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            image.save(f, format='PNG')
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def bake_sprite(path, size, cache_path):
+    """Load one model, rasterize it and store the sprite in the cache"""
+    vertices, faces, colors = load_mesh(path)
+    save_png_atomic(cache_path, Image.fromarray(rasterize(vertices, faces, colors, size), 'RGBA'))
+    return cache_path
+
+
+def bake_all(paths, size=GRID_SIZE, cache_dir='sprites/cache', workers=None):
+    """Sprites for all models, baking only cache misses; returns ({name: png}, baked count)"""
+    os.makedirs(cache_dir, exist_ok=True)
+    sprites, sources, missing = {}, {}, []
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in sources:
+            raise ValueError(f"{sources[name]} and {path} would both be sprite '{name}'; rename one of them")
+        sources[name] = path
+        cache_path = os.path.join(cache_dir, cache_key(path, size))
+        sprites[name] = cache_path
+        if not os.path.exists(cache_path):
+            missing.append((path, cache_path))
+
+    if workers == 1 or len(missing) < 2:
+        for path, cache_path in missing:
+            bake_sprite(path, size, cache_path)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(bake_sprite, [path for path, _ in missing], [size] * len(missing),
+                          [cache_path for _, cache_path in missing]))
+    return sprites, len(missing)
+
+
+def build_atlas(sprites, size, roles, out_dir='sprites'):
+    """Pack cached sprites into atlas.png and write the atlas.json index; returns its path"""
+    os.makedirs(out_dir, exist_ok=True)
+    names = sorted(sprites)
+    columns = max(1, math.ceil(math.sqrt(len(names))))
+    rows = max(1, math.ceil(len(names) / columns))
+    atlas = Image.new('RGBA', (columns * size, rows * size), (0, 0, 0, 0))
+    index = {'tile_size': size, 'image': 'atlas.png', 'sprites': {},
+             'roles': {role: name for role, name in roles.items() if name in sprites}}
+    for i, name in enumerate(names):
+        x, y = (i % columns) * size, (i // columns) * size
+        with Image.open(sprites[name]) as sprite:
+            atlas.paste(sprite, (x, y))
+        index['sprites'][name] = {'rect': [x, y, size, size], 'cache': os.path.basename(sprites[name])}
+
+    save_png_atomic(os.path.join(out_dir, 'atlas.png'), atlas)
+    index_path = os.path.join(out_dir, 'atlas.json')
+    fd, tmp_path = tempfile.mkstemp(prefix='.atlas_', suffix='.json', dir=out_dir)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def load_sprite_atlas(path):
+    """Game-side loader: {role: pygame.Surface} from a baked atlas.json (needs a display mode)"""
+    import pygame
+
+    with open(path, 'r') as f:
+        index = json.load(f)
+    atlas = pygame.image.load(os.path.join(os.path.dirname(path), index['image'])).convert_alpha()
+    return {role: atlas.subsurface(pygame.Rect(index['sprites'][name]['rect']))
+            for role, name in index['roles'].items()}
+
+
+def asset_files(paths):
+    """Expand directories into the GLB files they contain, in name order"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.lower().endswith('.glb'))
+        else:
+            files.append(path)
+    return files
+
+
+def parse_roles(values):
+    roles = dict(DEFAULT_ROLES)
+    for value in values:
+        role, _, name = value.partition('=')
+        if role not in SPRITE_ROLES or not name:
+            raise ValueError(f"Bad --role '{value}' (expected one of {', '.join(SPRITE_ROLES)}=<sprite>)")
+        roles[role] = name
+    return roles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bake GLB models into a top-down sprite atlas')
+    parser.add_argument('paths', nargs='+', help='GLB files or directories of GLB files')
+    parser.add_argument('--size', type=int, default=GRID_SIZE, help='Sprite size in pixels (default: tile size)')
+    parser.add_argument('--out', default='sprites', help='Directory for atlas.png and atlas.json')
+    parser.add_argument('--cache', default=None, help='Sprite cache directory (default: <out>/cache)')
+    parser.add_argument('--workers', '-j', type=int, default=None, help='Baking processes (default: CPU count)')
+    parser.add_argument('--role', action='append', default=[],
+                        help=f'Use a sprite for a game role, e.g. wall=example_tree (roles: {", ".join(SPRITE_ROLES)})')
+    args = parser.parse_args()
+
+    try:
+        roles = parse_roles(args.role)
+    except ValueError as e:
+        parser.error(str(e))
+    files = asset_files(args.paths)
+    if not files:
+        parser.error('no .glb files found')
+
+    try:
+        sprites, baked = bake_all(files, args.size, args.cache or os.path.join(args.out, 'cache'), args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    index_path = build_atlas(sprites, args.size, roles, args.out)
+    print(f"Baked {baked} of {len(files)} sprites ({len(files) - baked} cached); atlas written to {index_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
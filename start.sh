@@ -6,7 +6,20 @@ Xvfb :99 -screen 0 1024x768x24 &
 export DISPLAY=:99
 
 # Wait for display to be ready
-sleep 2
+until xdpyinfo -display :99 >/dev/null 2>&1; do
+    sleep 0.05
+done
+
+# Start the warm pool; games are forked from it already initialized
+export GAME_POOL_SOCKET=/tmp/box_pushing_pool.sock
+
+# Draw with the sprite atlas baked into the image. Set GAME_SPRITES= (empty)
+# for the flat rendering that screen_decoder.py reads.
+if [ -z "${GAME_SPRITES+set}" ] && [ -f sprites/atlas.json ]; then
+    export GAME_SPRITES=$PWD/sprites/atlas.json
+fi
+python warm_pool.py serve --size 1 &
+POOL_PID=$!
 
 # Check if commands were passed as arguments
 if [ $# -eq 0 ]; then
@@ -27,17 +40,18 @@ if [ $# -eq 0 ]; then
     echo "  python3 automation.py \"click 100 100\" \"screenshot\""
     echo ""
     
-    # Start the game and keep it running
-    python game.py &
-    GAME_PID=$!
-    
-    # Wait a bit for game to start
-    sleep 3
+    # Start the game and keep it running; spawn returns once the first frame is drawn
+    eval "$(python warm_pool.py spawn --format env)"
+    WINDOW_ID=$GAME_WINDOW_ID
     
-    # Find the game window ID
-    echo "🔍 Finding game window..."
-    WINDOW_ID=""
+    # Find the game window ID if the pool could not report it
+    if [ -z "$WINDOW_ID" ]; then
+        echo "🔍 Finding game window..."
+    fi
     for i in {1..5}; do
+        if [ ! -z "$WINDOW_ID" ]; then
+            break
+        fi
         # Try different window search patterns
         for pattern in "GLB Asset Adventure" "pygame" "python"; do
             FOUND_ID=$(xdotool search --name "$pattern" 2>/dev/null | head -1)
@@ -88,7 +102,7 @@ if [ $# -eq 0 ]; then
     # Setup cleanup function
     cleanup() {
         echo "Cleaning up..."
-        kill $GAME_PID 2>/dev/null
+        kill $GAME_PID $POOL_PID 2>/dev/null
         exit 0
     }
     trap cleanup SIGINT SIGTERM
@@ -101,16 +115,12 @@ if [ $# -eq 0 ]; then
 else
     echo "Starting game with automation commands..."
     
-    # Start the game in background
-    python game.py &
-    GAME_PID=$!
-    
-    # Wait a bit for game to start
-    sleep 3
+    # Start the game; spawn returns once the first frame is drawn
+    eval "$(python warm_pool.py spawn --format env)"
     
     # Run automation with provided commands
     python automation.py "$@"
     
-    # Kill the game
-    kill $GAME_PID 2>/dev/null
+    # Kill the game and the pool
+    kill $GAME_PID $POOL_PID 2>/dev/null
 fi 
\ No newline at end of file
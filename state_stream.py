@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Spectator stream of game state changes.
+
+Observers connect to a local socket (Unix path or host:port) and receive
+newline-delimited JSON: a full snapshot first, then one compact diff per
+state change with only what moved:
+
+    <- {"type": "snapshot", "seq": 7, "step": 7, "state_hash": "...", "state": {...}}
+    <- {"type": "diff", "seq": 8, "step": 8, "state_hash": "...", "player": [3, 4],
+        "boxes": [{"id": 1, "x": 3, "y": 3, "on_target": true}], "score": {"moves": 5, "pushes": 2}}
+
+Starting a new level sends a fresh snapshot. Every subscriber has its own
+bounded queue and sender thread, so a slow observer never stalls the game:
+when its queue fills up, the backlog is replaced by one snapshot, and an
+observer that stops reading altogether is disconnected.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+from collections import deque
+
+from control_server import create_listener, encode_message, parse_address, set_nodelay
+
+
+class StateTracker:
+    """Remembers the last published state and computes compact diffs against it"""
+
+    def __init__(self):
+        self.state = None
+
+    def reset(self, game_state):
+        self.state = game_state
+        self.player = (game_state['player']['x'], game_state['player']['y'])
+        self.selected_box = game_state['player']['selected_box']
+        self.boxes = [(b['x'], b['y'], b['on_target']) for b in game_state['boxes']]
+        self.completed = [t['completed'] for t in game_state['targets']]
+        self.score = dict(game_state['score'])
+        self.rewards = dict(game_state['rewards'])
+        self.game_status = game_state['game_status']
+        self.level = game_state['level']
+
+    def diff(self, game_state):
+        """Changes since the last call, as a dict of only the fields that changed"""
+        changes = {}
+        player = game_state['player']
+        if (player['x'], player['y']) != self.player:
+            self.player = (player['x'], player['y'])
+            changes['player'] = list(self.player)
+        if player['selected_box'] != self.selected_box:
+            self.selected_box = player['selected_box']
+            changes['selected_box'] = self.selected_box
+
+        boxes = []
+        for i, box in enumerate(game_state['boxes']):
+            current = (box['x'], box['y'], box['on_target'])
+            if current != self.boxes[i]:
+                self.boxes[i] = current
+                boxes.append({'id': box['id'], 'x': box['x'], 'y': box['y'], 'on_target': box['on_target']})
+        if boxes:
+            changes['boxes'] = boxes
+
+        targets = []
+        for i, target in enumerate(game_state['targets']):
+            if target['completed'] != self.completed[i]:
+                self.completed[i] = target['completed']
+                targets.append({'index': i, 'completed': target['completed']})
+        if targets:
+            changes['targets'] = targets
+
+        for name in ('score', 'rewards'):
+            previous, current = getattr(self, name), game_state[name]
+            changed = {key: value for key, value in current.items() if previous.get(key) != value}
+            if changed:
+                previous.update(changed)
+                changes[name] = changed
+
+        for name in ('game_status', 'level'):
+            if game_state[name] != getattr(self, name):
+                setattr(self, name, game_state[name])
+                changes[name] = game_state[name]
+        return changes
+
+
+def apply_message(game_state, message):
+    """Update a spectator's copy of the state with one stream message and return it"""
+    if message['type'] == 'snapshot':
+        return message['state']
+    if 'player' in message:
+        game_state['player']['x'], game_state['player']['y'] = message['player']
+    if 'selected_box' in message:
+        game_state['player']['selected_box'] = message['selected_box']
+    for change in message.get('boxes', ()):
+        game_state['boxes'][change['id']].update(x=change['x'], y=change['y'], on_target=change['on_target'])
+    for change in message.get('targets', ()):
+        game_state['targets'][change['index']]['completed'] = change['completed']
+    for name in ('score', 'rewards'):
+        game_state[name].update(message.get(name, {}))
+    for name in ('game_status', 'level'):
+        if name in message:
+            game_state[name] = message[name]
+    game_state['step'] = message['step']
+    return game_state
+
+
+class Subscriber:
+    """One observer connection with its own bounded outgoing queue"""
+
+    def __init__(self, connection, max_pending):
+        self.connection = connection
+        self.max_pending = max_pending
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+
+    def push(self, message, snapshot):
+        """Queue a message; a full queue is coalesced into a single snapshot"""
+        with self.condition:
+            if len(self.pending) >= self.max_pending:
+                self.pending.clear()
+                self.pending.append(snapshot())
+            else:
+                self.pending.append(message)
+            self.condition.notify()
+
+    def send_loop(self, on_close):
+        try:
+            while True:
+                with self.condition:
+                    while not self.pending and not self.closed:
+                        self.condition.wait()
+                    if self.closed:
+                        break
+                    message = self.pending.popleft()
+                self.connection.sendall(message)
+        except OSError:
+            pass  # Disconnected, or too slow to drain a single message in time
+        finally:
+            on_close(self)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+
+class StateStreamServer:
+    """Publishes a running game's state changes to any number of observers"""
+
+    def __init__(self, game, address, max_pending=256, send_timeout=5.0):
+        self.game = game
+        self.address = address
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self.listener = None
+        self.running = False
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.tracker = StateTracker()
+        self.seq = 0
+
+    def start(self):
+        with self.game.state_lock:
+            self.tracker.reset(self.game.game_state)
+        self.listener = create_listener(self.address)
+        self.running = True
+        threading.Thread(target=self.accept_loop, name='stream-accept', daemon=True).start()
+        print(f"State stream listening on {self.address}")
+
+    def stop(self):
+        self.running = False
+        if self.listener is not None:
+            self.listener.close()
+            family, bind_address = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(bind_address):
+                os.unlink(bind_address)
+        with self.subscribers_lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def accept_loop(self):
+        while self.running:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                break
+            set_nodelay(connection)
+            connection.settimeout(self.send_timeout)
+            subscriber = Subscriber(connection, self.max_pending)
+            # Snapshot and registration happen under the game lock so no diff is missed
+            with self.game.state_lock:
+                subscriber.pending.append(self.snapshot())
+                with self.subscribers_lock:
+                    self.subscribers.append(subscriber)
+            threading.Thread(target=subscriber.send_loop, args=(self.remove,),
+                             name='stream-subscriber', daemon=True).start()
+
+    def remove(self, subscriber):
+        with self.subscribers_lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+        try:
+            subscriber.connection.close()
+        except OSError:
+            pass
+
+    def header(self, message_type):
+        return {'type': message_type, 'seq': self.seq, 'step': self.game.step_counter,
+                'state_hash': f"{self.game.state_hash:016x}"}
+
+    def snapshot(self):
+        """Encoded full snapshot of the current state (caller holds the game lock)"""
+        message = self.header('snapshot')
+        message['state'] = self.game.game_state
+        return encode_message(message)
+
+    def publish(self):
+        """Send the latest state change to every subscriber (caller holds the game lock)"""
+        game_state = self.game.game_state
+        if game_state is not self.tracker.state:
+            # A new level: everyone gets a fresh snapshot
+            self.tracker.reset(game_state)
+            self.seq += 1
+            message = self.snapshot()
+        else:
+            changes = self.tracker.diff(game_state)
+            if not changes:
+                return
+            self.seq += 1
+            header = self.header('diff')
+            header.update(changes)
+            message = encode_message(header)
+
+        with self.subscribers_lock:
+            subscribers = list(self.subscribers)
+        snapshot = None
+        
+        def shared_snapshot():
+            # Encoded at most once per publish, and only if some subscriber fell behind
+            nonlocal snapshot
+            if snapshot is None:
+                snapshot = self.snapshot()
+            return snapshot
+        
+        for subscriber in subscribers:
+            subscriber.push(message, shared_snapshot)
+
+
+def stream_messages(address, timeout=None):
+    """Connect to a state stream and yield its decoded messages"""
+    family, connect_address = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(connect_address)
+        with sock.makefile('rb') as reader:
+            for line in reader:
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch a game through its state stream')
+    parser.add_argument('address', help='Unix socket path or host:port given to game.py --stream')
+    parser.add_argument('--mirror', action='store_true',
+                        help='Print the reconstructed full state after every message')
+    args = parser.parse_args()
+
+    game_state = None
+    try:
+        for message in stream_messages(args.address):
+            if args.mirror:
+                game_state = apply_message(game_state, message)
+                print(json.dumps(game_state), flush=True)
+            else:
+                print(json.dumps(message), flush=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
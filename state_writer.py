@@ -0,0 +1,147 @@
+"""
+Background, coalescing persistence of game_state_step_N.json files.
+
+The game loop only snapshots the parts of the state that change during play
+(the static grid is shared, not copied) and hands the snapshot to a writer
+thread. The thread keeps just the newest pending snapshot, so a burst of
+moves that outpaces the disk results in fewer, newer files rather than a
+growing backlog. Files are written to a temporary name and renamed into
+place, so readers never see partial JSON.
+
+Write policies:
+
+    step    write every step (steps are skipped only while the disk lags)
+    every   write every Nth step
+    idle    write once no step has arrived for a while
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+SAVE_POLICIES = ('step', 'every', 'idle')
+
+
+def snapshot_state(game_state):
+    """Copy the parts of a game state that change during play; the grid is shared"""
+    snapshot = dict(game_state)
+    snapshot['player'] = dict(game_state['player'])
+    snapshot['boxes'] = [dict(box) for box in game_state['boxes']]
+    snapshot['targets'] = [dict(target) for target in game_state['targets']]
+    snapshot['score'] = dict(game_state['score'])
+    snapshot['rewards'] = dict(game_state['rewards'])
+    return snapshot
+
+
+def write_json_atomic(path, data):
+    """Write JSON to a temporary file in the same directory, then rename it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.game_state_', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class StateWriter:
+    """Writes the newest submitted game state on a background thread"""
+
+    def __init__(self, policy='step', every=10, idle_seconds=0.5, directory='.'):
+        if policy not in SAVE_POLICIES:
+            raise ValueError(f"Unknown save policy '{policy}' (expected one of {', '.join(SAVE_POLICIES)})")
+        self.policy = policy
+        self.every = max(1, every)
+        self.idle_seconds = idle_seconds
+        self.directory = os.path.abspath(directory)
+        self.pending = None  # (step, snapshot, due) waiting to be written
+        self.last_submit = 0.0
+        self.written = 0
+        self.coalesced = 0
+        self.writing = False
+        self.running = True
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.write_loop, name='state-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, step, game_state, force=False):
+        """Queue the state of a step for writing; never touches the disk
+
+        force makes the write due regardless of the 'every' interval (the
+        'idle' policy still waits for a quiet moment).
+        """
+        if not force and self.policy == 'every' and step % self.every != 0:
+            # Still remembered so that flush() persists the final state
+            self.replace_pending(step, game_state, notify=False)
+            return
+        self.replace_pending(step, game_state, notify=True)
+
+    def replace_pending(self, step, game_state, notify):
+        snapshot = snapshot_state(game_state)
+        with self.condition:
+            if self.pending is not None:
+                self.coalesced += 1
+                # A due write that has not started yet is taken over by the newer state
+                notify = notify or self.pending[2]
+            self.pending = (step, snapshot, notify)
+            self.last_submit = time.monotonic()
+            self.condition.notify()
+
+    def next_item(self):
+        """Block until a snapshot is due under the write policy (or the writer stops)"""
+        with self.condition:
+            while True:
+                if self.pending is not None and self.pending[2]:
+                    if self.policy != 'idle' or not self.running:
+                        break
+                    quiet_for = time.monotonic() - self.last_submit
+                    if quiet_for >= self.idle_seconds:
+                        break
+                    self.condition.wait(self.idle_seconds - quiet_for)
+                    continue
+                if not self.running:
+                    return None
+                self.condition.wait()
+            item, self.pending = self.pending, None
+            self.writing = True
+            return item
+
+    def write_loop(self):
+        while True:
+            item = self.next_item()
+            if item is None:
+                return
+            step, snapshot, _ = item
+            path = os.path.join(self.directory, f"game_state_step_{step}.json")
+            try:
+                write_json_atomic(path, snapshot)
+                print(f"Saved game state to {os.path.basename(path)}")
+            except Exception as e:
+                print(f"Error saving game state: {e}")
+            with self.condition:
+                self.writing = False
+                self.written += 1
+                self.condition.notify_all()
+
+    def flush(self):
+        """Write whatever is pending now, regardless of policy, and wait for it"""
+        with self.condition:
+            if self.pending is not None:
+                step, snapshot, _ = self.pending
+                self.pending = (step, snapshot, True)
+                self.last_submit = 0.0
+                self.condition.notify_all()
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+    def close(self):
+        """Flush the final state and stop the writer thread"""
+        self.flush()
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join()
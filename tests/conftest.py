@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+
+# Headless pygame, and a private layout file so tests never touch a live game's
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+os.environ['GAME_LAYOUT_FILE'] = os.path.join(tempfile.mkdtemp(prefix='box_pushing_tests_'), 'layout.json')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from game_state_generator import build_game_state
+
+
+def level(*rows):
+    """Game state from an ASCII map: # wall, @ player, $ box, . target, * box on target"""
+    grid, boxes, targets, player = [], [], [], None
+    for y, row in enumerate(rows):
+        grid.append(['wall' if c == '#' else 'empty' for c in row])
+        for x, c in enumerate(row):
+            if c == '@':
+                player = (x, y)
+            if c in '$*':
+                boxes.append((x, y))
+            if c in '.*':
+                targets.append((x, y))
+    return build_game_state(grid, player, boxes, targets)
+
+
+@pytest.fixture
+def make_game(tmp_path, monkeypatch):
+    """Build headless games in a temporary working directory and shut them down afterwards"""
+    from game import BoxPushingGame
+
+    monkeypatch.chdir(tmp_path)
+    games = []
+
+    def make(**kwargs):
+        game = BoxPushingGame(**kwargs)
+        games.append(game)
+        return game
+
+    yield make
+    for game in games:
+        game.state_writer.close()
+        game.layout_publisher.close()
+        if game.level_pack is not None:
+            game.level_pack.close()
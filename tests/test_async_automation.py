@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+
+import async_automation
+from async_automation import AsyncAutomationDriver, AsyncGameSession, parse_session, shared_session_files
+from conftest import level
+from grid_layout import GridLayout
+
+
+def test_parse_session_fields(tmp_path):
+    session = parse_session(':99/42,state_dir=/games/a,layout_file=/games/a/layout.json', 3,
+                            str(tmp_path), '.', '/tmp/default.json')
+    assert (session.name, session.display, session.window_id) == ('session_03', ':99', '42')
+    assert session.state_dir == '/games/a'
+    assert session.layout_file == '/games/a/layout.json'
+
+    session = parse_session(':100', 0, str(tmp_path), '/games/b', '/tmp/default.json')
+    assert (session.window_id, session.state_dir, session.layout_file) == (None, '/games/b', '/tmp/default.json')
+
+
+def test_parse_session_rejects_unknown_field(tmp_path):
+    with pytest.raises(ValueError, match='colour=red'):
+        parse_session(':99,colour=red', 0, str(tmp_path), '.')
+
+
+def test_shared_session_files_warns(tmp_path):
+    sessions = [parse_session(f':{99 + i},state_dir=/games/{i},layout_file=/tmp/layout.json', i,
+                              str(tmp_path), '.') for i in range(2)]
+    assert shared_session_files(sessions) == ['Sessions session_00, session_01 share layout_file /tmp/layout.json']
+
+
+def test_moveto_plans_from_own_state_dir(tmp_path):
+    sent = {}
+    for name, row in (('a', '#@ . #'), ('b', '# @. #')):
+        state_dir = tmp_path / name
+        state_dir.mkdir()
+        (state_dir / 'game_state_step_0.json').write_text(json.dumps(level('######', row, '######')))
+        session = AsyncGameSession(name, screenshot_dir=str(tmp_path), state_dir=str(state_dir),
+                                   settle_delay=0)
+        sent[name] = []
+
+        async def send_keys(keys, sent=sent[name]):
+            sent.extend(keys)
+
+        async def take_screenshot(action_name):
+            return action_name
+        session.send_keys = send_keys
+        session.take_screenshot = take_screenshot
+        asyncio.run(session.execute('moveto 4 1'))
+    assert sent == {'a': ['d', 'd', 'd'], 'b': ['d', 'd']}
+
+
+class FakeX:
+    """Stands in for xdotool/scrot: records every call and how many ran at once"""
+
+    def __init__(self, monkeypatch):
+        self.calls = []
+        self.running = 0
+        self.peak = 0
+        monkeypatch.setattr(async_automation.asyncio, 'create_subprocess_exec', self.exec)
+
+    async def exec(self, *args, env, **kwargs):
+        self.calls.append((env['DISPLAY'], args))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        return self
+
+    async def communicate(self):
+        await asyncio.sleep(0.002)
+        self.running -= 1
+        return b'', b''
+
+    returncode = 0
+
+
+def test_sessions_run_in_order_under_the_concurrency_cap(tmp_path, monkeypatch):
+    fake = FakeX(monkeypatch)
+    sessions = [AsyncGameSession(f"s{i}", display=f":{i}", screenshot_dir=str(tmp_path), settle_delay=0)
+                for i in range(6)]
+    plan = {session.name: [f"keys {key}" for key in 'wasdwasd'] for session in sessions}
+
+    async def run():
+        async with AsyncAutomationDriver(sessions, max_concurrency=3) as driver:
+            return await driver.run_plan(plan)
+    results = asyncio.run(run())
+
+    assert all('error' not in result for outcomes in results.values() for result in outcomes)
+    assert fake.peak == 3
+    for i in range(6):
+        keys = [args[-1] for display, args in fake.calls if display == f":{i}" and args[0] == 'xdotool']
+        assert keys == list('wasdwasd')
+        # Each key press is followed by its screenshot before the next command starts
+        tools = [args[0] for display, args in fake.calls if display == f":{i}"]
+        assert tools == ['xdotool', 'scrot'] * 8
+
+
+def test_tile_clicks_every_cell_in_one_call(tmp_path, monkeypatch):
+    fake = FakeX(monkeypatch)
+    layout_file = tmp_path / 'layout.json'
+    GridLayout().publish(str(layout_file))
+    session = AsyncGameSession('s', screenshot_dir=str(tmp_path), layout_file=str(layout_file), settle_delay=0)
+    session.limiter = asyncio.Semaphore(1)
+    asyncio.run(session.execute('tile 1 1 4 2'))
+
+    (_, click), (_, screenshot) = fake.calls
+    (x1, y1), (x2, y2) = GridLayout().cells_to_pixels([(1, 1), (4, 2)]).tolist()
+    assert click == ('xdotool', 'mousemove', str(x1), str(y1), 'click', '1',
+                     'mousemove', str(x2), str(y2), 'click', '1')
+    assert screenshot[0] == 'scrot' and screenshot[1].endswith('tile_1_1_4_2.png')
@@ -0,0 +1,65 @@
+import copy
+
+import pygame
+import pytest
+
+from conftest import level
+from control_server import ControlClient, parse_address
+
+ROOM = level(
+    '######',
+    '#@ $.#',
+    '#    #',
+    '######',
+)
+
+
+@pytest.fixture
+def controlled(make_game, tmp_path):
+    game = make_game(initial_state=copy.deepcopy(ROOM))
+    address = str(tmp_path / 'control.sock')
+    game.start_control_server(address)
+    client = ControlClient(address)
+    yield game, client
+    client.close()
+    game.control_server.stop()
+
+
+def test_actions_are_applied_like_key_presses(controlled):
+    game, client = controlled
+    reply = client.request(['d', 'd'])
+    assert reply['ok'] and reply['changed']
+    assert reply['state']['player'] == {'x': 3, 'y': 1, 'selected_box': None}
+    assert reply['state']['game_status'] == 'won'
+    assert reply['state_hash'] == f"{game.state_hash:016x}"
+
+    reply = client.request(['u'], state=False)
+    assert reply['changed'] and 'state' not in reply
+    assert game.game_state['player']['x'] == 2
+
+
+def test_blocked_moves_report_no_change_and_bad_actions_fail(controlled):
+    _, client = controlled
+    assert client.request(['w'])['changed'] is False
+    reply = client.request(['jump'])
+    assert not reply['ok'] and 'jump' in reply['error']
+
+
+def test_frames_are_full_screen_rgb(controlled):
+    game, client = controlled
+    reply = client.request(frame=True, state=False)
+    surface = client.frame_surface(reply['frame'])
+    assert surface.get_size() == game.screen.get_size()
+
+
+def test_addresses_are_unix_paths_or_host_port():
+    assert parse_address('127.0.0.1:9000')[1] == ('127.0.0.1', 9000)
+    assert parse_address('/tmp/game.sock')[1] == '/tmp/game.sock'
+
+
+def test_the_callers_state_is_left_alone(make_game):
+    state = copy.deepcopy(ROOM)
+    game = make_game(initial_state=state)
+    game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_d))
+    assert game.game_state['player']['x'] == 2
+    assert state == ROOM
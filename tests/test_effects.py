@@ -0,0 +1,74 @@
+import numpy as np
+import pygame
+import pytest
+
+from effects import PLAYER_SLOT, EffectsSystem, ParticleSystem, TweenSystem
+
+
+def test_emit_fills_free_slots_and_reports_how_many_started():
+    particles = ParticleSystem(capacity=8, size=2, seed=1)
+    assert particles.emit(10, 10, 5, (255, 0, 0), speed=50, life=1.0) == 5
+    assert particles.emit(10, 10, 5, (255, 0, 0), speed=50, life=1.0) == 3
+    assert particles.emit(10, 10, 5, (255, 0, 0), speed=50, life=1.0) == 0
+    assert (particles.life > 0).all()
+
+
+def test_dead_particles_are_recycled():
+    particles = ParticleSystem(capacity=4, size=2, seed=1)
+    particles.emit(0, 0, 4, (0, 255, 0), speed=50, life=0.2)
+    particles.update(0.25)
+    assert (particles.life <= 0).all()
+    assert particles.emit(5, 5, 4, (0, 0, 255), speed=50, life=1.0) == 4
+    assert (particles.color == (0, 0, 255)).all()
+
+
+def test_particles_blend_onto_the_surface_inside_the_clip():
+    surface = pygame.Surface((20, 20))
+    particles = ParticleSystem(capacity=4, size=1, seed=1)
+    particles.emit(5, 5, 1, (255, 255, 255), speed=0, life=1.0)
+    particles.draw(surface, np.array([0, 0]), pygame.Rect(0, 0, 10, 10))
+    assert surface.get_at((5, 5))[:3] == (255, 255, 255)
+    particles.draw(surface, np.array([10, 0]), pygame.Rect(0, 0, 10, 10))  # Clipped away
+    assert surface.get_at((15, 5))[:3] == (0, 0, 0)
+
+
+def test_tween_eases_from_the_previous_cell_to_zero():
+    tweens = TweenSystem(duration=0.1)
+    tweens.resize(2)
+    tweens.start_move(1, 50, 0, now=1.0)
+    tweens.update(1.0)
+    assert tweens.offset[1].tolist() == [-50, 0]
+    tweens.update(1.05)
+    assert -50 < tweens.offset[1][0] < 0
+    tweens.update(1.2)
+    assert tweens.offset[1].tolist() == [0, 0]
+    assert tweens.offset[0].tolist() == [0, 0]
+
+
+def test_off_has_no_offsets_or_particles():
+    effects = EffectsSystem('off')
+    effects.reset(3)
+    effects.on_move(2, 2, 1, 0, 1, True, 1000, (1, 2, 3), (4, 5, 6))
+    effects.on_scroll(1, 0, 1000)
+    effects.update(1000)
+    assert not effects.enabled
+    assert effects.offset(PLAYER_SLOT) == (0, 0)
+    assert effects.offset(1) == (0, 0)
+    assert not hasattr(effects, 'particles')
+    assert effects.pulse == 1.0
+
+
+def test_a_push_onto_a_target_tweens_both_objects_and_bursts():
+    effects = EffectsSystem('low', tile_size=50)
+    effects.reset(2)
+    effects.on_move(3, 2, 1, 0, 2, True, 1000, (1, 2, 3), (4, 5, 6))
+    assert effects.offset(PLAYER_SLOT) == (-50, 0)
+    assert effects.offset(2) == (-50, 0)
+    assert effects.offset(1) == (0, 0)
+    settings = effects.settings
+    assert (effects.particles.life > 0).sum() == settings['dust'] + settings['burst']
+
+
+def test_unknown_quality_is_rejected():
+    with pytest.raises(ValueError, match='ultra'):
+        EffectsSystem('ultra')
@@ -0,0 +1,85 @@
+import os
+import stat
+
+import numpy as np
+import pygame
+import pytest
+
+from conftest import level
+from effects import PLAYER_SLOT
+from grid_layout import GridLayout, load_layout
+
+
+def test_cells_round_trip_through_pixels():
+    layout = GridLayout(grid_width=40, grid_height=30, camera_x=5, camera_y=7)
+    cells = [(5, 7), (10, 12), (19, 16)]
+    pixels = layout.cells_to_pixels(cells)
+    back, inside = layout.pixels_to_cells(pixels)
+    assert back.tolist() == [list(cell) for cell in cells]
+    assert inside.all()
+
+
+def test_cells_out_of_view_are_rejected():
+    layout = GridLayout(grid_width=40, grid_height=30, camera_x=5, camera_y=7)
+    with pytest.raises(ValueError, match='scrolled out of view'):
+        layout.cells_to_pixels([(0, 0)])
+    with pytest.raises(ValueError, match='outside'):
+        layout.cells_to_pixels([(40, 0)])
+
+
+def test_published_layout_is_world_readable(tmp_path):
+    path = tmp_path / 'layout.json'
+    GridLayout(grid_width=20, grid_height=15, camera_x=2).publish(str(path))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    loaded = load_layout(str(path))
+    assert loaded.to_dict() == GridLayout(grid_width=20, grid_height=15, camera_x=2).to_dict()
+
+
+def test_unreadable_layout_falls_back_loudly(tmp_path, capsys):
+    path = tmp_path / 'layout.json'
+    path.write_text('{not json')
+    assert load_layout(str(path)).to_dict() == GridLayout().to_dict()
+    assert 'using the default layout' in capsys.readouterr().err
+    assert np.array_equal(load_layout(str(tmp_path / 'missing.json')).cell_centers, GridLayout().cell_centers)
+
+
+def wide_level():
+    """A corridor wider than the view, with the player one step before the camera scrolls"""
+    return level('#' * 30, '#' + ' ' * 6 + '@' + ' ' * 21 + '#', '#' * 30)
+
+
+def test_camera_scroll_publishes_in_the_background(make_game, tmp_path):
+    layout_file = str(tmp_path / 'layout.json')
+    game = make_game(initial_state=wide_level(), layout_file=layout_file)
+    game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_d))
+    assert game.camera_x == 1
+    game.layout_publisher.flush()
+    layout = load_layout(layout_file)
+    assert (layout.grid_width, layout.camera_x) == (30, 1)
+
+
+def test_camera_scroll_keeps_the_player_tween_in_place(make_game):
+    game = make_game(initial_state=wide_level())
+    before = game.cell_to_screen(7, 1)
+    game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_d))
+    assert game.camera_x == 1
+    # The camera followed the player, so there is nothing left to slide
+    x, y = game.cell_to_screen(8, 1)
+    dx, dy = game.effects.offset(PLAYER_SLOT)
+    assert (x + dx, y + dy) == before
+
+
+def test_missing_layout_is_reported_once_per_path(tmp_path, capsys):
+    missing = str(tmp_path / 'missing.json')
+    for _ in range(3):
+        load_layout(missing)
+    assert capsys.readouterr().err.count('No grid layout published') == 1
+    load_layout(str(tmp_path / 'other.json'), warn=False)
+    assert capsys.readouterr().err == ''
+
+    # Once the layout appears, a later disappearance is reported again
+    GridLayout().publish(missing)
+    load_layout(missing)
+    os.unlink(missing)
+    load_layout(missing)
+    assert capsys.readouterr().err.count('No grid layout published') == 1
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from conftest import level
+from level_pack import LevelPack, append_to_level_pack, write_level_pack
+
+SMALL = level('#####',
+              '#@$.#',
+              '#####')
+LARGE = level('#######',
+              '#@ $ .#',
+              '# $  .#',
+              '#######')
+
+
+def layout(state):
+    return (state['grid'], state['player'], [(b['x'], b['y']) for b in state['boxes']],
+            state['targets'])
+
+
+def test_round_trip_and_random_access(tmp_path):
+    path = str(tmp_path / 'levels.pack')
+    assert write_level_pack(path, [SMALL, LARGE]) == 2
+    with LevelPack(path) as pack:
+        assert len(pack) == 2
+        assert layout(pack[1]) == layout(LARGE)
+        assert layout(pack[0]) == layout(SMALL)
+        assert layout(pack[-1]) == layout(LARGE)
+        with pytest.raises(IndexError):
+            pack[2]
+
+
+def test_write_rejects_empty_pack(tmp_path):
+    with pytest.raises(ValueError):
+        write_level_pack(str(tmp_path / 'levels.pack'), [])
+
+
+def test_append_creates_then_extends(tmp_path):
+    path = str(tmp_path / 'levels.pack')
+    assert append_to_level_pack(path, [LARGE]) == 1
+    assert append_to_level_pack(path, [SMALL, LARGE]) == 3
+    with LevelPack(path) as pack:
+        assert [layout(pack[i]) for i in range(3)] == [layout(LARGE), layout(SMALL), layout(LARGE)]
+
+
+def test_failed_append_leaves_pack_intact(tmp_path):
+    path = str(tmp_path / 'levels.pack')
+    write_level_pack(path, [SMALL])
+    with open(path, 'rb') as f:
+        before = f.read()
+
+    # The second level does not fit the pack's record format
+    with pytest.raises(ValueError, match='does not fit'):
+        append_to_level_pack(path, [SMALL, LARGE])
+
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    with LevelPack(path) as pack:
+        assert len(pack) == 1
+        assert layout(pack[0]) == layout(SMALL)
+
+
+def test_rejects_non_pack(tmp_path):
+    path = tmp_path / 'levels.pack'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError, match='magic'):
+        LevelPack(str(path))
+
+
+def test_append_replaces_the_pack_under_open_readers(tmp_path):
+    path = str(tmp_path / 'levels.pack')
+    write_level_pack(path, [LARGE, LARGE])
+    with LevelPack(path) as reader:
+        assert append_to_level_pack(path, [SMALL, SMALL, SMALL]) == 5
+        # The reader still sees the pack it opened, intact
+        assert len(reader) == 2
+        assert layout(reader[1]) == layout(LARGE)
+    with LevelPack(path) as pack:
+        assert layout(pack[4]) == layout(SMALL)
+    assert os.listdir(tmp_path) == ['levels.pack']
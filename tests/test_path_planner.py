@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from conftest import level
+from path_planner import MOVE_KEYS, load_latest_game_state, plan_command, plan_push, plan_walk
+
+ROOM = level(
+    '#######',
+    '#@  # #',
+    '# $   #',
+    '#  #. #',
+    '#######',
+)
+
+
+def walk(state, keys):
+    x, y = state['player']['x'], state['player']['y']
+    for key in keys:
+        dx, dy = MOVE_KEYS[key]
+        x, y = x + dx, y + dy
+    return x, y
+
+
+def test_walk_is_shortest_and_avoids_obstacles():
+    keys = plan_walk(ROOM, (5, 3))
+    assert walk(ROOM, keys) == (5, 3)
+    assert len(keys) == 6
+
+
+def test_walk_rejects_blocked_unreachable_and_outside_goals():
+    with pytest.raises(ValueError, match='blocked'):
+        plan_walk(ROOM, (4, 1))
+    with pytest.raises(ValueError, match='outside'):
+        plan_walk(ROOM, (9, 9))
+    sealed = level(
+        '#####',
+        '#@# #',
+        '#####',
+    )
+    with pytest.raises(ValueError, match='not reachable'):
+        plan_walk(sealed, (3, 1))
+
+
+def test_push_walks_behind_the_box_then_pushes():
+    keys = plan_push(ROOM, 0, 'right')
+    assert keys[-1] == 'd'
+    assert walk(ROOM, keys[:-1]) == (1, 2)
+    assert plan_command(ROOM, 'push 0 right') == keys
+    with pytest.raises(ValueError, match='cannot be pushed'):
+        plan_push(level('####', '#@$#', '####'), 0, 'right')
+
+
+def test_latest_state_is_chosen_by_step_number(tmp_path):
+    for step in (2, 9, 10):
+        (tmp_path / f'game_state_step_{step}.json').write_text(json.dumps({'step': step}))
+    assert load_latest_game_state(str(tmp_path)) == {'step': 10}
+    empty = tmp_path / 'empty'
+    empty.mkdir()
+    assert load_latest_game_state(str(empty)) is None
+
+
+def test_fresh_game_writes_its_starting_state(make_game, tmp_path):
+    game = make_game(initial_state=ROOM)
+    game.state_writer.flush()
+    assert load_latest_game_state(str(tmp_path))['player'] == {'x': 1, 'y': 1, 'selected_box': None}
+    assert plan_command(load_latest_game_state(str(tmp_path)), 'moveto 5 3')
+
+
+def test_resumed_game_numbers_files_after_the_loaded_step(make_game, tmp_path):
+    resumed = dict(ROOM, step=57)
+    (tmp_path / 'game_state_step_57.json').write_text(json.dumps(resumed))
+    game = make_game()
+    assert game.step_counter == 57
+    game.try_move_player(1, 0)
+    game.save_game_state()
+    game.state_writer.flush()
+    assert load_latest_game_state(str(tmp_path))['step'] == 58
+    assert load_latest_game_state(str(tmp_path))['player']['x'] == 2
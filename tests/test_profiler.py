@@ -0,0 +1,30 @@
+from profiler import FrameProfiler
+
+
+def record_frame(profiler, phases):
+    for name, seconds in phases.items():
+        profiler.current[name] = seconds
+    profiler.end_frame()
+
+
+def test_frame_total_excludes_the_frame_rate_wait():
+    profiler = FrameProfiler(capacity=4)
+    for _ in range(3):
+        record_frame(profiler, {'logic': 0.001, 'draw_grid_cell': 0.002, 'tick': 0.013})
+    stats = profiler.summary()
+    assert abs(stats['frame_total']['mean'] - 3.0) < 1e-9
+    assert abs(stats['frame_wall']['mean'] - 16.0) < 1e-9
+    assert abs(stats['tick']['mean'] - 13.0) < 1e-9
+    assert '2-4 ms      3' in profiler.report()
+
+
+def test_nested_phases_are_exclusive_and_the_ring_buffer_wraps():
+    profiler = FrameProfiler(capacity=2)
+    for _ in range(5):
+        with profiler.phase('outer'):
+            with profiler.phase('inner'):
+                pass
+        profiler.end_frame()
+    assert profiler.frame_count == 5
+    assert set(profiler.summary()) == {'outer', 'inner', 'frame_total', 'frame_wall'}
+    assert profiler.samples['outer'].shape == (2,)
@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pygame
+import pytest
+from PIL import Image
+
+from conftest import level
+from recorder import PillowEncoder
+from screen_decoder import compare_with_state, decode_image
+
+SIZE = (8, 6)
+
+
+COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
+
+
+def frame(shift):
+    """Stripes of all three colours, so the shared GIF palette covers every frame"""
+    return b''.join(bytes(COLORS[(x + shift) % 3]) for y in range(SIZE[1]) for x in range(SIZE[0]))
+
+
+@pytest.mark.parametrize('name', ['session.gif', 'session.png'])
+def test_pillow_encoder_spools_frames_to_disk(tmp_path, name):
+    path = str(tmp_path / name)
+    encoder = PillowEncoder(path, SIZE)
+    for shift in range(3):
+        encoder.add(shift * 0.5, frame(shift))
+    assert len(os.listdir(encoder.spool_dir)) == 3
+    assert not hasattr(encoder, 'frames')
+
+    encoder.close()
+    assert os.listdir(tmp_path) == [name]
+    with Image.open(path) as image:
+        assert image.n_frames == 3
+        image.seek(2)
+        assert image.convert('RGB').getpixel((0, 0)) == (0, 0, 255)
+
+
+def test_pillow_encoder_abort_removes_spool(tmp_path):
+    encoder = PillowEncoder(str(tmp_path / 'session.gif'), SIZE)
+    encoder.add(0.0, frame(0))
+    encoder.abort()
+    assert os.listdir(tmp_path) == []
+
+
+def test_per_move_frames_are_recorded_at_rest(make_game, tmp_path):
+    game = make_game(initial_state=level('#######', '#@ $ .#', '#######'))
+    path = str(tmp_path / 'session.png')
+    game.start_recording(path)
+    for key in (None, pygame.K_d, pygame.K_d):
+        if key is not None:
+            game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=key))
+        game.draw()  # The live frame: the move's tween has only just started
+        game.recorder.capture(game.screen, game.step_counter, settled=game.render_settled_frame)
+    game.recorder.close()
+
+    with Image.open(path) as image:
+        assert image.n_frames == 3
+        image.seek(2)
+        decoded = decode_image(np.asarray(image.convert('RGB')))
+    assert compare_with_state(decoded, game.game_state) == []
@@ -0,0 +1,51 @@
+import copy
+
+import numpy as np
+import pygame
+
+from conftest import level
+from grid_layout import GridLayout
+from screen_decoder import compare_with_state, decode_image
+
+ROOM = level(
+    '#######',
+    '#  .  #',
+    '# $@* #',
+    '#  .$ #',
+    '#######',
+)
+
+
+def screenshot(game):
+    game.render_frame(settled=True)
+    return pygame.surfarray.array3d(game.screen).swapaxes(0, 1)
+
+
+def test_decodes_a_settled_frame(make_game):
+    game = make_game(initial_state=copy.deepcopy(ROOM))
+    decoded = decode_image(screenshot(game))
+    assert compare_with_state(decoded, game.game_state) == []
+    assert decoded['player'] == {'x': 3, 'y': 2}
+    assert [(b['x'], b['y'], b['on_target']) for b in decoded['boxes']] == [(2, 2, False), (4, 2, True), (4, 3, False)]
+    assert decoded['grid'][0] == ['wall'] * 7
+    assert decoded['unknown'] == []
+
+
+def test_finds_the_window_inside_a_larger_screenshot(make_game):
+    game = make_game(initial_state=copy.deepcopy(ROOM))
+    frame = screenshot(game)
+    display = np.zeros((frame.shape[0] + 40, frame.shape[1] + 70, 3), dtype=np.uint8)
+    display[40:, 70:] = frame
+    assert compare_with_state(decode_image(display), game.game_state) == []
+
+
+def test_decodes_a_scrolled_level_with_its_layout(make_game):
+    wide = level('#' * 30,
+                 '#' + ' ' * 19 + '@$ .' + ' ' * 5 + '#',
+                 '#' * 30)
+    game = make_game(initial_state=wide)
+    assert game.camera_x > 0
+    layout = GridLayout(grid_width=30, grid_height=3, camera_x=game.camera_x, camera_y=game.camera_y)
+    decoded = decode_image(screenshot(game), layout)
+    assert decoded['camera'] == [game.camera_x, 0]
+    assert compare_with_state(decoded, game.game_state) == []
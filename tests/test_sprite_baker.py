@@ -0,0 +1,39 @@
+import copy
+
+import pygame
+import pytest
+from PIL import Image
+
+from conftest import level
+from grid_layout import load_layout
+from screen_decoder import decode_image
+from sprite_baker import DEFAULT_ROLES, bake_all, build_atlas
+
+ROOM = level('#####', '#@$.#', '#####')
+
+
+def test_models_with_the_same_name_are_rejected(tmp_path):
+    for directory in ('a', 'b'):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / 'crate.glb').write_bytes(directory.encode())
+    with pytest.raises(ValueError, match="both be sprite 'crate'"):
+        bake_all([str(tmp_path / 'a' / 'crate.glb'), str(tmp_path / 'b' / 'crate.glb')],
+                 cache_dir=str(tmp_path / 'cache'))
+
+
+def test_decoder_refuses_a_sprite_rendered_game(make_game, tmp_path):
+    sprites = {}
+    for name in DEFAULT_ROLES.values():
+        sprites[name] = str(tmp_path / f"{name}.png")
+        Image.new('RGBA', (50, 50), (255, 255, 255, 255)).save(sprites[name])
+    atlas = build_atlas(sprites, 50, DEFAULT_ROLES, str(tmp_path / 'sprites'))
+
+    layout_file = str(tmp_path / 'layout.json')
+    game = make_game(initial_state=copy.deepcopy(ROOM), sprite_atlas=atlas, layout_file=layout_file)
+    game.layout_publisher.flush()
+    layout = load_layout(layout_file)
+    assert layout.sprites == 1
+
+    game.render_frame(settled=True)
+    with pytest.raises(ValueError, match='baked sprites'):
+        decode_image(pygame.surfarray.array3d(game.screen).swapaxes(0, 1), layout)
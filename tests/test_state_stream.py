@@ -0,0 +1,73 @@
+import copy
+import json
+import random
+
+import pygame
+
+from conftest import level
+from state_stream import StateTracker, Subscriber, apply_message, stream_messages
+
+KEYS = [pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d]
+
+ROOM = level(
+    '#######',
+    '#  .  #',
+    '# $@$ #',
+    '#  .  #',
+    '#######',
+)
+
+
+def press(game, key):
+    game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+
+def test_diff_holds_only_what_changed():
+    state = copy.deepcopy(ROOM)
+    tracker = StateTracker()
+    tracker.reset(state)
+    assert tracker.diff(state) == {}
+
+    state['player']['x'] -= 1
+    state['boxes'][0].update(x=1, on_target=False)
+    state['score']['moves'] += 1
+    assert tracker.diff(state) == {
+        'player': [2, 2],
+        'boxes': [{'id': 0, 'x': 1, 'y': 2, 'on_target': False}],
+        'score': {'moves': state['score']['moves']},
+    }
+    assert tracker.diff(state) == {}
+
+
+def test_apply_message_mirrors_the_game(make_game, tmp_path):
+    game = make_game(initial_state=copy.deepcopy(ROOM))
+    address = str(tmp_path / 'stream.sock')
+    game.start_state_stream(address)
+    try:
+        messages = stream_messages(address, timeout=5)
+        mirror = apply_message(None, next(messages))
+        assert mirror == json.loads(json.dumps(game.game_state))
+
+        rng = random.Random(3)
+        for _ in range(60):
+            press(game, rng.choice(KEYS))
+            with game.state_lock:
+                game.state_stream.publish()
+        for message in messages:
+            mirror = apply_message(mirror, message)
+            if message['seq'] == game.state_stream.seq:
+                break
+        assert message['type'] == 'diff'
+        assert mirror == json.loads(json.dumps(game.game_state))
+    finally:
+        game.state_stream.stop()
+
+
+def test_full_subscriber_queue_collapses_to_one_snapshot():
+    subscriber = Subscriber(connection=None, max_pending=2)
+    subscriber.push(b'diff 1', lambda: b'snapshot')
+    subscriber.push(b'diff 2', lambda: b'snapshot')
+    subscriber.push(b'diff 3', lambda: b'snapshot')
+    assert list(subscriber.pending) == [b'snapshot']
+    subscriber.push(b'diff 4', lambda: b'snapshot')
+    assert list(subscriber.pending) == [b'snapshot', b'diff 4']
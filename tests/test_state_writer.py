@@ -0,0 +1,91 @@
+import copy
+import json
+import os
+import time
+
+import pytest
+
+from conftest import level
+from state_writer import StateWriter
+
+ROOM = level(
+    '######',
+    '#@$ .#',
+    '######',
+)
+
+
+def state_at(step):
+    state = copy.deepcopy(ROOM)
+    state['step'] = step
+    state['score']['moves'] = step
+    return state
+
+
+def written_steps(directory):
+    return sorted(int(name[len('game_state_step_'):-len('.json')]) for name in os.listdir(directory)
+                  if name.startswith('game_state_step_'))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match='save policy'):
+        StateWriter('sometimes', directory=str(tmp_path))
+
+
+def test_writes_a_snapshot_not_the_live_state(tmp_path):
+    writer = StateWriter('idle', idle_seconds=60, directory=str(tmp_path))
+    state = state_at(1)
+    writer.submit(1, state)
+    state['player']['x'] = 4
+    state['score']['moves'] = 99
+    writer.close()
+    with open(tmp_path / 'game_state_step_1.json') as f:
+        saved = json.load(f)
+    assert saved['player']['x'] == 1
+    assert saved['score']['moves'] == 1
+    assert os.listdir(tmp_path) == ['game_state_step_1.json']
+
+
+def test_idle_policy_coalesces_a_burst_into_the_newest_state(tmp_path):
+    writer = StateWriter('idle', idle_seconds=60, directory=str(tmp_path))
+    for step in range(1, 6):
+        writer.submit(step, state_at(step))
+    assert writer.coalesced == 4
+    assert written_steps(tmp_path) == []
+    writer.flush()
+    assert written_steps(tmp_path) == [5]
+    writer.close()
+
+
+def test_step_policy_accounts_for_every_submit(tmp_path):
+    writer = StateWriter('step', directory=str(tmp_path))
+    for step in range(1, 101):
+        writer.submit(step, state_at(step))
+    writer.close()
+    assert writer.written + writer.coalesced == 100
+    assert written_steps(tmp_path)[-1] == 100
+
+
+def test_every_policy_waits_for_the_interval_unless_forced(tmp_path):
+    writer = StateWriter('every', every=3, directory=str(tmp_path))
+    writer.submit(1, state_at(1))
+    writer.submit(2, state_at(2))
+    time.sleep(0.05)
+    assert written_steps(tmp_path) == []
+
+    writer.submit(3, state_at(3))
+    wait_for(lambda: written_steps(tmp_path) == [3])
+    writer.submit(4, state_at(4), force=True)
+    wait_for(lambda: written_steps(tmp_path) == [3, 4])
+
+    # Not due, but close() still persists the final state
+    writer.submit(5, state_at(5))
+    writer.close()
+    assert written_steps(tmp_path) == [3, 4, 5]
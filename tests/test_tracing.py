@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+
+import pytest
+
+from tracing import NullTracer, Tracer
+
+
+def trace_work(tracer):
+    with tracer.span('command', command='keys w'):
+        with tracer.span('xdotool', argv=['key', 'w']):
+            time.sleep(0.01)
+        with tracer.span('sleep'):
+            pass
+
+
+def test_jsonl_spans_nest_and_time(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    tracer = Tracer(str(path), 'jsonl')
+    trace_work(tracer)
+    tracer.close()
+
+    spans = {span['name']: span for span in map(json.loads, path.read_text().splitlines())}
+    command, xdotool, sleep = spans['command'], spans['xdotool'], spans['sleep']
+    assert command['parent'] is None
+    assert xdotool['parent'] == sleep['parent'] == command['id']
+    assert len({command['id'], xdotool['id'], sleep['id']}) == 3
+    assert xdotool['args'] == {'argv': ['key', 'w']}
+    assert xdotool['duration_us'] >= 10000
+    assert command['duration_us'] >= xdotool['duration_us'] + sleep['duration_us']
+    assert command['start_us'] <= xdotool['start_us'] <= sleep['start_us']
+
+
+def test_chrome_trace_is_written_on_close(tmp_path):
+    path = tmp_path / 'trace.json'
+    tracer = Tracer(str(path), 'chrome')
+    trace_work(tracer)
+    assert not path.exists()
+    tracer.close()
+
+    events = {event['name']: event for event in json.loads(path.read_text())['traceEvents']}
+    assert set(events) == {'command', 'xdotool', 'sleep'}
+    assert all(event['ph'] == 'X' for event in events.values())
+    assert events['xdotool']['dur'] >= 10000
+    assert events['command']['ts'] <= events['xdotool']['ts']
+    assert events['command']['ts'] + events['command']['dur'] >= events['sleep']['ts'] + events['sleep']['dur']
+
+
+def test_threads_have_their_own_span_stacks(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    tracer = Tracer(str(path), 'jsonl')
+    barrier = threading.Barrier(4)
+
+    def worker(index):
+        with tracer.span(f"outer {index}"):
+            barrier.wait()  # Every thread has its outer span open at the same time
+            with tracer.span(f"inner {index}"):
+                pass
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    tracer.close()
+
+    spans = {span['name']: span for span in map(json.loads, path.read_text().splitlines())}
+    assert len({span['id'] for span in spans.values()}) == 8
+    for i in range(4):
+        assert spans[f"outer {i}"]['parent'] is None
+        assert spans[f"inner {i}"]['parent'] == spans[f"outer {i}"]['id']
+
+
+def test_unknown_format_and_null_tracer(tmp_path):
+    with pytest.raises(ValueError):
+        Tracer(str(tmp_path / 'trace.txt'), 'xml')
+    tracer = NullTracer()
+    trace_work(tracer)
+    tracer.close()
+    assert tracer.path is None
@@ -0,0 +1,115 @@
+import copy
+import json
+import random
+
+import pygame
+
+from conftest import level
+
+KEYS = [pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d]
+
+ROOM = level(
+    '########',
+    '#      #',
+    '# $ .  #',
+    '#  @$ .#',
+    '#  $ . #',
+    '########',
+)
+
+
+def press(game, key):
+    game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=key))
+
+
+def positions(state):
+    """Everything undo/redo must restore (the step counter keeps counting)"""
+    state = copy.deepcopy(state)
+    state.pop('step')
+    return state
+
+
+def test_undo_all_restores_the_start_and_redo_all_replays(make_game):
+    game = make_game(initial_state=copy.deepcopy(ROOM))
+    start = positions(game.game_state)
+    rng = random.Random(7)
+    for _ in range(200):
+        press(game, rng.choice(KEYS))
+    end = positions(game.game_state)
+    end_hash = game.state_hash
+    moves = len(game.undo_stack)
+    assert moves == game.game_state['score']['moves'] > 0
+
+    for _ in range(moves):
+        press(game, pygame.K_u)
+    assert positions(game.game_state) == start
+    assert not game.undo() and len(game.redo_stack) == moves
+
+    for _ in range(moves):
+        press(game, pygame.K_y)
+    assert positions(game.game_state) == end
+    assert game.state_hash == end_hash
+
+
+def test_new_move_clears_redo(make_game):
+    game = make_game(initial_state=copy.deepcopy(ROOM))
+    press(game, pygame.K_d)
+    press(game, pygame.K_u)
+    assert game.redo_stack
+    press(game, pygame.K_w)
+    assert not game.redo_stack and len(game.undo_stack) == 1
+
+
+def test_undo_reverts_a_winning_push(make_game):
+    game = make_game(initial_state=level('#####', '#@$.#', '#####'))
+    press(game, pygame.K_d)
+    assert game.game_state['game_status'] == 'won'
+    press(game, pygame.K_u)
+    assert game.game_state['game_status'] == 'playing'
+    assert game.game_state['boxes'][0] == {'x': 2, 'y': 1, 'id': 0, 'on_target': False}
+    assert game.game_state['targets'][0]['completed'] is False
+    assert game.game_state['score']['level_complete'] is False
+
+
+def test_journal_records_history(make_game, tmp_path):
+    journal = tmp_path / 'journal.jsonl'
+    game = make_game(initial_state=copy.deepcopy(ROOM), journal_path=str(journal))
+    press(game, pygame.K_d)
+    press(game, pygame.K_u)
+    press(game, pygame.K_y)
+    game.journal.flush()
+    ops = [json.loads(line)['op'] for line in journal.read_text().splitlines()]
+    assert ops == ['reset', 'move', 'undo', 'redo']
+
+
+def test_selection_is_undone_and_redone_like_a_move(make_game, tmp_path):
+    journal = tmp_path / 'journal.jsonl'
+    game = make_game(initial_state=copy.deepcopy(ROOM), journal_path=str(journal))
+    press(game, pygame.K_SPACE)
+    assert game.game_state['player']['selected_box'] == 2
+    press(game, pygame.K_d)
+    after = positions(game.game_state)
+
+    press(game, pygame.K_u)
+    assert game.game_state['player']['selected_box'] == 2
+    press(game, pygame.K_u)
+    assert positions(game.game_state) == positions(ROOM)
+    assert game.game_state['score']['moves'] == 0
+
+    press(game, pygame.K_y)
+    press(game, pygame.K_y)
+    assert positions(game.game_state) == after
+    game.journal.flush()
+    ops = [json.loads(line)['op'] for line in journal.read_text().splitlines()]
+    assert ops == ['reset', 'select', 'move', 'undo', 'undo', 'redo', 'redo']
+
+
+def test_redo_remembers_states_like_undo(make_game):
+    game = make_game(initial_state=copy.deepcopy(ROOM))
+    press(game, pygame.K_w)
+    press(game, pygame.K_u)
+    game.transpositions.clear()
+    press(game, pygame.K_y)
+    assert game.transpositions.lookup(game.state_hash) == 1
+    press(game, pygame.K_u)
+    assert game.transpositions.lookup(game.state_hash) == 0
@@ -0,0 +1,74 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from conftest import level
+from warm_pool import WarmPoolClient
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    """A warm pool with one idle worker, served from its own process"""
+    address = str(tmp_path / 'pool.sock')
+    env = dict(os.environ, GAME_LAYOUT_FILE=str(tmp_path / 'layout.json'))
+    process = subprocess.Popen([sys.executable, 'warm_pool.py', '--socket', address, 'serve', '--size', '1'],
+                               cwd=REPO, env=env, stdout=subprocess.DEVNULL)
+    client = WarmPoolClient(address)
+    yield client
+    for pid in client.request('status').get('active', []):
+        client.request('stop', pid=pid)
+    client.request('shutdown')
+    client.close()
+    process.wait(timeout=10)
+
+
+def test_spawn_status_and_stop(pool, tmp_path):
+    state_path = tmp_path / 'start.json'
+    state_path.write_text(json.dumps(level('#####', '#@$.#', '#####')))
+    reply = pool.spawn(cwd=str(tmp_path / 'job'), state=str(state_path))
+    assert reply['ok'], reply
+    pid = reply['pid']
+
+    status = pool.request('status')
+    assert status['active'] == [pid]
+    assert len(status['idle']) == 1 and pid not in status['idle']
+    # The game is playing in its own directory
+    wait_for(lambda: os.path.exists(tmp_path / 'job' / 'game_state_step_0.json'))
+
+    assert pool.request('stop', pid=pid) == {'ok': True}
+    wait_for(lambda: pool.request('status')['active'] == [])
+    assert pool.request('stop', pid=pid)['ok'] is False
+
+
+def test_dead_idle_worker_is_reaped_and_replaced(pool, tmp_path):
+    idle, = pool.request('status')['idle']
+    os.kill(idle, signal.SIGKILL)
+    wait_for(lambda: pool.request('status')['idle'] == [])
+
+    reply = pool.spawn(cwd=str(tmp_path / 'job'))
+    assert reply['ok'], reply
+    assert reply['pid'] != idle
+
+
+def test_spawn_error_is_reported_and_the_pool_recovers(pool, tmp_path):
+    reply = pool.spawn(cwd=str(tmp_path / 'job'), state=str(tmp_path / 'missing.json'))
+    assert reply['ok'] is False
+    assert 'missing.json' in reply['error']
+
+    status = pool.request('status')
+    assert status['active'] == [] and len(status['idle']) == 1
+    assert pool.request('bogus') == {'ok': False, 'error': 'Unknown op: bogus'}
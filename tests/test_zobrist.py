@@ -0,0 +1,66 @@
+import copy
+import random
+
+import pygame
+import pytest
+
+from conftest import level
+from zobrist import TranspositionTable, ZobristTable
+
+LEVEL_A = level(
+    '######',
+    '#@ $.#',
+    '#    #',
+    '######',
+)
+# Same player and box cells, different walls and targets
+LEVEL_B = level(
+    '######',
+    '#@ $ #',
+    '# # .#',
+    '######',
+)
+
+
+def test_same_pieces_on_different_levels_hash_differently():
+    table = ZobristTable(6, 4)
+    assert table.hash_state(LEVEL_A) != table.hash_state(LEVEL_B)
+    moved = copy.deepcopy(LEVEL_A)
+    moved['targets'][0]['x'] = 2
+    assert table.hash_state(LEVEL_A) != table.hash_state(moved)
+
+
+def test_hash_is_reproducible_across_tables():
+    assert ZobristTable(6, 4).hash_state(LEVEL_A) == ZobristTable(6, 4).hash_state(copy.deepcopy(LEVEL_A))
+
+
+def test_incremental_hash_matches_a_full_rehash(make_game):
+    state = level(
+        '########',
+        '#      #',
+        '# $ .  #',
+        '#  @$ .#',
+        '#  $ . #',
+        '########',
+    )
+    game = make_game(initial_state=state)
+    rng = random.Random(3)
+    keys = [pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d, pygame.K_u, pygame.K_y]
+    for _ in range(300):
+        game.handle_input(pygame.event.Event(pygame.KEYDOWN, key=rng.choice(keys)))
+        assert game.state_hash == game.zobrist.hash_state(game.game_state)
+
+
+def test_transposition_table_evicts_least_recently_used():
+    table = TranspositionTable(2)
+    table.store(1, 'a')
+    table.store(2, 'b')
+    assert table.lookup(1) == 'a'
+    table.store(3, 'c')
+    assert 2 not in table and 1 in table and 3 in table
+    assert table.stats()['evictions'] == 1
+
+
+def test_transposition_table_rejects_zero_capacity():
+    with pytest.raises(ValueError):
+        TranspositionTable(0)
@@ -0,0 +1,97 @@
+"""
+Lightweight nested-span tracing for the automation tool.
+
+Spans are written either as JSON lines (one finished span per line, flushed as
+they close) or as a Chrome trace file (chrome://tracing / Perfetto) written
+when the tracer is closed.
+
+Each thread has its own stack of open spans, so spans opened on worker
+threads nest under that thread's spans, never under another thread's.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+TRACE_FORMATS = ('jsonl', 'chrome')
+
+
+class Tracer:
+    """Records nested timing spans to a JSON lines or Chrome trace file"""
+
+    def __init__(self, path, trace_format='jsonl'):
+        if trace_format not in TRACE_FORMATS:
+            raise ValueError(f"Unknown trace format '{trace_format}' (expected one of {TRACE_FORMATS})")
+        self.path = path
+        self.trace_format = trace_format
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.local = threading.local()
+        self.next_id = 1
+        self.events = []
+        self.lock = threading.Lock()
+        self.file = open(path, 'w') if trace_format == 'jsonl' else None
+
+    @contextmanager
+    def span(self, name, **args):
+        """Time a block of code as a span nested under the currently open one"""
+        with self.lock:
+            span_id = self.next_id
+            self.next_id += 1
+        stack = self.stack
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            self.record(span_id, parent, name, start, end, args)
+
+    @property
+    def stack(self):
+        """Ids of the spans currently open on the calling thread"""
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def record(self, span_id, parent, name, start, end, args):
+        start_us = (start - self.origin) * 1e6
+        duration_us = (end - start) * 1e6
+        with self.lock:
+            if self.trace_format == 'jsonl':
+                entry = {'id': span_id, 'parent': parent, 'name': name,
+                         'start_us': round(start_us, 1), 'duration_us': round(duration_us, 1)}
+                if args:
+                    entry['args'] = args
+                self.file.write(json.dumps(entry) + '\n')
+                self.file.flush()
+            else:
+                self.events.append({'name': name, 'ph': 'X', 'pid': self.pid,
+                                    'tid': threading.get_ident(), 'ts': start_us,
+                                    'dur': duration_us, 'args': args})
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+            elif self.trace_format == 'chrome':
+                with open(self.path, 'w') as f:
+                    json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+
+class NullTracer:
+    """Tracer stand-in used when tracing is disabled"""
+
+    path = None
+
+    @contextmanager
+    def span(self, name, **args):
+        yield
+
+    def close(self):
+        pass
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Pre-forked warm pool of game processes.
+
+The launcher imports the game, initializes pygame's font module and loads
+the UI fonts once, then keeps a few idle workers forked from that warm
+parent. Each idle worker has already brought up the display and opened its
+window. When asked for a game it only loads its level, draws the first
+frame and reports back over a pipe, so callers get the process ID and X
+window ID the moment the game is playable instead of sleeping and
+searching for windows.
+
+Requests and replies are newline-delimited JSON on a local socket:
+
+    -> {"op": "spawn", "cwd": "/tmp/job1", "level_pack": "levels.pack", "level_index": 3}
+    <- {"ok": true, "pid": 1234, "window": 4194312, "seconds": 0.012}
+"""
+
+import argparse
+import json
+import os
+import random
+import selectors
+import signal
+import socket
+import sys
+import time
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+
+from control_server import create_listener, encode_message, parse_address
+from effects import EFFECT_QUALITIES
+from game import BoxPushingGame, init_pygame, load_fonts
+from game_state_generator import generate_box_pushing_level
+from grid_layout import LAYOUT_FILE, SCREEN_WIDTH, SCREEN_HEIGHT
+from level_pack import LevelPack
+
+
+def start_assigned_game(options):
+    """Create the game a worker was assigned: a fresh level unless told otherwise"""
+    if options.get('cwd'):
+        os.makedirs(options['cwd'], exist_ok=True)
+        os.chdir(options['cwd'])
+
+    initial_state = None
+    level_pack = options.get('level_pack')
+    level_index = options.get('level_index')
+    if options.get('state'):
+        with open(options['state'], 'r') as f:
+            initial_state = json.load(f)
+    elif not options.get('resume'):
+        if level_pack is None:
+            initial_state = generate_box_pushing_level()
+        elif level_index is None:
+            with LevelPack(level_pack) as pack:
+                level_index = random.randrange(len(pack))
+
+    game = BoxPushingGame(journal_path=options.get('journal'), level_pack=level_pack,
+                          level_index=level_index, initial_state=initial_state,
+                          effects_quality=options.get('effects', 'high'),
+                          sprite_atlas=options.get('sprites'),
+                          layout_file=options.get('layout_file', LAYOUT_FILE))
+    if options.get('control'):
+        game.start_control_server(options['control'])
+    if options.get('stream'):
+        game.start_state_stream(options['stream'])
+    if options.get('record'):
+        game.start_recording(options['record'])
+    game.draw()
+    # The caller may click tiles as soon as we report ready
+    game.layout_publisher.flush()
+    return game
+
+
+def worker_main(assign_fd, status_fd):
+    """Body of a forked worker: warm up, wait for an assignment, then play"""
+    status = os.fdopen(status_fd, 'wb', buffering=0)
+    code = 0
+    try:
+        init_pygame()
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        status.write(encode_message({'state': 'warm'}))
+
+        with os.fdopen(assign_fd, 'rb') as assignments:
+            line = assignments.readline()
+        if not line:
+            return  # The pool shut down before this worker was needed
+
+        game = start_assigned_game(json.loads(line))
+        status.write(encode_message({'state': 'ready', 'pid': os.getpid(),
+                                     'window': pygame.display.get_wm_info().get('window')}))
+        status.close()
+        game.run()
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 0
+    except Exception as e:
+        code = 1
+        try:
+            status.write(encode_message({'state': 'error', 'error': str(e)}))
+        except (OSError, ValueError):
+            print(f"Warm pool worker failed: {e}")
+    finally:
+        sys.stdout.flush()
+        os._exit(code)
+
+
+class IdleWorker:
+    """Parent-side handle on a forked worker that has not been assigned yet"""
+
+    def __init__(self, pid, assign_fd, status_fd):
+        self.pid = pid
+        self.assignments = os.fdopen(assign_fd, 'wb', buffering=0)
+        self.status = os.fdopen(status_fd, 'rb')
+        self.warm = False
+
+    def read_status(self):
+        line = self.status.readline()
+        if not line:
+            raise RuntimeError(f"Worker {self.pid} exited before it was ready")
+        message = json.loads(line)
+        if message['state'] == 'error':
+            raise RuntimeError(f"Worker {self.pid} failed: {message['error']}")
+        return message
+
+    def wait_warm(self):
+        if not self.warm:
+            self.read_status()
+            self.warm = True
+
+    def assign(self, options):
+        """Hand the worker its game and block until the first frame is drawn"""
+        self.wait_warm()
+        self.assignments.write(encode_message(options))
+        return self.read_status()
+
+    def close(self):
+        self.assignments.close()
+        self.status.close()
+
+
+class WarmPool:
+    """Keeps `size` warm workers forked and hands them out on request"""
+
+    def __init__(self, address, size=2):
+        self.address = address
+        self.size = size
+        self.idle = []
+        self.active = set()
+        self.listener = None
+        self.selector = selectors.DefaultSelector()
+        self.running = False
+
+    def fork_worker(self):
+        assign_read, assign_write = os.pipe()
+        status_read, status_write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Drop every parent-side descriptor so idle workers see EOF when the pool exits
+            os.close(assign_write)
+            os.close(status_read)
+            for worker in self.idle:
+                worker.close()
+            self.close_connections()
+            worker_main(assign_read, status_write)
+        os.close(assign_read)
+        os.close(status_write)
+        self.idle.append(IdleWorker(pid, assign_write, status_read))
+
+    def fill(self):
+        while len(self.idle) < self.size:
+            self.fork_worker()
+
+    def reap(self):
+        """Collect exited workers so they do not linger as zombies"""
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.active.discard(pid)
+            for worker in [w for w in self.idle if w.pid == pid]:
+                self.idle.remove(worker)
+                worker.close()
+
+    def spawn(self, options):
+        """Assign a game to the oldest idle worker and return its ready message"""
+        start = time.perf_counter()
+        self.reap()
+        self.fill()
+        worker = self.idle.pop(0)
+        try:
+            ready = worker.assign(options)
+        finally:
+            worker.close()
+        self.active.add(worker.pid)
+        return {'ok': True, 'pid': worker.pid, 'window': ready.get('window'),
+                'seconds': time.perf_counter() - start}
+
+    def handle_request(self, request):
+        op = request.get('op', 'spawn')
+        if op == 'spawn':
+            options = {k: v for k, v in request.items() if k != 'op'}
+            try:
+                return self.spawn(options)
+            finally:
+                self.fill()
+        if op == 'status':
+            self.reap()
+            return {'ok': True, 'idle': [w.pid for w in self.idle], 'active': sorted(self.active)}
+        if op == 'stop':
+            pid = int(request['pid'])
+            if pid not in self.active:
+                return {'ok': False, 'error': f"No active worker with pid {pid}"}
+            os.kill(pid, signal.SIGTERM)
+            return {'ok': True}
+        if op == 'shutdown':
+            self.running = False
+            return {'ok': True}
+        return {'ok': False, 'error': f"Unknown op: {op}"}
+
+    def serve(self):
+        """Warm up the pool, then serve requests until shut down"""
+        load_fonts()
+        self.listener = create_listener(self.address)
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.fill()
+        for worker in self.idle:
+            worker.wait_warm()
+        print(f"Warm pool ready on {self.address} with {len(self.idle)} idle workers", flush=True)
+
+        self.running = True
+        try:
+            while self.running:
+                for key, _ in self.selector.select(timeout=1.0):
+                    if key.fileobj is self.listener:
+                        connection, _ = self.listener.accept()
+                        self.selector.register(connection, selectors.EVENT_READ, connection.makefile('rb'))
+                    else:
+                        self.serve_line(key.fileobj, key.data)
+                self.reap()
+        finally:
+            self.close()
+
+    def serve_line(self, connection, reader):
+        line = reader.readline()
+        if not line:
+            self.selector.unregister(connection)
+            reader.close()
+            connection.close()
+            return
+        if not line.strip():
+            return
+        try:
+            reply = self.handle_request(json.loads(line))
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e)}
+        try:
+            connection.sendall(encode_message(reply))
+        except OSError:
+            pass
+
+    def close_connections(self):
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None:
+                key.data.close()
+            key.fileobj.close()
+        self.selector.close()
+
+    def close(self):
+        for worker in self.idle:
+            worker.close()  # EOF on the assignment pipe makes idle workers exit
+        self.idle = []
+        self.close_connections()
+        family, bind_address = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(bind_address):
+            os.unlink(bind_address)
+
+
+class WarmPoolClient:
+    """Blocking client for a running warm pool"""
+
+    def __init__(self, address, timeout=30.0, connect_timeout=10.0):
+        family, connect_address = parse_address(address)
+        deadline = time.monotonic() + connect_timeout
+        while True:
+            self.sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                self.sock.connect(connect_address)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                # The pool may still be starting; poll until its socket accepts
+                self.sock.close()
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.02)
+        self.sock.settimeout(timeout)
+        self.reader = self.sock.makefile('rb')
+
+    def request(self, op, **options):
+        self.sock.sendall(encode_message({'op': op, **options}))
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Warm pool closed the connection")
+        return json.loads(line)
+
+    def spawn(self, **options):
+        """Start a game and return once its first frame is drawn"""
+        return self.request('spawn', **options)
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-forked warm pool of game processes')
+    parser.add_argument('--socket', default=os.environ.get('GAME_POOL_SOCKET', '/tmp/box_pushing_pool.sock'),
+                        help='Unix socket path or host:port of the pool')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve = subparsers.add_parser('serve', help='Run the pool')
+    serve.add_argument('--size', type=int, default=2, help='Number of idle workers kept warm')
+
+    spawn = subparsers.add_parser('spawn', help='Start a game from the pool')
+    spawn.add_argument('--cwd', help='Working directory for the game (its state files go here)')
+    spawn.add_argument('--state', help='Start from this game state JSON file')
+    spawn.add_argument('--level-pack', help='Start on a level from this level pack')
+    spawn.add_argument('--level-index', type=int, help='Level of --level-pack (default: random)')
+    spawn.add_argument('--resume', action='store_true',
+                       help='Resume the newest saved state in --cwd instead of a fresh level')
+    spawn.add_argument('--control', help='Serve the control protocol on this address')
+    spawn.add_argument('--journal', help='Append move history to this JSON lines file')
+    spawn.add_argument('--stream', help='Publish the state stream on this address')
+    spawn.add_argument('--record', help='Record the session to this .gif/.png/.mp4 file')
+    spawn.add_argument('--layout-file', help='Publish the grid layout here instead of the shared default')
+    # Pooled games never run game.py's parse_args, so its environment defaults are applied here
+    spawn.add_argument('--sprites', default=os.environ.get('GAME_SPRITES'),
+                       help='Sprite atlas.json baked by sprite_baker.py (default: GAME_SPRITES)')
+    spawn.add_argument('--effects', choices=list(EFFECT_QUALITIES), default=os.environ.get('GAME_EFFECTS'),
+                       help='Animation quality (default: GAME_EFFECTS, else high)')
+    spawn.add_argument('--format', choices=('json', 'env'), default='json',
+                       help='"env" prints GAME_PID/GAME_WINDOW_ID assignments for eval')
+
+    subparsers.add_parser('status', help='List idle and active workers')
+    stop = subparsers.add_parser('stop', help='Terminate an active game')
+    stop.add_argument('pid', type=int)
+    subparsers.add_parser('shutdown', help='Stop the pool (running games keep running)')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        WarmPool(args.socket, args.size).serve()
+        return 0
+
+    client = WarmPoolClient(args.socket)
+    try:
+        if args.command == 'spawn':
+            options = {'cwd': os.path.abspath(args.cwd) if args.cwd else os.getcwd(),
+                       'resume': args.resume}
+            for name in ('state', 'level_pack', 'journal', 'record', 'sprites', 'layout_file'):
+                if getattr(args, name):
+                    options[name] = os.path.abspath(getattr(args, name))
+            for name in ('control', 'stream', 'effects'):
+                if getattr(args, name):
+                    options[name] = getattr(args, name)
+            if args.level_index is not None:
+                options['level_index'] = args.level_index
+            reply = client.spawn(**options)
+        elif args.command == 'stop':
+            reply = client.request('stop', pid=args.pid)
+        else:
+            reply = client.request(args.command)
+    finally:
+        client.close()
+
+    if args.command == 'spawn' and args.format == 'env' and reply.get('ok'):
+        print(f"GAME_PID={reply['pid']}")
+        print(f"GAME_WINDOW_ID={reply['window'] or ''}")
+    else:
+        print(json.dumps(reply))
+    return 0 if reply.get('ok') else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
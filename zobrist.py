@@ -0,0 +1,122 @@
+"""
+Zobrist hashing and a bounded transposition table for box pushing states.
+
+A state hash is the XOR of a level key, one 64-bit key for the player cell and
+one key per box cell, so a move only needs two XORs to update it. The level key
+folds in the grid size and every wall and target cell, and is computed once
+per level, so the same player and box cells on different levels hash
+differently. Keys depend only on the seed and the cell, so a state's hash is
+stable across processes, and hashes from different levels are unrelated.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+
+ZOBRIST_SEED = 0x9E3779B97F4A7C15
+MASK_64 = (1 << 64) - 1
+
+PLAYER = 0
+BOX = 1
+WALL = 2
+TARGET = 3
+SIZE = 4
+
+
+def splitmix64(value: int) -> int:
+    """Mix a 64-bit integer into a well-distributed 64-bit key"""
+    value = (value + 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+class ZobristTable:
+    """Per-cell random keys for the player and for boxes"""
+
+    def __init__(self, grid_width: int, grid_height: int, seed: int = ZOBRIST_SEED):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.seed = seed
+        self.player_keys = self._build_keys(PLAYER)
+        self.box_keys = self._build_keys(BOX)
+        self.wall_keys = self._build_keys(WALL)
+        self.target_keys = self._build_keys(TARGET)
+
+    def _build_keys(self, piece: int):
+        return [[splitmix64(self.seed ^ ((piece << 48) | (y << 24) | x))
+                 for x in range(self.grid_width)]
+                for y in range(self.grid_height)]
+
+    def player(self, x: int, y: int) -> int:
+        return self.player_keys[y][x]
+
+    def box(self, x: int, y: int) -> int:
+        return self.box_keys[y][x]
+
+    def level_key(self, game_state: Dict) -> int:
+        """Key of the static level: grid size, walls and targets"""
+        value = splitmix64(self.seed ^ ((SIZE << 48) | (self.grid_height << 24) | self.grid_width))
+        for y, row in enumerate(game_state['grid']):
+            for x, cell in enumerate(row):
+                if cell == 'wall':
+                    value ^= self.wall_keys[y][x]
+        for target in game_state['targets']:
+            value ^= self.target_keys[target['y']][target['x']]
+        return value
+
+    def hash_state(self, game_state: Dict) -> int:
+        """Compute the full hash of a state from scratch"""
+        player = game_state['player']
+        value = self.level_key(game_state) ^ self.player(player['x'], player['y'])
+        for box in game_state['boxes']:
+            value ^= self.box(box['x'], box['y'])
+        return value
+
+
+class TranspositionTable:
+    """Bounded hash -> value map with least-recently-used eviction"""
+
+    def __init__(self, capacity: int = 100000):
+        if capacity < 1:
+            raise ValueError(f"Transposition table capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.entries
+
+    def lookup(self, key: int) -> Optional[object]:
+        """Return the stored value for a hash, or None, refreshing its recency"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, value: object):
+        """Insert or update an entry, evicting the least recently used one when full"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.entries[key] = value
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'size': len(self.entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }